@@ -0,0 +1,159 @@
+"""Headless aggregator: one poller whose snapshots are shared by many screens.
+
+``python aggregator.py`` reads the same config.yml as the app and polls
+every source (tube status, arrivals, bike points, overground) once, with
+the same ``polling.SourcePoller`` and so on the same per-source adaptive
+cadence. Each new table is published through a ``web_server.SnapshotServer``
+(SSE on ``/events``, JSON on ``/snapshot``, a browser page on ``/``), along
+with the request and build timings in metrics.py on ``/metrics``.
+
+Screens run ``display_code.py`` with ``aggregator_url`` set and follow the
+stream with ``subscribe`` instead of polling TfL, so N screens cost one set
+of upstream requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterable, AsyncIterator
+from pathlib import Path
+from typing import Any
+from urllib.parse import urljoin
+
+from metrics import METRICS
+from polling import SourcePoller
+from snapshots import table_from_payload
+from web_server import KEEPALIVE, SnapshotServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class Aggregator(SourcePoller):
+    """Poll every data source once and publish each new table to subscribers."""
+
+    # The fetchers always build RecordTables: nothing here needs pandas
+    data_backend = "records"
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Serves the latest table of each source to every screen
+        self.server = SnapshotServer(metrics=METRICS)
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> Aggregator:
+        """Build from the same config.yml keys as the app (see polling.SourcePoller)."""
+        aggregator = cls()
+        aggregator.configure(cfg)
+        return aggregator
+
+    def load_snapshots(self) -> None:
+        """Publish the last run's snapshots, marked stale, until fresh data arrives."""
+        if self.snapshots is None:
+            return
+        for source, (table, saved_at) in self.snapshots.load_all().items():
+            if source in self._sources():
+                self.server.publish(source, table, saved_at, stale=True)
+
+    async def _show_fresh(self, name: str, table, fetched_at: float) -> None:
+        """Publish a fresh table, saving a snapshot only when it changed."""
+        published = self.server.publish(name, table, fetched_at)
+        await self._record_fresh(name, table, fetched_at, changed=published)
+
+    def _show_stale(self, name: str) -> None:
+        self.server.mark_stale(name)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        """Serve snapshots on ``host:port`` and poll every source until cancelled."""
+        self.open_clients()
+        self.load_snapshots()
+        await self.server.start(host, port)
+        tasks = [self._poll_sources()]
+        if self.history is not None:
+            tasks.append(self.history.run())
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await self.server.close()
+            await self.close_sources()
+
+
+async def iter_sse(lines: AsyncIterable[str]) -> AsyncIterator[tuple[str, str]]:
+    """Yield ``(event, data)`` for each event in a Server-Sent Events line stream."""
+    event, data = "message", []
+    async for line in lines:
+        line = line.rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue
+        else:
+            field, _, value = line.partition(":")
+            value = value.removeprefix(" ")
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+
+
+async def subscribe(
+    url: str, backend: str = "pandas"
+) -> AsyncIterator[tuple[str, Any, float, bool]]:
+    """Follow an aggregator's /events and yield ``(source, table, fetched_at, stale)``.
+
+    Ends when the aggregator closes the stream; connection errors and a silent
+    aggregator (no keep-alive within a few ``KEEPALIVE`` periods) raise ``httpx.HTTPError``.
+    """
+    import httpx
+
+    timeout = httpx.Timeout(10.0, read=KEEPALIVE * 3)
+    async with (
+        httpx.AsyncClient(timeout=timeout) as client,
+        client.stream(
+            "GET", urljoin(url, "events"), headers={"Accept": "text/event-stream"}
+        ) as response,
+    ):
+        response.raise_for_status()
+        async for event, data in iter_sse(response.aiter_lines()):
+            if event != "snapshot":
+                continue
+            snapshot = json.loads(data)
+            table = table_from_payload(snapshot["columns"], snapshot["rows"], backend)
+            if table is None:
+                logger.warning("Skipping %s snapshot with unknown columns", snapshot["source"])
+                continue
+            yield snapshot["source"], table, snapshot["fetched_at"], snapshot["stale"]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import yaml
+
+    parser = argparse.ArgumentParser(description="Poll TfL once and serve snapshots to screens")
+    parser.add_argument("--config", type=Path, default=Path(__file__).parent / "config.yml")
+    parser.add_argument("--host", help=f"default aggregator_host or {DEFAULT_HOST}")
+    parser.add_argument("--port", type=int, help=f"default aggregator_port or {DEFAULT_PORT}")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    cfg = {}
+    if args.config.exists():
+        with open(args.config, encoding="utf-8") as f:
+            cfg = yaml.safe_load(f) or {}
+    aggregator = Aggregator.from_config(cfg)
+    try:
+        asyncio.run(
+            aggregator.serve(
+                args.host or cfg.get("aggregator_host", DEFAULT_HOST),
+                args.port or cfg.get("aggregator_port", DEFAULT_PORT),
+            )
+        )
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,89 @@
+"""Refresh latency of ``_next_train_or_bus`` versus stop/line pair count.
+
+Runs against a local stub TfL server with a fixed per-request latency and
+compares a serial fetch (``max_in_flight=1``, the old behaviour) with the
+concurrent fan-out. ``--lines-per-stop`` groups several lines onto each stop
+so the batched multi-line calls show up in the ``calls`` column.
+
+    python -m benchmarks.bench_arrivals_fanout --latency 0.08
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.stub_server import StubServer
+from line import _next_train_or_bus
+
+
+def _arrivals_handler(path: str):
+    # Line/{line,line,...}/Arrivals/{stop}
+    line_ids = path.split("/")[1].split(",")
+    return 200, [
+        {
+            "modeName": "bus",
+            "lineName": line,
+            "lineId": line,
+            "platformName": "",
+            "expectedArrival": f"2030-01-01T12:0{i}:00Z",
+        }
+        for line in line_ids
+        for i in range(3)
+    ]
+
+
+def _stops(pairs: int, lines_per_stop: int) -> dict:
+    # spread `pairs` stop/line pairs over stops serving `lines_per_stop` lines each
+    stops: dict = {}
+    for i in range(pairs):
+        stop = stops.setdefault(f"Stop {i // lines_per_stop}", {"id": f"490{i:06d}", "lines": []})
+        stop["lines"].append(str(100 + i))
+    return stops
+
+
+async def _time_refresh(base_url: str, stops: dict, max_in_flight: int, repeat: int) -> float:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        # warm the connection pool so only request latency is measured
+        await _next_train_or_bus(client, stops, max_in_flight=max_in_flight)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await _next_train_or_bus(client, stops, max_in_flight=max_in_flight)
+        return (time.perf_counter() - start) / repeat
+
+
+async def main(
+    latency: float, pair_counts: list[int], lines_per_stop: int, max_in_flight: int, repeat: int
+) -> None:
+    async with StubServer(_arrivals_handler, latency=latency) as server:
+        print(
+            f"stub latency {latency * 1000:.0f} ms, max_in_flight={max_in_flight}, "
+            f"lines_per_stop={lines_per_stop}"
+        )
+        print(f"{'pairs':>6} {'calls':>6} {'serial ms':>10} {'fan-out ms':>11} {'speed-up':>9}")
+        for pairs in pair_counts:
+            stops = _stops(pairs, lines_per_stop)
+            serial = await _time_refresh(server.base_url, stops, 1, repeat)
+            before = server.request_count
+            fanned = await _time_refresh(server.base_url, stops, max_in_flight, repeat)
+            calls = (server.request_count - before) // (repeat + 1)
+            print(
+                f"{pairs:>6} {calls:>6} {serial * 1000:>10.1f} {fanned * 1000:>11.1f} "
+                f"{serial / fanned:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency (s)")
+    parser.add_argument("--pairs", type=int, nargs="+", default=[1, 5, 10, 15, 30])
+    parser.add_argument("--lines-per-stop", type=int, default=1)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.latency, args.pairs, args.lines_per_stop, args.max_in_flight, args.repeat)
+    )
@@ -0,0 +1,79 @@
+"""Start-up time and memory of the pandas and records backends.
+
+Each backend runs in a fresh interpreter that imports the fetcher modules,
+builds the arrivals and bike point tables from the recorded fixtures, and
+reports import time, build time, peak RSS and whether pandas got loaded.
+
+    python -m benchmarks.bench_backends --size 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.make_fixtures import FIXTURE_DIR, write_fixtures
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+_CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+from bikepoint import _bike_info_table
+from line import (
+    _add_arrival_rows, _eta_dashboard_from_columns, _eta_records_from_columns, _new_eta_columns
+)
+if {backend!r} == "pandas":
+    import pandas
+imported = time.perf_counter()
+
+predictions = json.loads(open({arrivals!r}).read())
+infos = {{item["id"]: item for item in json.loads(open({bikepoints!r}).read())}}
+columns = _new_eta_columns()
+_add_arrival_rows(columns, "northern", "Camden Town", predictions)
+build = _eta_records_from_columns if {backend!r} == "records" else _eta_dashboard_from_columns
+build(columns)
+_bike_info_table(list(infos), infos, {backend!r})
+built = time.perf_counter()
+
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "build_ms": (built - imported) * 1000,
+    "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "pandas_loaded": "pandas" in sys.modules,
+}}))
+"""
+
+
+def measure(backend: str, size: int) -> dict:
+    code = _CHILD.format(
+        backend=backend,
+        arrivals=str(FIXTURE_DIR / f"arrivals_{size}.json"),
+        bikepoints=str(FIXTURE_DIR / f"bikepoints_{size}.json"),
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100, choices=(10, 100, 1000))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not (FIXTURE_DIR / f"arrivals_{args.size}.json").exists():
+        write_fixtures()
+
+    print(f"{'backend':<8} {'import ms':>10} {'build ms':>9} {'peak RSS MiB':>13} {'pandas':>7}")
+    for backend in ("pandas", "records"):
+        runs = [measure(backend, args.size) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["import_ms"] + r["build_ms"])
+        print(
+            f"{backend:<8} {best['import_ms']:>10.1f} {best['build_ms']:>9.1f} "
+            f"{best['max_rss_mib']:>13.1f} {best['pandas_loaded']!s:>7}"
+        )
@@ -0,0 +1,86 @@
+"""Connection reuse of the shared ClientRegistry pool against a local stub.
+
+Issues the same burst of concurrent GETs three ways and reports the TCP
+connections the stub accepted and the wall time:
+
+- ``per-request``: a new client (and connection) for every request
+- ``per-module``: the old layout, one client each in line.py, bikepoint.py
+  and display_code.py, with requests spread across them
+- ``registry``: one pooled client from ``ClientRegistry``
+
+    python -m benchmarks.bench_connection_reuse --requests 300 --concurrency 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.stub_server import StubServer
+from clients import ClientRegistry
+
+
+def _handler(path: str):
+    return 200, {"path": path}
+
+
+async def _burst(get_client, requests: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await get_client(i).get(f"BikePoint/BikePoints_{i}")
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+
+
+async def per_request(base_url: str, requests: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore, httpx.AsyncClient(base_url=base_url) as client:
+            await client.get(f"BikePoint/BikePoints_{i}")
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+
+
+async def per_module(base_url: str, requests: int, concurrency: int) -> None:
+    clients = [httpx.AsyncClient(base_url=base_url) for _ in range(3)]
+    try:
+        await _burst(lambda i: clients[i % 3], requests, concurrency)
+    finally:
+        for client in clients:
+            await client.aclose()
+
+
+async def registry(base_url: str, requests: int, concurrency: int) -> None:
+    async with ClientRegistry(cache=False) as clients:
+        client = clients.get(base_url)
+        await _burst(lambda i: client, requests, concurrency)
+
+
+async def main(requests: int, concurrency: int, latency: float) -> None:
+    print(f"{requests} requests, {concurrency} concurrent, stub latency {latency * 1000:.0f} ms")
+    print(f"{'strategy':<12} {'connections':>12} {'wall ms':>9}")
+    for name, strategy in (
+        ("per-request", per_request),
+        ("per-module", per_module),
+        ("registry", registry),
+    ):
+        async with StubServer(_handler, latency=latency) as server:
+            start = time.perf_counter()
+            await strategy(server.base_url, requests, concurrency)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<12} {server.connection_count:>12} {elapsed * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency))
@@ -0,0 +1,102 @@
+"""Row-wise versus whole-column ETA computation in the pandas backend.
+
+Times the per-row ``apply`` paths the arrivals and overground tables used to
+take against the vectorized replacements, and checks both give the same
+output:
+
+- ``countdown``: ``Series.apply(format_timedelta)`` vs ``line.format_timedeltas``
+- ``iso``: overground's ``_make_iso`` via ``DataFrame.apply(axis=1)`` vs
+  column string concatenation
+
+    python -m benchmarks.bench_eta_format --sizes 100 1000 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from line import format_timedelta, format_timedeltas
+
+
+def _deltas(n: int) -> pd.Series:
+    rng = random.Random(n)
+    now = datetime.now()
+    expected = pd.Series(
+        [now + timedelta(seconds=rng.randint(-120, 1800)) for _ in range(n)], dtype="M8[us]"
+    )
+    return expected - now
+
+
+def _overground_frame(n: int) -> pd.DataFrame:
+    rng = random.Random(n)
+    return pd.DataFrame(
+        {
+            "expectedDate": ["2030-01-01" if rng.random() > 0.05 else "" for _ in range(n)],
+            "expectedTime": [
+                f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}" for _ in range(n)
+            ],
+        }
+    )
+
+
+def _make_iso(r):
+    date = r.get("expectedDate") or ""
+    time = r.get("expectedTime") or ""
+    if date and time:
+        return f"{date}T{time}:00Z"
+    return pd.NA
+
+
+def countdown_rowwise(deltas: pd.Series) -> pd.Series:
+    return deltas.apply(format_timedelta)
+
+
+def countdown_vectorized(deltas: pd.Series) -> pd.Series:
+    return format_timedeltas(deltas)
+
+
+def iso_rowwise(df: pd.DataFrame) -> pd.Series:
+    return df.apply(_make_iso, axis=1)
+
+
+def iso_vectorized(df: pd.DataFrame) -> pd.Series:
+    date = df["expectedDate"].fillna("").astype(str)
+    time = df["expectedTime"].fillna("").astype(str)
+    iso = date + "T" + time + ":00Z"
+    return iso.where((date != "") & (time != ""), pd.NA)
+
+
+def _best_of(func, arg, repeat: int) -> tuple[float, pd.Series]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(sizes: list[int], repeat: int) -> None:
+    print(f"{'step':<10} {'rows':>6} {'row-wise ms':>12} {'vectorized ms':>14} {'speed-up':>9}")
+    for n in sizes:
+        for step, rowwise, vectorized, make_input in (
+            ("countdown", countdown_rowwise, countdown_vectorized, _deltas),
+            ("iso", iso_rowwise, iso_vectorized, _overground_frame),
+        ):
+            data = make_input(n)
+            old, old_result = _best_of(rowwise, data, repeat)
+            new, new_result = _best_of(vectorized, data, repeat)
+            assert old_result.fillna("").tolist() == new_result.fillna("").tolist(), step
+            print(f"{step:<10} {n:>6} {old * 1000:>12.2f} {new * 1000:>14.2f} {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.sizes, args.repeat)
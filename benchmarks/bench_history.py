@@ -0,0 +1,116 @@
+"""Write and query throughput of the history store over weeks of synthetic data.
+
+Generates ``--days`` of snapshots every ``--interval`` seconds: every one of
+``--docks`` bike docks, and three predicted vehicles for each of ``--stops``
+stops on two lines. Rows are written the way ``HistoryRecorder`` writes them,
+one batch per ``--flush`` seconds of snapshots, into a fresh directory.
+Reported: insert rate, bytes on disk per row, and how long the aggregate
+queries take over one hour, one day and the whole range, for all docks and
+stops and for a single one.
+
+    python -m benchmarks.bench_history --days 7 --docks 50 --stops 20 --interval 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+from history import HistoryStore
+
+START = int(datetime(2026, 1, 5, tzinfo=UTC).timestamp())
+LINES = ("central", "88")
+
+
+def snapshots(args):
+    rng = random.Random(args.seed)
+    docks = [f"BikePoints_{i}" for i in range(args.docks)]
+    stops = [f"Stop {i}" for i in range(args.stops)]
+    bikes_now = {dock: rng.randint(0, 20) for dock in docks}
+    end = START + args.days * 86400
+    for ts in range(START, end, args.interval):
+        bikes = []
+        for dock in docks:
+            bikes_now[dock] = min(20, max(0, bikes_now[dock] + rng.randint(-1, 1)))
+            bikes.append((ts, dock, bikes_now[dock], 20 - bikes_now[dock]))
+        arrivals = [
+            (ts, stop, line, f"{line}-{(ts // 300 + k) % 40}", ts + 60 + k * 240 - ts % 240)
+            for stop in stops
+            for line in LINES
+            for k in range(3)
+        ]
+        yield ts, bikes, arrivals
+
+
+def timed(label: str, query) -> None:
+    started = time.perf_counter()
+    rows = query()
+    print(f"  {label:<28} {(time.perf_counter() - started) * 1000:8.1f} ms  {len(rows):>7} rows")
+
+
+def main(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(Path(tmp), max_mb=args.max_mb)
+        batch_every = max(1, args.flush // args.interval)
+        bikes: list = []
+        arrivals: list = []
+        written = 0
+        spent = 0.0
+        for i, (_, snap_bikes, snap_arrivals) in enumerate(snapshots(args), 1):
+            bikes += snap_bikes
+            arrivals += snap_arrivals
+            if i % batch_every == 0:
+                started = time.perf_counter()
+                store.write(bikes, arrivals)
+                spent += time.perf_counter() - started
+                written += len(bikes) + len(arrivals)
+                bikes, arrivals = [], []
+        started = time.perf_counter()
+        store.write(bikes, arrivals)
+        spent += time.perf_counter() - started
+        written += len(bikes) + len(arrivals)
+
+        files = store.files()
+        size = sum(f.stat().st_size for f in files)
+        print(
+            f"{args.days} days, {args.docks} docks, {args.stops} stops x {len(LINES)} lines, "
+            f"every {args.interval} s, batches of {args.flush} s"
+        )
+        print(
+            f"wrote {written:,} rows in {spent:.1f} s ({written / spent:,.0f} rows/s), "
+            f"{len(files)} files, {size / 2**20:.1f} MB, {size / written:.1f} bytes/row"
+        )
+
+        end = START + args.days * 86400
+        day = START + (args.days // 2) * 86400
+        print("queries:")
+        timed("bikes, 1 hour, 5 min", lambda: store.bike_availability(day, day + 3600, 300))
+        timed("bikes, 1 day, 1 hour", lambda: store.bike_availability(day, day + 86400))
+        timed("bikes, all, 1 hour", lambda: store.bike_availability(START, end))
+        timed(
+            "bikes, all, 1 hour, 1 dock",
+            lambda: store.bike_availability(START, end, docks=["BikePoints_1"]),
+        )
+        timed("arrivals, 1 hour, 5 min", lambda: store.arrival_waits(day, day + 3600, 300))
+        timed("arrivals, 1 day, 1 hour", lambda: store.arrival_waits(day, day + 86400))
+        timed("arrivals, all, 1 hour", lambda: store.arrival_waits(START, end))
+        timed(
+            "arrivals, all, 1 hour, 1 stop",
+            lambda: store.arrival_waits(START, end, stops=["Stop 1"], lines=["88"]),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--docks", type=int, default=50)
+    parser.add_argument("--stops", type=int, default=20)
+    parser.add_argument("--interval", type=int, default=30, help="seconds between snapshots")
+    parser.add_argument("--flush", type=int, default=30, help="seconds of snapshots per write")
+    parser.add_argument("--max-mb", type=float, default=256)
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
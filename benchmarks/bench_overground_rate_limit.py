@@ -0,0 +1,94 @@
+"""Overground route fetching: serial with fixed pauses vs concurrent under a token bucket.
+
+Fetches ``--routes`` bidirectional routes from a local stub that records the
+arrival time of every request, first the old way (one direction at a time
+with a 50 ms pause after each) and then concurrently through a
+``rate_limit.TokenBucket``. For each it reports wall time, the busiest
+one-second window and whether every window stayed within the bucket's
+budget of ``burst + rate * window`` requests (with a little slack for connection set-up).
+
+    python -m benchmarks.bench_overground_rate_limit --routes 10 --rate 10 --burst 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.stub_server import StubServer
+from overground import Overground
+from rate_limit import TokenBucket
+
+
+def _handler(path: str):
+    return 200, {"services": []}
+
+
+def _routes(count: int) -> list[dict]:
+    return [
+        {"name": f"Route {i}", "from": f"A{i:02d}", "to": f"B{i:02d}", "bidirectional": True}
+        for i in range(count)
+    ]
+
+
+async def _serial(fetcher: Overground, routes: list[dict]) -> None:
+    # the previous get_live_trains loop
+    for route in routes:
+        for frm, to in ((route["from"], route["to"]), (route["to"], route["from"])):
+            await fetcher.fetch_services(frm, to)
+            await asyncio.sleep(0.05)
+
+
+def _within_budget(times: list[float], rate: float, burst: int) -> bool:
+    # every window starting at a request may hold at most burst + rate * length requests;
+    # the slack (one request, plus 20 ms worth at the bucket rate) covers tokens granted
+    # while a new connection was still opening, which then reach the server bunched up
+    for i, start in enumerate(times):
+        for j in range(i, len(times)):
+            if j - i + 1 > burst + rate * (times[j] - start + 0.02) + 1:
+                return False
+    return True
+
+
+def _busiest_second(times: list[float]) -> int:
+    return max((sum(1 for t in times if start <= t < start + 1) for start in times), default=0)
+
+
+async def main(route_count: int, rate: float, burst: int, latency: float) -> None:
+    routes = _routes(route_count)
+    print(
+        f"{route_count} bidirectional routes, stub latency {latency * 1000:.0f} ms, "
+        f"bucket rate={rate}/s burst={burst}"
+    )
+    print(f"{'strategy':<12} {'requests':>9} {'wall ms':>9} {'max/1s':>7} {'in budget':>10}")
+    for name, concurrent in (("serial", False), ("token-bucket", True)):
+        async with StubServer(_handler, latency=latency) as server:
+            async with httpx.AsyncClient() as client:
+                if concurrent:
+                    fetcher = Overground(client, server.base_url, limiter=TokenBucket(rate, burst))
+                    start = time.perf_counter()
+                    await fetcher.get_live_trains(routes, backend="records")
+                else:
+                    fetcher = Overground(client, server.base_url, limiter=TokenBucket(0))
+                    start = time.perf_counter()
+                    await _serial(fetcher, routes)
+                elapsed = time.perf_counter() - start
+            times = server.request_times
+            ok = _within_budget(times, rate, burst)
+            print(
+                f"{name:<12} {len(times):>9} {elapsed * 1000:>9.0f} "
+                f"{_busiest_second(times):>7} {'yes' if ok else 'NO':>10}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=10.0)
+    parser.add_argument("--burst", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.08)
+    args = parser.parse_args()
+    asyncio.run(main(args.routes, args.rate, args.burst, args.latency))
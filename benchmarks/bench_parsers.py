@@ -0,0 +1,141 @@
+"""Micro-benchmarks for the arrival and bike point parsers.
+
+Times the full parse-and-build path (payload -> dashboard DataFrame) for the
+recorded fixtures at 10/100/1000 predictions, next to the old row-by-row
+``df.loc[len(df)] = row`` build step (without the sort/format that follows)
+for comparison.
+
+Save a baseline and check later runs against it to catch regressions:
+
+    python -m benchmarks.bench_parsers --save baseline.json
+    python -m benchmarks.bench_parsers --compare baseline.json --tolerance 0.25
+
+``--compare`` exits with status 1 if any case is slower than the baseline by
+more than ``tolerance`` (a fraction).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.make_fixtures import FIXTURE_DIR, SIZES, write_fixtures
+from bikepoint import _bike_info_table, _bikepoint_row
+from line import (
+    ETA_DASHBOARD_COLS,
+    _add_arrival_rows,
+    _eta_dashboard_from_columns,
+    _new_eta_columns,
+    _split_arrivals_by_line,
+)
+from records import BikePointRecord
+
+
+def _load(name: str, size: int) -> list[dict]:
+    path = FIXTURE_DIR / f"{name}_{size}.json"
+    if not path.exists():
+        write_fixtures()
+    return json.loads(path.read_text())
+
+
+def _group_by_line(predictions: list[dict]) -> dict:
+    lines = tuple(dict.fromkeys(p["lineId"] for p in predictions))
+    return _split_arrivals_by_line(lines, predictions)
+
+
+def parse_arrivals(grouped: dict) -> pd.DataFrame:
+    columns = _new_eta_columns()
+    for line, predictions in grouped.items():
+        _add_arrival_rows(columns, line, "Camden Town", predictions)
+    return _eta_dashboard_from_columns(columns)
+
+
+def parse_arrivals_loc_append(grouped: dict) -> pd.DataFrame:
+    # The previous row-at-a-time build, kept for comparison only
+    df = pd.DataFrame(columns=pd.Index(ETA_DASHBOARD_COLS))
+    for line, predictions in grouped.items():
+        for prediction in predictions:
+            platform = (
+                prediction.get("platformName", "")[:10]
+                if prediction["modeName"] == "tube"
+                else prediction.get("lineName", "")
+            )
+            df.loc[len(df)] = {
+                "modeName": prediction["modeName"],
+                "line": line,
+                "stationName": "Camden Town",
+                "platformName": platform,
+                "expectedArrival": prediction["expectedArrival"],
+            }
+    return df
+
+
+def parse_bikepoints(infos: dict) -> pd.DataFrame:
+    return _bike_info_table(list(infos), infos)
+
+
+def parse_bikepoints_loc_append(infos: dict) -> pd.DataFrame:
+    df = pd.DataFrame(columns=pd.Index(list(BikePointRecord.__slots__)))
+    for id, info in infos.items():
+        df.loc[len(df)] = _bikepoint_row(id, info)
+    return df
+
+
+def _best_of(func, arg, repeat: int) -> float:
+    number = 1
+    # scale the inner loop so each sample runs for at least ~20 ms
+    while timeit.timeit(lambda: func(arg), number=number) < 0.02 and number < 10_000:
+        number *= 10
+    return min(timeit.repeat(lambda: func(arg), number=number, repeat=repeat)) / number
+
+
+def run(repeat: int) -> dict[str, float]:
+    results = {}
+    for size in SIZES:
+        grouped = _group_by_line(_load("arrivals", size))
+        infos = {item["id"]: item for item in _load("bikepoints", size)}
+        cases = {
+            f"arrivals_{size}": (parse_arrivals, grouped),
+            f"arrivals_loc_append_{size}": (parse_arrivals_loc_append, grouped),
+            f"bikepoints_{size}": (parse_bikepoints, infos),
+            f"bikepoints_loc_append_{size}": (parse_bikepoints_loc_append, infos),
+        }
+        for name, (func, arg) in cases.items():
+            results[name] = _best_of(func, arg, repeat)
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float) -> bool:
+    ok = True
+    for name, seconds in results.items():
+        if name not in baseline or "loc_append" in name:
+            continue
+        ratio = seconds / baseline[name]
+        if ratio > 1 + tolerance:
+            print(f"REGRESSION {name}: {ratio:.2f}x baseline")
+            ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", type=Path, help="write results as JSON to this path")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to check against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(f"{'case':<28} {'ms':>10}")
+    for name, seconds in results.items():
+        print(f"{name:<28} {seconds * 1000:>10.3f}")
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    if args.compare and not compare(results, json.loads(args.compare.read_text()), args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,109 @@
+"""Full refresh cycles against recorded TfL responses, fully offline.
+
+Replays a recording made with ``python -m benchmarks.replay`` through
+``httpx.MockTransport`` (see replay.py) and runs ``--cycles`` refresh
+cycles back to back, each fetching every recorded source concurrently
+through the app's usual client stack (HTTP cache, single flight, retries).
+Reported per cycle: wall-clock latency p50/p95/p99, requests that reached
+the replay, and CPU time of this process (parsing, building tables and the
+client layers; the replay itself only looks up pre-encoded bytes). Then the
+p50 of each stage from metrics.py.
+
+    python -m benchmarks.bench_replay benchmarks/recordings/tfl.json --cycles 50
+    python -m benchmarks.bench_replay REC --latency 0.08 --jitter 0.04 --error-rate 0.05
+    python -m benchmarks.bench_replay REC --scale 10 --backend pandas --no-cache
+
+Without ``--latency`` each response takes as long as it did when recorded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+
+from benchmarks.replay import Recording, Replay, connect, refresh_cycle, settings_from_config
+from clients import ClientRegistry
+from metrics import METRICS
+
+STAGES = ("http_request_seconds", "parse_seconds", "build_seconds")
+
+
+def _percentiles(values: list[float]) -> str:
+    if len(values) < 2:
+        return " / ".join([f"{values[0] * 1000:.1f}"] * 3) if values else "-"
+    cuts = statistics.quantiles(values, n=100)
+    return " / ".join(f"{cuts[p - 1] * 1000:.1f}" for p in (50, 95, 99))
+
+
+async def main(args) -> None:
+    recording = Recording.load(args.recording)
+    replay = Replay(
+        recording,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        scale=args.scale,
+        seed=args.seed,
+    )
+    settings = settings_from_config(recording.settings)
+    client_config = {**settings.client_config, "http_cache": not args.no_cache}
+    walls: list[float] = []
+    cpus: list[float] = []
+    requests: list[int] = []
+    failed = 0
+    async with ClientRegistry.from_config(client_config, transport=replay.transport()) as clients:
+        connect(settings, clients)
+        for cycle in range(args.warmup + args.cycles):
+            if cycle == args.warmup:
+                METRICS.reset()
+            sent = replay.requests
+            cpu = time.process_time()
+            started = time.perf_counter()
+            results = await refresh_cycle(settings, args.backend)
+            if cycle < args.warmup:
+                continue
+            walls.append(time.perf_counter() - started)
+            cpus.append(time.process_time() - cpu)
+            requests.append(replay.requests - sent)
+            failed += sum(isinstance(table, Exception) for table in results.values())
+
+    print(
+        f"{Path(args.recording).name}: {len(recording.entries)} URLs, backend {args.backend}, "
+        f"latency {'recorded' if args.latency is None else f'{args.latency * 1000:.0f} ms'}"
+        f" + jitter {args.jitter * 1000:.0f} ms, error rate {args.error_rate:.0%}, "
+        f"scale {args.scale:g}, cache {'off' if args.no_cache else 'on'}"
+    )
+    print(f"cycles: {len(walls)} (after {args.warmup} warm-up), sources failed: {failed}")
+    print(f"cycle latency p50/p95/p99 ms: {_percentiles(walls)}")
+    print(
+        f"requests per cycle: mean {statistics.mean(requests):.1f}, max {max(requests)} "
+        f"(injected errors {replay.errors}, not recorded {replay.missing})"
+    )
+    print(
+        f"CPU per cycle ms: mean {statistics.mean(cpus) * 1000:.1f}, "
+        f"p95 {_percentiles(cpus).split(' / ')[1]}, total {sum(cpus):.2f} s"
+    )
+    for key, cells in METRICS.summary_rows():
+        if key.split("|")[0] in STAGES:
+            print(f"  {cells[0]:<22} {cells[1]:<40} n={cells[2]:<5} p50 {cells[3]:>9}")
+    if args.metrics:
+        METRICS.write_json(args.metrics)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", type=Path)
+    parser.add_argument("--cycles", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=2, help="cycles run before measuring")
+    parser.add_argument("--latency", type=float, help="seconds per response (default: recorded)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share answered with 503")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply JSON list lengths")
+    parser.add_argument("--backend", choices=("records", "pandas"), default="records")
+    parser.add_argument("--no-cache", action="store_true", help="turn the HTTP cache off")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--metrics", type=Path, help="also write the stage timings as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,135 @@
+"""Refresh cycles against a fault-injecting stub, with and without the resilience layer.
+
+Two scenarios, each run with ``resilience`` off (plain pooled client) and on
+(``resilience.ResilientClient``: per-endpoint timeouts, retries, circuit
+breaker):
+
+- ``flaky``: every request may fail with a 503, stall past the endpoint
+  timeout, or have its connection dropped
+- ``outage``: the stub fails every request for ``--outage-cycles`` cycles and
+  then recovers; the breaker should stop sending requests during the outage
+  and let traffic through again once it has reset
+
+A cycle fetches tube status, arrivals and bike points like the app does; it
+is complete when all three come back full. Reported per run: complete
+cycles, requests the stub received, retries, short-circuited calls and
+cycle p50/max time.
+
+    python -m benchmarks.bench_resilience --error-rate 0.2 --stall-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from benchmarks.bench_startup import BIKEPOINTS, STOPS, _handler
+from benchmarks.stub_server import Faults, StubServer
+from bikepoint import get_specific_boris_bike_info
+from clients import ClientRegistry, client_stats
+from line import _get_tube_status_update, _next_train_or_bus
+
+
+async def _cycle(client) -> tuple[int, int, int] | None:
+    """Row counts of the three tables, or None if any fetch raised."""
+    results = await asyncio.gather(
+        _get_tube_status_update(client, backend="records"),
+        _next_train_or_bus(client, STOPS, timeout=5.0, backend="records"),
+        get_specific_boris_bike_info(client, BIKEPOINTS, backend="records"),
+        return_exceptions=True,
+    )
+    if any(isinstance(result, BaseException) for result in results):
+        return None
+    return tuple(len(result) for result in results)
+
+
+async def _run(
+    server: StubServer,
+    resilience,
+    timeout: float,
+    cycles: int,
+    outage: range | None,
+    pause: float,
+    full: tuple[int, int, int],
+):
+    faults = server.faults
+    complete = 0
+    durations = []
+    registry = ClientRegistry(timeout=timeout, cache=False, resilience=resilience)
+    async with registry as clients:
+        client = clients.get(server.base_url)
+        for i in range(cycles):
+            if outage is not None:
+                server.faults = Faults(error_rate=1.0) if i in outage else faults
+            start = time.perf_counter()
+            complete += await _cycle(client) == full
+            durations.append(time.perf_counter() - start)
+            await asyncio.sleep(pause)
+        stats = client_stats(client).get("ResilientClient")
+    return complete, durations, stats
+
+
+async def main(args) -> None:
+    resilience = {
+        "timeout": args.timeout,
+        "retries": args.retries,
+        "backoff": 0.05,
+        "failure_threshold": 3,
+        "reset_after": args.reset_after,
+    }
+
+    def flaky() -> Faults:
+        # same seed for both layers so they face the same fault sequence
+        return Faults(
+            args.error_rate, args.stall_rate, args.drop_rate, stall=args.timeout * 4, seed=1
+        )
+
+    scenarios = (
+        ("flaky", flaky, None),
+        ("outage", lambda: None, range(2, 2 + args.outage_cycles)),
+    )
+    # row counts of a fault-free cycle
+    async with StubServer(_handler) as server, ClientRegistry(cache=False) as clients:
+        full = await _cycle(clients.get(server.base_url))
+
+    print(
+        f"{args.cycles} cycles; flaky: error {args.error_rate:.0%}, stall {args.stall_rate:.0%}, "
+        f"drop {args.drop_rate:.0%}; outage: {args.outage_cycles} cycles"
+    )
+    print(
+        f"{'scenario':<8} {'layer':<10} {'complete':>9} {'requests':>9} {'retries':>8} "
+        f"{'skipped':>8} {'p50 ms':>8} {'max ms':>8}"
+    )
+    for scenario, faults, outage in scenarios:
+        for layer, options in (("plain", False), ("resilient", resilience)):
+            async with StubServer(_handler, latency=args.latency, faults=faults()) as server:
+                complete, durations, stats = await _run(
+                    server, options, args.timeout, args.cycles, outage, args.pause, full
+                )
+            retries = stats["retries"] if stats else 0
+            skipped = stats["short_circuits"] if stats else 0
+            print(
+                f"{scenario:<8} {layer:<10} {complete:>5}/{args.cycles:<3} "
+                f"{server.request_count:>9} {retries:>8} {skipped:>8} "
+                f"{statistics.median(durations) * 1000:>8.0f} {max(durations) * 1000:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    # the fetchers log every injected failure; keep the table readable
+    logging.basicConfig(level=logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--stall-rate", type=float, default=0.05)
+    parser.add_argument("--drop-rate", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=0.5, help="per-request timeout (s)")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--outage-cycles", type=int, default=8)
+    parser.add_argument("--reset-after", type=float, default=1.0, help="breaker reset (s)")
+    parser.add_argument("--pause", type=float, default=0.2, help="pause between cycles (s)")
+    asyncio.run(main(parser.parse_args()))
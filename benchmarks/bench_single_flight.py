@@ -0,0 +1,69 @@
+"""Upstream requests saved by collapsing concurrent identical GETs.
+
+Runs the overlapping calls the app and its helpers make at the same moment
+against a local stub, with ``single_flight`` off and on:
+
+- ``_get_tube_status_update`` and ``_get_tube_lines`` (both
+  ``Line/Mode/tube/Status``)
+- arrivals for a config listing the same stop under two names
+- ``--instances`` copies of the whole refresh sharing one ClientRegistry
+
+The HTTP cache is off so only in-flight collapsing is measured.
+
+    python -m benchmarks.bench_single_flight --instances 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_startup import BIKEPOINTS, _handler
+from benchmarks.stub_server import StubServer
+from bikepoint import get_specific_boris_bike_info
+from clients import ClientRegistry, client_stats
+from line import _get_tube_lines, _get_tube_status_update, _next_train_or_bus
+
+# the same stop configured twice under different names
+STOPS = {
+    "Oxford Circus": {"id": "940GZZLUOXC", "lines": ["victoria", "central"]},
+    "Oxford Circus (Victoria)": {"id": "940GZZLUOXC", "lines": ["victoria", "central"]},
+    "Regent Street": {"id": "490000173RF", "lines": ["88", "453"]},
+}
+
+
+async def _refresh(client) -> None:
+    await asyncio.gather(
+        _get_tube_status_update(client, backend="records"),
+        _get_tube_lines(client, "tube"),
+        _next_train_or_bus(client, STOPS, backend="records"),
+        get_specific_boris_bike_info(client, BIKEPOINTS, backend="records"),
+    )
+
+
+async def main(instances: int, latency: float) -> None:
+    print(f"{instances} concurrent refreshes, stub latency {latency * 1000:.0f} ms")
+    print(f"{'single-flight':<14} {'upstream':>9} {'calls':>6} {'collapsed':>10} {'wall ms':>8}")
+    for enabled in (False, True):
+        async with (
+            StubServer(_handler, latency=latency) as server,
+            ClientRegistry(cache=False, single_flight=enabled) as clients,
+        ):
+            client = clients.get(server.base_url)
+            start = time.perf_counter()
+            await asyncio.gather(*(_refresh(client) for _ in range(instances)))
+            elapsed = time.perf_counter() - start
+            stats = client_stats(client).get("SingleFlightClient", {})
+        print(
+            f"{'on' if enabled else 'off':<14} {server.request_count:>9} "
+            f"{stats.get('calls', '-'):>6} {stats.get('collapsed', '-'):>10} {elapsed * 1000:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instances", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.instances, args.latency))
@@ -0,0 +1,169 @@
+"""Startup latency of the TUI: time to first frame and to first data per panel.
+
+Runs ``TfLDisplayApp`` headless against a local stub of the TfL and
+overground APIs two ways:
+
+- ``blocking``: the old startup, every source fetched before the app starts
+- ``in-loop``: the app mounts at once and fetches each source in its own task
+
+Times are measured from the start of startup; ``first frame`` is Textual's
+``Ready`` event (first screen painted).
+
+    python -m benchmarks.bench_startup --latency 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from benchmarks.stub_server import StubServer
+from bikepoint import get_specific_boris_bike_info
+from clients import ClientRegistry
+from display_code import SOURCE_TABLES, TfLDisplayApp
+from line import _get_tube_status_update, _next_train_or_bus
+from overground import get_live_overground_trains
+
+STOPS = {
+    "Oxford Circus": {"id": "940GZZLUOXC", "lines": ["victoria", "central", "bakerloo"]},
+    "Regent Street": {"id": "490000173RF", "lines": ["88", "453"]},
+}
+BIKEPOINTS = {f"BikePoints_{i}": f"Dock {i}" for i in range(5)}
+ROUTES = [{"name": "Highbury", "from": "HHY", "to": "CMD", "bidirectional": True}]
+
+
+def _handler(path: str):
+    soon = datetime.now(UTC) + timedelta(minutes=5)
+    if path.startswith("Line/Mode/"):
+        return 200, [
+            {"name": name, "lineStatuses": [{"statusSeverityDescription": "Good Service"}]}
+            for name in ("Bakerloo", "Central", "Victoria")
+        ]
+    if path.startswith("Line/"):
+        # Line/{line,line,...}/Arrivals/{stop}
+        return 200, [
+            {
+                "modeName": "tube" if line.isalpha() else "bus",
+                "lineName": line,
+                "lineId": line,
+                "stationName": "Stub",
+                "platformName": "",
+                "vehicleId": f"{line}-{i}",
+                "expectedArrival": (soon + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+            for line in path.split("/")[1].split(",")
+            for i in range(3)
+        ]
+    if path.startswith("BikePoint/"):
+        dock = path.split("/", 1)[1]
+        return 200, {
+            "id": dock,
+            "commonName": f"{dock}, Stub",
+            "additionalProperties": [
+                {"key": "NbBikes", "value": "4"},
+                {"key": "NbEmptyDocks", "value": "6"},
+            ],
+        }
+    if path.startswith("rtt/json/search/"):
+        return 200, {
+            "services": [
+                {
+                    "runDate": soon.strftime("%Y-%m-%d"),
+                    "atocName": "London Overground",
+                    "locationDetail": {
+                        "realtimeDeparture": soon.strftime("%H%M"),
+                        "platform": "1",
+                        "destination": [{"description": "Stub"}],
+                    },
+                }
+            ]
+        }
+    return 404, {}
+
+
+class _TimedApp(TfLDisplayApp):
+    """Records when the first frame is painted and when each panel first gets data."""
+
+    # CSS_PATH resolves against the defining module, so point back at the app's stylesheet
+    CSS_PATH = str(Path(__file__).parent.parent / TfLDisplayApp.CSS_PATH)
+
+    def __init__(self, started: float, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.started = started
+        self.first_frame: float | None = None
+        self.first_data: dict[str, float] = {}
+
+    def on_ready(self) -> None:
+        self.first_frame = time.perf_counter() - self.started
+
+    def _sources(self) -> dict:
+        sources = super()._sources()
+        return {name: self._timed(name, fetch) for name, fetch in sources.items()}
+
+    def _timed(self, name: str, fetch):
+        async def timed():
+            table = await fetch()
+            if table is not None and not table.empty and name not in self.first_data:
+                self.first_data[name] = time.perf_counter() - self.started
+            return table
+
+        return timed
+
+
+async def _prefetch(client, overground_client, api_url: str) -> dict:
+    # the old __main__: every source in turn before the app exists
+    return {
+        "tube_line_status": await _get_tube_status_update(client),
+        "next_tube_and_bus_df": await _next_train_or_bus(client, STOPS),
+        "boris_bike_df": await get_specific_boris_bike_info(client, BIKEPOINTS),
+        "overground_df": await get_live_overground_trains(overground_client, ROUTES, api_url),
+    }
+
+
+async def _run(base_url: str, blocking: bool) -> tuple[float | None, dict[str, float]]:
+    api_url = base_url + "rtt"
+    async with ClientRegistry(cache=False) as clients:
+        client = clients.get(base_url)
+        started = time.perf_counter()
+        data = await _prefetch(client, client, api_url) if blocking else {}
+        prefetched = time.perf_counter() - started
+
+        app = _TimedApp(started)
+        app.data_dict = data
+        app.client = app.overground_client = client
+        app.tube_and_bus_stops = STOPS
+        app.bikepoints = BIKEPOINTS
+        app.overground_routes = ROUTES
+        app.overground_api_url = api_url
+        async with app.run_test() as pilot:
+            deadline = time.perf_counter() + 30
+            while len(app.first_data) < len(SOURCE_TABLES) and time.perf_counter() < deadline:
+                await pilot.pause(0.01)
+        if blocking:
+            # everything was on screen in the first frame
+            return app.first_frame, {name: app.first_frame or prefetched for name in SOURCE_TABLES}
+        return app.first_frame, app.first_data
+
+
+async def main(latency: float) -> None:
+    print(f"stub latency {latency * 1000:.0f} ms (times in ms from startup)")
+    print(f"{'startup':<10} {'first frame':>12} " + " ".join(f"{n:>12}" for n in SOURCE_TABLES))
+    for name, blocking in (("blocking", True), ("in-loop", False)):
+        async with StubServer(_handler, latency=latency) as server:
+            first_frame, first_data = await _run(server.base_url, blocking)
+        cells = " ".join(
+            f"{first_data[n] * 1000:>12.0f}" if n in first_data else f"{'-':>12}"
+            for n in SOURCE_TABLES
+        )
+        frame = f"{first_frame * 1000:>12.0f}" if first_frame is not None else f"{'-':>12}"
+        print(f"{name:<10} {frame} {cells}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency))
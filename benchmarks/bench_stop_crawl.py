@@ -0,0 +1,126 @@
+"""Time ``line._get_stops_on_a_line`` against the stub, one line at a time vs the crawler.
+
+Each ``Line/{id}/StopPoints`` response carries ``--stops`` stops and is held
+back by ``--latency`` seconds. Runs:
+
+- ``sequential``: the previous implementation, one awaited request per line
+- ``crawler``: ``_get_stops_on_a_line`` with ``--max-in-flight`` requests on the wire
+- ``interrupted``: the crawler with a cache file, stopped after half the lines
+- ``resumed``: the same call again, which only fetches the lines not yet cached
+
+    python -m benchmarks.bench_stop_crawl --bus-lines 60 --latency 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stub_server import StubServer
+from clients import ClientRegistry
+from line import _get_stops_on_a_line
+
+TUBE_LINES = (
+    "bakerloo", "central", "circle", "district", "hammersmith-city", "jubilee",
+    "metropolitan", "northern", "piccadilly", "victoria", "waterloo-city",
+)  # fmt: skip
+
+
+class _Interrupt(Exception):
+    pass
+
+
+def _make_handler(stops: int):
+    def handler(path: str):
+        line = path.split("/")[1]
+        return 200, [
+            {
+                "$type": "Tfl.Api.Presentation.Entities.StopPoint, Tfl.Api.Presentation.Entities",
+                "naptanId": f"{line}-{i:03d}",
+                "commonName": f"Stop {i} ({line})",
+                "modes": ["bus"],
+                "lat": 51.5,
+                "lon": -0.1,
+            }
+            for i in range(stops)
+        ]
+
+    return handler
+
+
+async def _sequential(client, lines_to_check):
+    # the pre-crawler implementation
+    stops_dict = {}
+    for transport in lines_to_check:
+        stops_on_line = await client.get(f"Line/{transport}/StopPoints")
+        stops_dict[transport] = [
+            {"id": item["naptanId"], "name": item["commonName"]} for item in stops_on_line.json()
+        ]
+    return stops_dict
+
+
+async def _timed(server: StubServer, run) -> tuple[float, int, object]:
+    before = server.request_count
+    # no HTTP cache, so every run goes to the stub
+    async with ClientRegistry(cache=False, single_flight=False) as clients:
+        start = time.perf_counter()
+        try:
+            result = await run(clients.get(server.base_url))
+        except _Interrupt:
+            result = None
+        elapsed = time.perf_counter() - start
+    return elapsed, server.request_count - before, result
+
+
+async def main(args) -> None:
+    lines = list(TUBE_LINES) + [str(n) for n in range(1, args.bus_lines + 1)]
+    cache_path = Path(tempfile.mkdtemp()) / "stops.jsonl"
+
+    def stop_halfway(done, total, line):
+        if done >= total // 2:
+            raise _Interrupt
+
+    runs = (
+        ("sequential", lambda client: _sequential(client, lines)),
+        (
+            "crawler",
+            lambda client: _get_stops_on_a_line(client, lines, max_in_flight=args.max_in_flight),
+        ),
+        (
+            "interrupted",
+            lambda client: _get_stops_on_a_line(
+                client, lines, args.max_in_flight, cache_path=cache_path, progress=stop_halfway
+            ),
+        ),
+        (
+            "resumed",
+            lambda client: _get_stops_on_a_line(
+                client, lines, args.max_in_flight, cache_path=cache_path
+            ),
+        ),
+    )
+    print(
+        f"{len(lines)} lines x {args.stops} stops, latency {args.latency * 1000:.0f} ms, "
+        f"max_in_flight {args.max_in_flight}"
+    )
+    print(f"{'run':<12} {'wall ms':>8} {'requests':>9} {'lines':>6}")
+    results = {}
+    async with StubServer(_make_handler(args.stops), latency=args.latency) as server:
+        for name, run in runs:
+            elapsed, requests, result = await _timed(server, run)
+            results[name] = result
+            count = len(result) if result is not None else "-"
+            print(f"{name:<12} {elapsed * 1000:>8.0f} {requests:>9} {count:>6}")
+    assert results["crawler"] == results["sequential"] == results["resumed"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bus-lines", type=int, default=60)
+    parser.add_argument("--stops", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
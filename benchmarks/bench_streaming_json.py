@@ -0,0 +1,140 @@
+"""Peak memory and wall time: whole-body ``resp.json()`` vs streaming item parsing.
+
+Serves recorded-shape payloads through ``httpx.MockTransport`` (so only the
+client side is measured) and extracts the fields the helpers keep:
+
+- ``bikepoints``: the ``BikePoint`` list (fixture ``bikepoints_1000.json``
+  repeated ``--scale`` times), keeping ``id -> commonName``
+  (``bikepoint.get_all_boris_bike_info``)
+- ``sequence``: a ``Line/{id}/Route/Sequence/all`` object built from the same
+  items (branches of 50 stops each way), keeping each stop's ``id`` and ``name``
+  (``line._all_valid_routes_single_line(..., stop_fields=...)``)
+
+Peak memory is measured with ``tracemalloc`` in a separate pass from timing.
+
+    python -m benchmarks.bench_streaming_json --scale 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+import httpx
+
+from benchmarks.make_fixtures import FIXTURE_DIR, write_fixtures
+from bikepoint import get_all_boris_bike_info
+from line import _all_valid_routes_single_line
+
+CHUNK = 64 * 1024
+
+
+def _payloads(scale: int) -> dict[str, bytes]:
+    path = FIXTURE_DIR / "bikepoints_1000.json"
+    if not path.exists():
+        write_fixtures()
+    items = json.loads(path.read_text())
+    bikepoints = [dict(item, id=f"{item['id']}_{n}") for n in range(scale) for item in items]
+    stops = [dict(item, name=item["commonName"]) for item in bikepoints]
+    sequence = {
+        "$type": "Tfl.Api.Presentation.Entities.RouteSequence, Tfl.Api.Presentation.Entities",
+        "lineId": "stub",
+        "lineStrings": ["[[-0.1, 51.5], [-0.2, 51.6]]"] * 50,
+        # one branch per 50 stops, in both directions
+        "stopPointSequences": [
+            {
+                "lineId": "stub",
+                "direction": direction,
+                "branchId": branch,
+                "stopPoint": stops[i : i + 50],
+            }
+            for direction in ("outbound", "inbound")
+            for branch, i in enumerate(range(0, len(stops), 50))
+        ],
+    }
+    return {
+        "BikePoint": json.dumps(bikepoints).encode(),
+        "Line/stub/Route/Sequence/all": json.dumps(sequence).encode(),
+    }
+
+
+def _client(payloads: dict[str, bytes]) -> httpx.AsyncClient:
+    async def body(data: bytes):
+        for start in range(0, len(data), CHUNK):
+            yield data[start : start + CHUNK]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        data = payloads[request.url.path.lstrip("/")]
+        return httpx.Response(200, stream=_AsyncBody(body(data)))
+
+    return httpx.AsyncClient(base_url="http://stub/", transport=httpx.MockTransport(handler))
+
+
+class _AsyncBody(httpx.AsyncByteStream):
+    def __init__(self, chunks) -> None:
+        self._chunks = chunks
+
+    async def __aiter__(self):
+        async for chunk in self._chunks:
+            yield chunk
+
+
+async def whole_bikepoints(client) -> dict:
+    resp = await client.get("BikePoint")
+    return {item["id"]: item["commonName"] for item in resp.json()}
+
+
+async def stream_bikepoints(client) -> dict:
+    return await get_all_boris_bike_info(client)
+
+
+async def whole_sequence(client) -> list:
+    resp = await client.get("Line/stub/Route/Sequence/all")
+    return [
+        [{"id": stop.get("id"), "name": stop.get("name")} for stop in seq["stopPoint"]]
+        for seq in resp.json()["stopPointSequences"]
+    ]
+
+
+async def stream_sequence(client) -> list:
+    result = await _all_valid_routes_single_line(client, "stub", stop_fields=("id", "name"))
+    return [seq["stopPoint"] for seq in result["stopPointSequences"]]
+
+
+async def _measure(func, payloads) -> tuple[float, float, object]:
+    async with _client(payloads) as client:
+        start = time.perf_counter()
+        result = await func(client)
+        elapsed = time.perf_counter() - start
+    async with _client(payloads) as client:
+        tracemalloc.start()
+        await func(client)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+
+async def main(scale: int) -> None:
+    payloads = _payloads(scale)
+    print(f"{'payload':<11} {'MB':>6} {'path':<7} {'wall ms':>8} {'peak MB':>8}")
+    for name, path, whole, stream in (
+        ("bikepoints", "BikePoint", whole_bikepoints, stream_bikepoints),
+        ("sequence", "Line/stub/Route/Sequence/all", whole_sequence, stream_sequence),
+    ):
+        size = len(payloads[path]) / 1e6
+        results = []
+        for label, func in (("whole", whole), ("stream", stream)):
+            elapsed, peak, result = await _measure(func, payloads)
+            results.append(result)
+            print(f"{name:<11} {size:>6.1f} {label:<7} {elapsed * 1000:>8.1f} {peak / 1e6:>8.1f}")
+        assert results[0] == results[1], f"{name}: streamed result differs"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=4, help="copies of the 1000-item fixture")
+    args = parser.parse_args()
+    asyncio.run(main(args.scale))
@@ -0,0 +1,166 @@
+"""Render cost of clear-and-repopulate versus keyed ``sync_table`` updates.
+
+Drives a headless Textual app through a series of refreshes and reports, per
+strategy, the paint passes the table went through, the cells it re-rendered,
+the cells written through the DataTable API, the time spent writing them and
+the CPU time per refresh including the repaint. Three boards are simulated:
+arrivals, where countdowns tick and vehicles come and go, bike docks,
+where only a few counts change per refresh, and line status, which rarely
+changes at all.
+
+``DataTable`` drops its whole render cache on any write, so a board where
+something changes every refresh re-renders every visible cell either way:
+on arrivals and bikes ``sync`` renders as many cells as ``clear`` and costs
+about the same CPU (a few more paints on arrivals, where removing a row
+forces a layout pass). The render saving is on boards that did not change,
+which ``sync`` does not repaint at all (status).
+
+    python -m benchmarks.bench_table_sync --rows 30 --cycles 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from textual.app import App, ComposeResult
+from textual.widgets import DataTable
+
+from table_sync import sync_table
+
+COLUMNS = ["line", "stationName", "platformName", "TimeToArrival"]
+
+
+class CountingTable(DataTable):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.paints = 0
+        self.cells_rendered = 0
+        self.cells_written = 0
+
+    def render_lines(self, crop):
+        self.paints += 1
+        return super().render_lines(crop)
+
+    def _render_cell(self, *args, **kwargs):
+        self.cells_rendered += 1
+        return super()._render_cell(*args, **kwargs)
+
+
+class BenchApp(App):
+    def compose(self) -> ComposeResult:
+        yield CountingTable(id="board")
+
+
+def _arrival_boards(rows: int, cycles: int) -> list[list[tuple[str, list[str]]]]:
+    rng = random.Random(rows)
+    vehicles = {f"V{i}": rng.randint(60, 1800) for i in range(rows)}
+    next_id = rows
+    boards = []
+    for _ in range(cycles):
+        for vehicle in list(vehicles):
+            vehicles[vehicle] -= 1
+            if vehicles[vehicle] <= 0 or rng.random() < 0.01:
+                del vehicles[vehicle]
+                vehicles[f"V{next_id}"] = rng.randint(600, 1800)
+                next_id += 1
+        ordered = sorted(vehicles.items(), key=lambda item: item[1])
+        boards.append(
+            [
+                (vehicle, ["24", "Camden", "24", f"{secs // 60} m {secs % 60} s"])
+                for vehicle, secs in ordered
+            ]
+        )
+    return boards
+
+
+def _bike_boards(rows: int, cycles: int) -> list[list[tuple[str, list[str]]]]:
+    rng = random.Random(rows)
+    bikes = {f"BikePoints_{i}": rng.randint(0, 20) for i in range(rows)}
+    boards = []
+    for _ in range(cycles):
+        for dock in rng.sample(sorted(bikes), k=max(1, rows // 10)):
+            bikes[dock] = max(0, bikes[dock] + rng.choice((-1, 1)))
+        boards.append([(dock, [dock, "Area", str(n), str(20 - n)]) for dock, n in bikes.items()])
+    return boards
+
+
+def _status_boards(rows: int, cycles: int) -> list[list[tuple[str, list[str]]]]:
+    # Line status: the same board almost every refresh, one change every ten cycles
+    statuses = {f"Line {i}": "Good Service" for i in range(rows)}
+    boards = []
+    for cycle in range(cycles):
+        if cycle and cycle % 10 == 0:
+            statuses[f"Line {cycle % rows}"] = "Minor Delays"
+        boards.append([(line, [line, status, "", ""]) for line, status in statuses.items()])
+    return boards
+
+
+def _clear_and_fill(table: DataTable, rows: list[tuple[str, list[str]]]) -> None:
+    # The previous strategy: drop every row and add them all back
+    table.clear(columns=False)
+    if not table.columns:
+        for col in COLUMNS:
+            table.add_column(col, key=col)
+    for _, cells in rows:
+        table.add_row(*cells)
+    table.cells_written += len(rows) * len(COLUMNS)
+
+
+def _sync(table: DataTable, rows: list[tuple[str, list[str]]]) -> None:
+    stats = sync_table(table, COLUMNS, rows)
+    table.cells_written += (stats.added * len(COLUMNS)) + stats.updated
+
+
+async def run(strategy, boards) -> dict:
+    app = BenchApp()
+    async with app.run_test(headless=True) as pilot:
+        table = app.query_one(CountingTable)
+        await pilot.pause()
+        table.paints = table.cells_rendered = 0
+        writing = 0.0
+        cpu = time.process_time()
+        for rows in boards:
+            start = time.perf_counter()
+            strategy(table, rows)
+            writing += time.perf_counter() - start
+            await pilot.pause()
+        cpu = time.process_time() - cpu
+        return {
+            "paints": table.paints,
+            "cells_rendered": table.cells_rendered,
+            "cells_written": table.cells_written,
+            "write_ms": writing * 1000 / len(boards),
+            "cpu_ms": cpu * 1000 / len(boards),
+        }
+
+
+async def main(rows: int, cycles: int) -> None:
+    print(f"{rows} rows, {cycles} refresh cycles")
+    print(
+        f"{'board':<9} {'strategy':<9} {'paints':>7} {'cells rendered':>15} "
+        f"{'cells written':>14} {'write ms':>9} {'CPU ms':>7}  (per cycle)"
+    )
+    for board, make_boards in (
+        ("arrivals", _arrival_boards),
+        ("bikes", _bike_boards),
+        ("status", _status_boards),
+    ):
+        boards = make_boards(rows, cycles)
+        for name, strategy in (("clear", _clear_and_fill), ("sync", _sync)):
+            result = await run(strategy, boards)
+            print(
+                f"{board:<9} {name:<9} {result['paints']:>7} {result['cells_rendered']:>15} "
+                f"{result['cells_written']:>14} {result['write_ms']:>9.2f} "
+                f"{result['cpu_ms']:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--cycles", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.cycles))
@@ -0,0 +1,91 @@
+"""The client layers' counters on every metrics surface.
+
+Builds a ``ClientRegistry`` over a mock transport whose responses carry
+``Cache-Control: max-age`` and an ``ETag``, fetches one URL, fetches it
+again (a cache hit), then fetches another one from five callers at once
+(collapsed into one request). It then checks that the cache hits and misses,
+the resilience requests and the collapsed calls show up, per host, in ``METRICS.summary_rows`` (the
+TUI's ``m`` panel), ``to_prometheus`` (``/metrics``) and ``as_dict``
+(``/metrics.json`` and ``metrics_path``), and that they are gone once the
+registry is closed.
+
+It exits with status 1 if any check fails.
+
+    python -m benchmarks.check_client_metrics
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+
+import httpx
+
+from clients import ClientRegistry
+from metrics import METRICS
+
+HOST = "api.example.test"
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        200,
+        json=[{"id": "BikePoints_1", "commonName": "River Street"}],
+        headers={"Cache-Control": "public, max-age=60", "ETag": '"v1"'},
+    )
+
+
+def _counters(prefix: str) -> dict[str, float]:
+    """``{name: value}`` for the exported counters named ``prefix*`` on ``HOST``."""
+    return {
+        c["name"]: c["value"]
+        for c in METRICS.as_dict()["counters"]
+        if c["name"].startswith(prefix) and c["labels"] == {"host": HOST}
+    }
+
+
+# Counters the fetches in main must leave behind, by exported name
+EXPECTED = {
+    "http_cache_misses_total": 2,
+    "http_cache_hits_total": 1,
+    "http_resilience_requests_total": 2,
+    "http_single_flight_calls_total": 7,
+    "http_single_flight_collapsed_total": 4,
+}
+
+
+async def main() -> int:
+    failures = []
+    registry = ClientRegistry(transport=httpx.MockTransport(_handler))
+    client = registry.get(f"https://{HOST}/")
+    await client.get("BikePoint")
+    await client.get("BikePoint")  # served from the cache
+    await asyncio.gather(*(client.get("BikePoint/BikePoints_1") for _ in range(5)))
+
+    exported = _counters("http_")
+    for name, value in EXPECTED.items():
+        if exported.get(name) != value:
+            failures.append(f"/metrics.json: {name} is {exported.get(name)}, expected {value}")
+    prometheus = METRICS.to_prometheus()
+    panel = {cells[0] for _, cells in METRICS.summary_rows()}
+    for name in EXPECTED:
+        if f'tfl_{name}{{host="{HOST}"}}' not in prometheus:
+            failures.append(f"/metrics: no tfl_{name} for {HOST}")
+        if name not in panel:
+            failures.append(f"timings panel: no {name} row")
+
+    await registry.aclose()
+    if _counters("http_"):
+        failures.append("counters still exported after the registry was closed")
+
+    for name, value in sorted(exported.items()):
+        print(f"{name:<36} {value:g}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("ok")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
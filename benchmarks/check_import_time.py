@@ -0,0 +1,75 @@
+"""Cold-start import budget for the TUI, based on ``python -X importtime``.
+
+Imports ``display_code`` in a fresh interpreter several times and takes the
+fastest run's cumulative import time, so one noisy run does not fail the
+check. It fails (exit status 1) if that time is over ``--budget-ms`` or if
+any module that should only load once a panel needs it (pandas, httpx,
+yaml, ...) is imported eagerly.
+
+    python -m benchmarks.check_import_time --budget-ms 400
+
+The default budget suits a desktop; pass a larger one on a Raspberry Pi.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Heavy packages deferred until first use; importing display_code must not pull them in
+DEFERRED = ("pandas", "numpy", "httpx", "yaml")
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """Return ``{module: cumulative microseconds}`` for one cold import of ``module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        profile[name.strip()] = int(cumulative_us)
+    return profile
+
+
+def main(module: str, budget_ms: float, runs: int, top: int) -> int:
+    profiles = [import_profile(module) for _ in range(runs)]
+    best = min(profiles, key=lambda profile: profile[module])
+    total_ms = best[module] / 1000
+
+    print(f"import {module}: {total_ms:.1f} ms (best of {runs}), budget {budget_ms:.0f} ms")
+    print("slowest packages:")
+    roots = {name: us for name, us in best.items() if "." not in name and name != module}
+    for name, us in sorted(roots.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+
+    failed = False
+    eager = [name for name in DEFERRED if name in best]
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    if total_ms > budget_ms:
+        print(f"FAIL: {total_ms:.1f} ms is over the {budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("ok")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="display_code")
+    parser.add_argument("--budget-ms", type=float, default=400)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+    sys.exit(main(args.module, args.budget_ms, args.runs, args.top))
@@ -0,0 +1,103 @@
+"""Arrival countdowns and the adaptive cadence under different local time zones.
+
+TfL sends arrival times in UTC (``expectedArrival`` ends in ``Z``), while
+the screen's clock may be on BST or any other zone. For each ``--zones``
+entry this sets the process time zone (``TZ`` + ``time.tzset``, so Unix
+only), builds the arrivals table with both backends from predictions
+``--soon`` and 10 minutes away, and checks that:
+
+- ``tick_countdowns`` keeps both vehicles and counts down from the right time
+- ``seconds_until_next_arrival`` finds the soon one
+- ``AdaptiveSchedule.next_delay`` polls at ``min_interval`` while it is within
+  ``urgent_within``, and at the base interval once only the later one is left
+
+It exits with status 1 if any check fails.
+
+    python -m benchmarks.check_timezones --zones UTC Europe/London Australia/Sydney
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+
+from countdown import seconds_until_next_arrival, tick_countdowns
+from line import (
+    _add_arrival_rows,
+    _eta_dashboard_from_columns,
+    _eta_records_from_columns,
+    _new_eta_columns,
+)
+from scheduler import AdaptiveSchedule
+
+BUILDERS = {"records": _eta_records_from_columns, "pandas": _eta_dashboard_from_columns}
+
+
+def _arrivals(backend: str, *in_seconds: float):
+    now = datetime.now(UTC)
+    columns = _new_eta_columns()
+    predictions = [
+        {
+            "modeName": "tube",
+            "platformName": "Northbound",
+            "expectedArrival": (now + timedelta(seconds=secs)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "vehicleId": str(i),
+        }
+        for i, secs in enumerate(in_seconds)
+    ]
+    _add_arrival_rows(columns, "northern", "Camden Town", predictions)
+    return BUILDERS[backend](columns)
+
+
+def check(zone: str, backend: str, soon: float) -> list[str]:
+    """Failed checks for one zone and backend (empty when all pass)."""
+    failures = []
+    table = _arrivals(backend, soon, 600)
+    ticked = tick_countdowns(table)
+    if len(ticked) != 2:
+        failures.append(f"tick_countdowns kept {len(ticked)} of 2 vehicles")
+    soonest = seconds_until_next_arrival(ticked)
+    if soonest is None or abs(soonest - soon) > 5:
+        failures.append(f"next arrival in {soonest} s, expected about {soon:.0f} s")
+
+    schedule = AdaptiveSchedule(30, min_interval=5, jitter=0, urgent_within=120)
+    delay = schedule.next_delay(table)
+    if delay != schedule.min_interval:
+        failures.append(f"{delay:.0f} s delay with a vehicle {soon:.0f} s away, expected 5 s")
+    delay = schedule.next_delay(_arrivals(backend, 600))
+    if delay != schedule.interval:
+        failures.append(f"{delay:.0f} s delay with the next vehicle 600 s away, expected 30 s")
+    return [f"{zone} {backend}: {failure}" for failure in failures]
+
+
+def main(zones: list[str], backends: list[str], soon: float) -> int:
+    failures = []
+    for zone in zones:
+        os.environ["TZ"] = zone
+        time.tzset()
+        offset = datetime.now().astimezone().strftime("%z")
+        for backend in backends:
+            zone_failures = check(zone, backend, soon)
+            print(f"{zone:<20} {offset}  {backend:<8} {'FAIL' if zone_failures else 'ok'}")
+            failures += zone_failures
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("ok")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--zones",
+        nargs="+",
+        default=["UTC", "Europe/London", "America/New_York", "Asia/Kolkata", "Australia/Sydney"],
+    )
+    parser.add_argument("--backends", nargs="+", choices=tuple(BUILDERS), default=list(BUILDERS))
+    parser.add_argument("--soon", type=float, default=90.0, help="seconds to the first vehicle")
+    args = parser.parse_args()
+    sys.exit(main(args.zones, args.backends, args.soon))
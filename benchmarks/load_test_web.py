@@ -0,0 +1,196 @@
+"""Load test for the JSON/SSE snapshot server (``web_server.SnapshotServer``).
+
+By default a server is started in a child process, fed tables fetched once
+from the local TfL stub, and re-publishes the arrivals table every
+``--publish-interval`` seconds (the other sources stay unchanged). Pass
+``--url`` to test a running aggregator or app (``web_port``) instead;
+SSE delivery latency is then only meaningful on the same machine.
+
+Readers, all in this process over raw keep-alive sockets:
+
+- ``--sse N`` subscribers on ``/events``; each event's delivery latency is
+  its arrival time minus the ``fetched_at`` it was published with
+- ``--pollers M`` clients looping ``GET /snapshot``, half of them sending
+  ``If-None-Match`` so unchanged snapshots come back as 304
+
+Reported: request throughput, request latency p50/p95/p99, the share of
+304s, events delivered per subscriber and delivery latency p50/p95/p99.
+
+    python -m benchmarks.load_test_web --sse 300 --pollers 50 --duration 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+_FETCHED_AT = re.compile(rb'"fetched_at":([0-9.]+)')
+
+
+def _percentiles(values: list[float]) -> str:
+    if len(values) < 2:
+        return "-"
+    cuts = statistics.quantiles(values, n=100)
+    return " / ".join(f"{cuts[p - 1] * 1000:.1f}" for p in (50, 95, 99))
+
+
+async def _serve(publish_interval: float) -> None:
+    """Child process: publish stub tables on a free port and print the port."""
+    from benchmarks.bench_startup import BIKEPOINTS, STOPS, _handler
+    from benchmarks.stub_server import StubServer
+    from bikepoint import get_specific_boris_bike_info
+    from clients import ClientRegistry
+    from line import _get_tube_status_update, _next_train_or_bus
+    from web_server import SnapshotServer
+
+    async with StubServer(_handler) as stub, ClientRegistry(cache=False) as clients:
+        client = clients.get(stub.base_url)
+        tables = {
+            "tube_status": await _get_tube_status_update(client, backend="records"),
+            "arrivals": await _next_train_or_bus(client, STOPS, backend="records"),
+            "bikes": await get_specific_boris_bike_info(client, BIKEPOINTS, backend="records"),
+        }
+    server = SnapshotServer()
+    for name, table in tables.items():
+        server.publish(name, table, time.time())
+    await server.start("127.0.0.1", 0)
+    print(server.address[1], flush=True)
+    arrivals = tables["arrivals"]
+    while True:
+        await asyncio.sleep(publish_interval)
+        # rotate the rows so each publish is a real change
+        arrivals.rows.append(arrivals.rows.pop(0))
+        server.publish("arrivals", arrivals, time.time())
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple[int, str | None]:
+    """Read one response off a keep-alive connection; return its status and ETag."""
+    status = int((await reader.readline()).split()[1])
+    length, etag = 0, None
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"etag":
+            etag = value.strip().decode()
+    await reader.readexactly(length)
+    return status, etag
+
+
+async def _poller(host, port, path, conditional, stop_at, latencies, statuses) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    etag = None
+    try:
+        while time.perf_counter() < stop_at:
+            extra = f"If-None-Match: {etag}\r\n" if conditional and etag else ""
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{extra}\r\n".encode())
+            status, new_etag = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            etag = new_etag or etag
+    finally:
+        writer.close()
+
+
+async def _subscriber(host, port, path, stop_at, delays, counts) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    received = 0
+    try:
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            pass
+        while (remaining := stop_at - time.perf_counter()) > 0:
+            try:
+                line = await asyncio.wait_for(reader.readline(), remaining)
+            except TimeoutError:
+                break
+            if not line:
+                break
+            if line.startswith(b"data: "):
+                match = _FETCHED_AT.search(line, 0, 200)
+                if match:
+                    delays.append(time.time() - float(match.group(1)))
+                received += 1
+    finally:
+        counts.append(received)
+        writer.close()
+
+
+async def main(args) -> None:
+    child = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port, base = parts.hostname, parts.port or 80, parts.path.rstrip("/")
+    else:
+        child = await asyncio.create_subprocess_exec(
+            *(sys.executable, "-m", "benchmarks.load_test_web", "--serve"),
+            *("--publish-interval", str(args.publish_interval)),
+            stdout=asyncio.subprocess.PIPE,
+        )
+        host, port, base = "127.0.0.1", int(await child.stdout.readline()), ""
+
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    delays: list[float] = []
+    counts: list[int] = []
+    try:
+        # subscribers connect first, then the pollers start the clock
+        stop_at = time.perf_counter() + args.duration + 1
+        subscribers = [
+            asyncio.create_task(_subscriber(host, port, f"{base}/events", stop_at, delays, counts))
+            for _ in range(args.sse)
+        ]
+        await asyncio.sleep(1)
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _poller(host, port, f"{base}/snapshot", i % 2 == 1, stop_at, latencies, statuses)
+                for i in range(args.pollers)
+            ),
+            *subscribers,
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        if child is not None:
+            child.terminate()
+            await child.wait()
+
+    requests = len(latencies)
+    print(
+        f"{args.sse} SSE subscribers, {args.pollers} pollers, {args.duration:.0f} s, "
+        f"publish every {args.publish_interval} s"
+    )
+    print(
+        f"requests: {requests} ({requests / elapsed:.0f}/s), "
+        f"304: {statuses.get(304, 0) / max(1, requests):.0%}, "
+        f"other: {sum(v for k, v in statuses.items() if k not in (200, 304))}"
+    )
+    print(f"request latency p50/p95/p99 ms: {_percentiles(latencies)}")
+    if counts:
+        print(
+            f"events per subscriber: min {min(counts)}, median {statistics.median(counts):.0f}, "
+            f"max {max(counts)}"
+        )
+        print(f"event delivery p50/p95/p99 ms: {_percentiles(delays)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="test a running server instead, e.g. http://127.0.0.1:8765/")
+    parser.add_argument("--sse", type=int, default=300, help="SSE subscribers")
+    parser.add_argument("--pollers", type=int, default=50, help="clients polling /snapshot")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--publish-interval", type=float, default=0.5)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        asyncio.run(_serve(args.publish_interval))
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,122 @@
+"""Write TfL-shaped JSON fixtures used by the parser benchmarks.
+
+Arrival predictions follow the ``Line/{ids}/Arrivals/{stopPointId}`` schema
+and bike points the ``BikePoint`` schema, with the same field set the live
+API returns. Output is deterministic so fixtures only change when this
+script does.
+
+    python -m benchmarks.make_fixtures
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+SIZES = (10, 100, 1000)
+BASE_TIME = datetime(2025, 11, 3, 8, 0, 0)
+
+TUBE_LINES = ("northern", "jubilee", "victoria")
+BUS_LINES = ("24", "29", "134", "390")
+
+
+def _prediction(rng: random.Random, i: int) -> dict:
+    mode = "tube" if i % 3 == 0 else "bus"
+    line = rng.choice(TUBE_LINES if mode == "tube" else BUS_LINES)
+    to_station = rng.randint(0, 1800)
+    timestamp = BASE_TIME + timedelta(seconds=rng.randint(0, 20))
+    return {
+        "$type": "Tfl.Api.Presentation.Entities.Prediction, Tfl.Api.Presentation.Entities",
+        "id": str(-1_000_000_000 + i),
+        "operationType": 1,
+        "vehicleId": f"{rng.randint(100, 999)}"
+        if mode == "tube"
+        else f"LX{rng.randint(10, 99)}ABC",
+        "naptanId": "940GZZLUCTN" if mode == "tube" else "490000051Y",
+        "stationName": "Camden Town Underground Station",
+        "lineId": line,
+        "lineName": line.title() if mode == "tube" else line,
+        "platformName": (f"Northbound - Platform {rng.randint(1, 4)}" if mode == "tube" else "Y"),
+        "direction": rng.choice(("inbound", "outbound")),
+        "bearing": "" if mode == "tube" else str(rng.randint(0, 359)),
+        "destinationNaptanId": "940GZZLUEGW",
+        "destinationName": "Edgware Underground Station",
+        "timestamp": timestamp.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "timeToStation": to_station,
+        "currentLocation": "Between Euston and Mornington Crescent" if mode == "tube" else "",
+        "towards": "Edgware",
+        "expectedArrival": (timestamp + timedelta(seconds=to_station)).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        ),
+        "timeToLive": (timestamp + timedelta(seconds=to_station + 60)).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        ),
+        "modeName": mode,
+        "timing": {
+            "$type": "Tfl.Api.Presentation.Entities.PredictionTiming, Tfl.Api.Presentation.Entities",
+            "countdownServerAdjustment": "00:00:00",
+            "source": "0001-01-01T00:00:00",
+            "insert": "0001-01-01T00:00:00",
+            "read": timestamp.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "sent": timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "received": "0001-01-01T00:00:00",
+        },
+    }
+
+
+def _bikepoint(rng: random.Random, i: int) -> dict:
+    docks = rng.randint(10, 40)
+    bikes = rng.randint(0, docks)
+    props = {
+        "TerminalName": str(1000 + i),
+        "Installed": "true",
+        "Locked": "false",
+        "InstallDate": "1278947280000",
+        "RemovalDate": "",
+        "Temporary": "false",
+        "NbBikes": str(bikes),
+        "NbEmptyDocks": str(docks - bikes),
+        "NbDocks": str(docks),
+    }
+    return {
+        "$type": "Tfl.Api.Presentation.Entities.Place, Tfl.Api.Presentation.Entities",
+        "id": f"BikePoints_{i + 1}",
+        "url": f"/Place/BikePoints_{i + 1}",
+        "commonName": f"Dock Street {i + 1}, Area {i % 17}",
+        "placeType": "BikePoint",
+        "additionalProperties": [
+            {
+                "$type": "Tfl.Api.Presentation.Entities.AdditionalProperties, Tfl.Api.Presentation.Entities",
+                "category": "Description",
+                "key": key,
+                "sourceSystemKey": "BikePoints",
+                "value": value,
+                "modified": "2025-11-03T08:00:00.000Z",
+            }
+            for key, value in props.items()
+        ],
+        "children": [],
+        "childrenUrls": [],
+        "lat": round(51.5 + rng.random() / 10, 6),
+        "lon": round(-0.2 + rng.random() / 5, 6),
+    }
+
+
+def write_fixtures() -> list[Path]:
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    written = []
+    for size in SIZES:
+        for name, make in (("arrivals", _prediction), ("bikepoints", _bikepoint)):
+            rng = random.Random(size)
+            path = FIXTURE_DIR / f"{name}_{size}.json"
+            path.write_text(json.dumps([make(rng, i) for i in range(size)], separators=(",", ":")))
+            written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    for path in write_fixtures():
+        print(f"wrote {path} ({path.stat().st_size / 1024:.0f} KiB)")
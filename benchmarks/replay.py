@@ -0,0 +1,285 @@
+"""Record real TfL responses once, then replay them offline through httpx.
+
+Recording runs full refresh cycles (every source the app polls, as
+configured in config.yml) against the live APIs through a
+``RecordingTransport`` and saves every response to one JSON file:
+
+    python -m benchmarks.replay --out benchmarks/recordings/tfl.json --cycles 3
+
+``--base-url`` records from another TfL-compatible server instead (a mirror,
+or a stub). The file holds each response's status, caching headers, decoded
+body and how long it took, plus the stops, bike points and overground routes
+that were fetched, so a replay runs the same cycle without a config.
+Overground credentials are never stored.
+
+``Replay`` serves a recording through ``httpx.MockTransport``; hand
+``replay.transport()`` to ``ClientRegistry(transport=...)``. Requests are
+matched on path and query (not host), and a URL recorded several times
+cycles through its responses. Each response can be:
+
+- delayed by ``latency`` seconds, or by the time it took when recorded
+  (``latency=None``), plus up to ``jitter`` seconds at random
+- replaced by a 503 with probability ``error_rate``
+- scaled: every JSON list in the body (at the top level, or one level down
+  in an object) is repeated or cut to ``scale`` times its length
+
+Unknown URLs get a 404 and are counted in ``Replay.missing``. Bodies are
+scaled and encoded once, up front, so replaying costs little CPU.
+benchmarks/bench_replay.py times refresh cycles on top of this.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from aggregator import Aggregator
+from clients import TFL_BASE_URL, ClientRegistry
+
+RECORDING_VERSION = 1
+RECORDINGS_DIR = Path(__file__).parent / "recordings"
+# Response headers worth replaying: the HTTP cache acts on them
+KEPT_HEADERS = ("content-type", "cache-control", "etag", "last-modified")
+# Settings saved with a recording so a replay fetches exactly what was recorded
+SETTINGS_KEYS = (
+    "tube_and_bus_stops",
+    "bikepoints",
+    "bikepoint_mode",
+    "bikepoint_bulk_threshold",
+    "arrivals_max_in_flight",
+    "overground_api_url",
+    "overground_routes",
+)
+
+
+def _key(url: httpx.URL) -> str:
+    return url.raw_path.decode("ascii").lstrip("/")
+
+
+class Recording:
+    """Responses by request path, and the settings of the cycles that made them."""
+
+    def __init__(self, settings: dict | None = None) -> None:
+        self.settings: dict = settings or {}
+        self.entries: dict[str, list[dict]] = {}
+
+    def add(self, url: httpx.URL, status: int, headers, content: bytes, elapsed: float) -> None:
+        entry: dict[str, Any] = {
+            "status": status,
+            "headers": {name: headers[name] for name in KEPT_HEADERS if name in headers},
+            "elapsed": round(elapsed, 4),
+        }
+        try:
+            entry["json"] = json.loads(content)
+        except ValueError:
+            entry["text"] = content.decode("utf-8", "replace")
+        self.entries.setdefault(_key(url), []).append(entry)
+
+    @property
+    def response_count(self) -> int:
+        return sum(len(entries) for entries in self.entries.values())
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": RECORDING_VERSION,
+            "recorded_at": time.time(),
+            "settings": self.settings,
+            "entries": self.entries,
+        }
+        path.write_text(json.dumps(data), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path) -> Recording:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if data.get("version") != RECORDING_VERSION:
+            raise ValueError(f"{path}: recording version {data.get('version')} is not supported")
+        recording = cls(data["settings"])
+        recording.entries = data["entries"]
+        return recording
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Pass requests to the network and add every response to a ``Recording``."""
+
+    def __init__(self, recording: Recording, transport: httpx.AsyncBaseTransport | None = None):
+        self.recording = recording
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        try:
+            raw = await response.aread()
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - started
+        # raw is still content-encoded (gzip); a Response built from it decodes it
+        decoded = httpx.Response(response.status_code, headers=response.headers, content=raw)
+        self.recording.add(
+            request.url, response.status_code, response.headers, decoded.content, elapsed
+        )
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=raw,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def _scale(payload: Any, factor: float) -> Any:
+    if isinstance(payload, list):
+        if not payload:
+            return payload
+        size = max(1, round(len(payload) * factor))
+        return [payload[i % len(payload)] for i in range(size)]
+    if isinstance(payload, dict):
+        return {
+            key: _scale(value, factor) if isinstance(value, list) else value
+            for key, value in payload.items()
+        }
+    return payload
+
+
+class Replay:
+    """Serve a ``Recording`` with configurable latency, jitter, errors and payload size."""
+
+    def __init__(
+        self,
+        recording: Recording,
+        latency: float | None = None,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        scale: float = 1.0,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        # per path: (status, headers, body, recorded latency) for each recorded response
+        self._responses: dict[str, list[tuple[int, dict, bytes, float]]] = {}
+        for key, entries in recording.entries.items():
+            self._responses[key] = [
+                (
+                    entry["status"],
+                    entry["headers"],
+                    json.dumps(_scale(entry["json"], scale)).encode()
+                    if "json" in entry
+                    else entry.get("text", "").encode(),
+                    entry["elapsed"],
+                )
+                for entry in entries
+            ]
+        self._next: dict[str, int] = {}
+        self.requests = 0
+        self.errors = 0
+        self.missing = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self._handle)
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        key = _key(request.url)
+        responses = self._responses.get(key)
+        if not responses:
+            self.missing += 1
+            return httpx.Response(404, json={"message": f"not recorded: {key}"})
+        i = self._next.get(key, 0)
+        self._next[key] = (i + 1) % len(responses)
+        status, headers, body, recorded = responses[i]
+        delay = recorded if self.latency is None else self.latency
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return httpx.Response(503, json={"message": "injected fault"})
+        return httpx.Response(status, headers=headers, content=body)
+
+
+def settings_from_config(cfg: dict) -> Aggregator:
+    """The app's fetch settings from config.yml keys (names resolved, nothing saved)."""
+    return Aggregator.from_config({**cfg, "snapshots": False})
+
+
+def connect(settings: Aggregator, clients: ClientRegistry, base_url: str = TFL_BASE_URL) -> None:
+    """Point ``settings`` at the TfL and overground clients of ``clients``."""
+    settings.clients = clients
+    settings.client = clients.get(base_url)
+    settings.overground_client = (
+        clients.for_url(settings.overground_api_url) if settings.overground_api_url else None
+    )
+
+
+async def refresh_cycle(settings: Aggregator, backend: str = "records") -> dict[str, Any]:
+    """Fetch every configured source once, concurrently, with the pollers' own fetchers."""
+    settings.data_backend = backend
+    fetches = {
+        name: fetch()
+        for name, fetch in settings._sources().items()
+        if name != "overground" or (settings.overground_api_url and settings.overground_routes)
+    }
+    results = await asyncio.gather(*fetches.values(), return_exceptions=True)
+    return dict(zip(fetches, results))
+
+
+async def record(
+    cfg: dict, out: Path, cycles: int = 1, interval: float = 0.0, base_url: str = TFL_BASE_URL
+) -> Recording:
+    """Run ``cycles`` refresh cycles against the live APIs and save every response to ``out``."""
+    settings = settings_from_config(cfg)
+    recording = Recording({key: getattr(settings, key) for key in SETTINGS_KEYS})
+    transport = RecordingTransport(recording)
+    # no HTTP cache: every cycle's responses go on the record
+    async with ClientRegistry.from_config(
+        settings.client_config, cache=False, transport=transport
+    ) as clients:
+        connect(settings, clients, base_url)
+        for cycle in range(cycles):
+            if cycle:
+                await asyncio.sleep(interval)
+            results = await refresh_cycle(settings)
+            print(
+                f"cycle {cycle + 1}: "
+                + ", ".join(
+                    f"{name} {'failed' if isinstance(table, Exception) else len(table)}"
+                    for name, table in results.items()
+                )
+            )
+    recording.save(out)
+    print(f"{recording.response_count} responses for {len(recording.entries)} URLs -> {out}")
+    return recording
+
+
+if __name__ == "__main__":
+    import yaml
+
+    root = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", type=Path, help="default config.yml, else example.yml")
+    parser.add_argument("--out", type=Path, default=RECORDINGS_DIR / "tfl.json")
+    parser.add_argument("--cycles", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=30.0, help="seconds between cycles")
+    parser.add_argument("--base-url", default=TFL_BASE_URL)
+    args = parser.parse_args()
+
+    config_path = args.config or next(
+        path for path in (root / "config.yml", root / "example.yml") if path.exists()
+    )
+    with open(config_path, encoding="utf-8") as f:
+        cfg = yaml.safe_load(f) or {}
+    asyncio.run(record(cfg, args.out, args.cycles, args.interval, args.base_url))
@@ -0,0 +1,124 @@
+"""Minimal local HTTP/1.1 server that impersonates the TfL API for benchmarks.
+
+Only GET is supported. Each request is routed to a ``handler(path)`` that
+returns ``(status, payload)``; the payload is JSON-encoded. A fixed
+``latency`` (seconds) is added before every response to mimic the round-trip
+to api.tfl.gov.uk. Connections are kept alive so client pooling behaves as it
+would against the real service. ``request_times`` records when each request
+arrived (``time.monotonic()``), for checking client-side pacing.
+
+``faults`` injects failures at random: 503 responses, responses held back
+for ``stall`` seconds, or connections dropped without a reply. It can be
+swapped at runtime (e.g. ``server.faults = Faults(error_rate=1.0)`` for an
+outage, ``None`` to recover).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from collections.abc import Callable
+from typing import Any, Self
+
+Handler = Callable[[str], tuple[int, Any]]
+
+
+class Faults:
+    """Per-request fault probabilities for ``StubServer``."""
+
+    def __init__(
+        self,
+        error_rate: float = 0.0,
+        stall_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        stall: float = 30.0,
+        seed: int | None = None,
+    ) -> None:
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.drop_rate = drop_rate
+        self.stall = stall
+        self._random = random.Random(seed)
+
+    def pick(self) -> str | None:
+        """Return "error", "stall", "drop" or None for the next request."""
+        roll = self._random.random()
+        for fault, rate in (
+            ("error", self.error_rate),
+            ("stall", self.stall_rate),
+            ("drop", self.drop_rate),
+        ):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+
+class StubServer:
+    """Serve ``handler`` responses on 127.0.0.1 on an ephemeral port."""
+
+    def __init__(
+        self, handler: Handler, latency: float = 0.0, faults: Faults | None = None
+    ) -> None:
+        self.handler = handler
+        self.latency = latency
+        self.faults = faults
+        self.request_count = 0
+        self.connection_count = 0
+        self.request_times: list[float] = []
+        self._server: asyncio.Server | None = None
+
+    @property
+    def base_url(self) -> str:
+        assert self._server is not None, "server not started"
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/"
+
+    async def __aenter__(self) -> Self:
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connection_count += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                # Drain headers; GET requests carry no body
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                _method, target, _version = request_line.decode("latin-1").split(" ", 2)
+                self.request_count += 1
+                self.request_times.append(time.monotonic())
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                fault = self.faults.pick() if self.faults is not None else None
+                if fault == "drop":
+                    break
+                if fault == "stall":
+                    await asyncio.sleep(self.faults.stall)
+                if fault == "error":
+                    status, payload = 503, {"message": "injected fault"}
+                else:
+                    status, payload = self.handler(target.lstrip("/"))
+                body = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} OK\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: keep-alive\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
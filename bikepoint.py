@@ -1,70 +1,113 @@
 # created on 30/10/25 by gooseberry-py on a raspberry pi 5
-import httpx
-import pandas as pd
-import json
+from json_stream import stream_json_array
+from metrics import METRICS, decode_json
+from records import BikePointRecord, table_from_columns
 
 # load environment variables from .env file
 # load_dotenv(dotenv_path="config.env")
 
-client = httpx.AsyncClient(
-    headers={"Accept": "application/json"},
-    base_url="https://api.tfl.gov.uk/",
-)
+# Every helper takes the client to use as its first argument; get one from
+# clients.ClientRegistry (e.g. `async with ClientRegistry() as clients: ... clients.tfl`)
 
 
 async def get_all_boris_bike_info(client):
     # this works even without an API key
     # Gets all bike point locations. The Place object has an addtionalProperties array which contains the nbBikes, nbDocks and nbSpaces numbers which give the status of the BikePoint. A mismatch in these numbers i.e. nbDocks - (nbBikes + nbSpaces) != 0 indicates broken docks.
     # https://api-portal.tfl.gov.uk/api-details#api=BikePoint&operation=BikePoint_GetAll
-    bb_info = await client.get("BikePoint")
-    # bb_info = requests.get(f"https://api.tfl.gov.uk/BikePoint/")
-    bikepoint_json = json.loads(bb_info.text)
+    # The response is several MB; stream it and keep only id -> commonName per bike point
     list_of_bikepoint_dict = {}
-    for x in range(len(bikepoint_json)):
-        list_of_bikepoint_dict[bikepoint_json[x]["id"]] = bikepoint_json[x]["commonName"]
+    async for bikepoint in stream_json_array(client, "BikePoint"):
+        list_of_bikepoint_dict[bikepoint["id"]] = bikepoint["commonName"]
     return list_of_bikepoint_dict
 
 
-async def get_specific_boris_bike_info(client, bikepoints):
-    # Gets the bike point with the given id.
-    # https://api-portal.tfl.gov.uk/api-details#api=BikePoint&operation=BikePoint_Get
-    # Add a 'location' column containing the part after the comma from commonName (e.g. "Waterloo")
-    cols: list[str] = ["commonName", "location", "NbBikes", "NbEmpty"]
-    bike_info_df = pd.DataFrame(columns=pd.Index(cols))
+# With more configured docks than this, one bulk "BikePoint" call is quicker than a
+# sequential "BikePoint/{id}" call per dock
+BULK_MODE_THRESHOLD = 10
 
-    for id in bikepoints.keys():
+
+async def _get_bikepoints_by_id(client, ids):
+    # Gets the bike point with the given id, one call per dock.
+    # https://api-portal.tfl.gov.uk/api-details#api=BikePoint&operation=BikePoint_Get
+    bikepoint_infos = {}
+    for id in ids:
         bikepoint_info_raw = await client.get(f"BikePoint/{id}")
         # skip if request failed
         if bikepoint_info_raw.status_code != 200:
             continue
-        bikepoint_info = json.loads(bikepoint_info_raw.text)
-        # info from the bikepoint
-        new_row = {}
-        # Safely extract a short common name and the location suffix (text after comma)
-        common = bikepoint_info.get("commonName", "")
-        if common:
-            parts = [p.strip() for p in common.split(",", 1)]
-            new_row["commonName"] = parts[0]
-            # if there's a suffix after the comma, store it in 'location', otherwise blank
-            new_row["location"] = parts[1] if len(parts) > 1 else ""
-        else:
-            # fallback to id so the row isn't empty
-            new_row["commonName"] = id
-            new_row["location"] = ""
-
-        # Pull out additional properties if present
-        for prop in bikepoint_info.get("additionalProperties", []):
-            key = prop.get("key")
-            value = prop.get("value")
-            if key == "NbBikes":
-                new_row["NbBikes"] = value
-            if key == "NbEmptyDocks":
-                new_row["NbEmpty"] = value
-
-        # Ensure numeric fields exist with sensible defaults
-        new_row.setdefault("NbBikes", 0)
-        new_row.setdefault("NbEmpty", 0)
-
-        bike_info_df.loc[len(bike_info_df)] = new_row
-
-    return bike_info_df
+        bikepoint_infos[id] = decode_json(bikepoint_info_raw)
+    return bikepoint_infos
+
+
+async def _get_bikepoint_snapshot(client, ids):
+    # Pulls every bike point in a single call and serves the requested ids from it.
+    # https://api-portal.tfl.gov.uk/api-details#api=BikePoint&operation=BikePoint_GetAll
+    bb_info = await client.get("BikePoint")
+    if bb_info.status_code != 200:
+        return {}
+    snapshot = {item.get("id"): item for item in decode_json(bb_info)}
+    return {id: snapshot[id] for id in ids if id in snapshot}
+
+
+def _bikepoint_row(id, bikepoint_info):
+    # info from the bikepoint; "_id" is hidden in the TUI but keys the row across refreshes
+    new_row = {"_id": id}
+    # Safely extract a short common name and the location suffix (text after comma)
+    common = bikepoint_info.get("commonName", "")
+    if common:
+        parts = [p.strip() for p in common.split(",", 1)]
+        new_row["commonName"] = parts[0]
+        # if there's a suffix after the comma, store it in 'location', otherwise blank
+        new_row["location"] = parts[1] if len(parts) > 1 else ""
+    else:
+        # fallback to id so the row isn't empty
+        new_row["commonName"] = id
+        new_row["location"] = ""
+
+    # Pull out additional properties if present
+    for prop in bikepoint_info.get("additionalProperties", []):
+        key = prop.get("key")
+        value = prop.get("value")
+        if key == "NbBikes":
+            new_row["NbBikes"] = value
+        if key == "NbEmptyDocks":
+            new_row["NbEmpty"] = value
+
+    # Ensure numeric fields exist with sensible defaults
+    new_row.setdefault("NbBikes", 0)
+    new_row.setdefault("NbEmpty", 0)
+    return new_row
+
+
+async def get_specific_boris_bike_info(
+    client, bikepoints, mode="auto", bulk_threshold=BULK_MODE_THRESHOLD, backend="pandas"
+):
+    # Gets the status of each configured bike point.
+    # mode: "per_id" calls BikePoint/{id} for each dock, "bulk" serves every dock from one
+    # BikePoint snapshot, "auto" picks bulk once more than bulk_threshold docks are configured
+    # backend: "pandas" returns a DataFrame, "records" a records.RecordTable
+    ids = list(bikepoints.keys())
+    if mode == "auto":
+        mode = "bulk" if len(ids) > bulk_threshold else "per_id"
+    if mode == "bulk":
+        bikepoint_infos = await _get_bikepoint_snapshot(client, ids)
+    else:
+        bikepoint_infos = await _get_bikepoints_by_id(client, ids)
+
+    with METRICS.timer("build_seconds", table="bikes", backend=backend):
+        return _bike_info_table(ids, bikepoint_infos, backend)
+
+
+def _bike_info_table(ids, bikepoint_infos, backend="pandas"):
+    # Collect rows column-wise in the configured order, skipping docks we got no data
+    # for, and build the table once
+    # Add a 'location' column containing the part after the comma from commonName (e.g. "Waterloo")
+    cols = BikePointRecord.__slots__
+    columns = {col: [] for col in cols}
+    for id in ids:
+        if id in bikepoint_infos:
+            new_row = _bikepoint_row(id, bikepoint_infos[id])
+            for col in cols:
+                columns[col].append(new_row[col])
+
+    return table_from_columns(columns, BikePointRecord, backend)
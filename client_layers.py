@@ -0,0 +1,44 @@
+"""Shared plumbing for the layers wrapped around the ``httpx.AsyncClient``.
+
+Each layer in ``clients.ClientRegistry`` (``metrics.MetricsClient``,
+``resilience.ResilientClient``, ``http_cache.CachingClient``,
+``single_flight.SingleFlightClient``) is a ``ClientLayer``: it overrides the
+calls it cares about (``get``, ``stream``) and passes everything else to the
+client it wraps. Layers that count what they do keep a ``LayerStats``
+subclass in ``stats``, which ``clients.client_stats`` collects and
+``clients.ClientRegistry`` exports through ``metrics.METRICS`` as
+``<metric_prefix>_<counter>_total``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, ClassVar
+
+
+class LayerStats:
+    """Integer counters, one per name in the subclass's ``__slots__``, all starting at 0."""
+
+    __slots__ = ()
+    # Counters are exported as <metric_prefix>_<name>_total; None keeps them out of METRICS
+    metric_prefix: ClassVar[str | None] = None
+
+    def __init__(self) -> None:
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self) -> dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        counters = ", ".join(f"{k}={v}" for k, v in self.as_dict().items())
+        return f"{type(self).__name__}({counters})"
+
+
+class ClientLayer:
+    """Wrap a client; anything the subclass doesn't define is passed straight to it."""
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
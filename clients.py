@@ -0,0 +1,178 @@
+"""One tuned ``httpx.AsyncClient`` pool per upstream host.
+
+``ClientRegistry`` hands out a shared client per base URL (TfL, the
+overground provider, ...) with connection limits, keep-alive expiry,
+timeouts and optional HTTP/2 set in one place. Clients are created lazily,
+from inside the running event loop, and closed together by ``aclose`` (or by
+using the registry as an async context manager), so no sockets outlive the
+loop that opened them. Each client retries, times out and circuit-breaks per
+endpoint through ``resilience.ResilientClient`` unless ``resilience`` is
+false, with the HTTP cache on top so cache hits never reach the network, and
+``single_flight.SingleFlightClient`` on top of that so concurrent identical
+requests share one call. Underneath them all, ``metrics.MetricsClient``
+times every request that does go out (``metrics: false`` turns it off).
+While a registry is open, the counters of its layers (cache hits, retries,
+collapsed calls, ...) are exported through ``metrics.METRICS`` per host, so
+they show on the TUI's timings panel and on ``/metrics``.
+
+``transport`` swaps the network for any ``httpx.AsyncBaseTransport``; the
+replay harness in ``benchmarks/replay.py`` uses it to record and replay
+TfL responses (connection limits and HTTP/2 then come from that transport).
+
+HTTP/2 needs the optional ``h2`` package (``pip install httpx[http2]``); if
+it is missing the registry logs a warning and uses HTTP/1.1.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator, Mapping
+from typing import TYPE_CHECKING, Any, Self
+from urllib.parse import urlsplit
+
+from http_cache import CachingClient
+from metrics import METRICS, MetricsClient
+from single_flight import SingleFlightClient
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+TFL_BASE_URL = "https://api.tfl.gov.uk/"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def _layers(client: Any) -> Iterator[tuple[str, Any]]:
+    """Yield ``(layer class name, stats)`` for every wrapper layer of ``client`` with stats."""
+    # read instance attributes directly: the wrappers delegate unknown names downwards
+    while client is not None and hasattr(client, "__dict__"):
+        layer_stats = vars(client).get("stats")
+        if layer_stats is not None:
+            yield type(client).__name__, layer_stats
+        client = vars(client).get("client")
+
+
+def client_stats(client: Any) -> dict[str, dict[str, int]]:
+    """Return the counters of every wrapper layer of ``client``, keyed by layer class name."""
+    return {name: stats.as_dict() for name, stats in _layers(client)}
+
+
+class ClientRegistry:
+    """Create, share and close one pooled client per base URL."""
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0,
+        http2: bool = False,
+        cache: bool = True,
+        resilience: Mapping[str, Any] | bool = True,
+        single_flight: bool = True,
+        metrics: bool = True,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        # httpx is imported here, when the first registry is built, not when the module loads
+        import httpx
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout)
+        self.resilience = resilience
+        self.single_flight = single_flight
+        self.metrics = metrics
+        self.transport = transport
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.cache = cache
+        self._clients: dict[str, Any] = {}
+        METRICS.add_collector(self._collect_stats)
+
+    @classmethod
+    def from_config(cls, cfg: dict, **overrides: Any) -> ClientRegistry:
+        """Build from the ``http_client``, ``http_cache``, ``http_resilience``,
+        ``http_single_flight`` and ``http_metrics`` config keys; keyword arguments
+        override them."""
+        settings = dict(cfg.get("http_client") or {}, **overrides)
+        settings.setdefault("cache", cfg.get("http_cache", True))
+        settings.setdefault("resilience", cfg.get("http_resilience", True))
+        settings.setdefault("single_flight", cfg.get("http_single_flight", True))
+        settings.setdefault("metrics", cfg.get("http_metrics", True))
+        return cls(**settings)
+
+    def get(self, base_url: str = TFL_BASE_URL) -> httpx.AsyncClient | CachingClient:
+        """Return the shared client for ``base_url``, creating it on first use."""
+        if base_url not in self._clients:
+            import httpx
+
+            client = httpx.AsyncClient(
+                headers={"Accept": "application/json"},
+                base_url=base_url,
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                transport=self.transport,
+            )
+            if self.metrics:
+                client = MetricsClient(client)
+            if self.resilience:
+                from resilience import ResilientClient
+
+                options = self.resilience if isinstance(self.resilience, Mapping) else {}
+                options = {"timeout": self.timeout.read, **options}
+                client = ResilientClient(client, **options)
+            if self.cache:
+                client = CachingClient(client)
+            if self.single_flight:
+                client = SingleFlightClient(client)
+            self._clients[base_url] = client
+        return self._clients[base_url]
+
+    @property
+    def tfl(self) -> httpx.AsyncClient | CachingClient:
+        return self.get(TFL_BASE_URL)
+
+    def for_url(self, url: str) -> httpx.AsyncClient | CachingClient:
+        """Return the shared client for the host serving ``url``."""
+        return self.get(_origin(url)) if url else self.tfl
+
+    def _collect_stats(self) -> Iterator[tuple[str, dict[str, Any], int]]:
+        """Current layer counters of every client, for ``METRICS`` (see module docstring)."""
+        for base_url, client in self._clients.items():
+            host = urlsplit(base_url).netloc
+            for _, stats in _layers(client):
+                if stats.metric_prefix is None:
+                    continue
+                for name, value in stats.as_dict().items():
+                    yield f"{stats.metric_prefix}_{name}_total", {"host": host}, value
+
+    async def aclose(self) -> None:
+        METRICS.remove_collector(self._collect_stats)
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
@@ -0,0 +1,60 @@
+"""Client-side countdowns between API polls.
+
+Arrival and overground tables carry the absolute arrival time in the hidden
+``_expectedArrival`` column. ``tick_countdowns`` recomputes the
+``TimeToArrival`` text from it against the current time and drops vehicles
+whose time has passed, so the TUI can show second-accurate countdowns while
+polling TfL far less often. Arrival times are timezone-aware UTC (TfL's
+``expectedArrival`` ends in ``Z``), so they are compared with the current
+UTC time, never the local clock.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+from line import format_timedelta, format_timedeltas
+from records import RecordTable
+
+
+def seconds_until_next_arrival(table) -> float | None:
+    """Seconds until the soonest upcoming arrival in ``table``, or None if there is none."""
+    if table is None or "_expectedArrival" not in table.columns or table.empty:
+        return None
+    if isinstance(table, RecordTable):
+        times = [record._expectedArrival for record in table.rows]
+    else:
+        times = table["_expectedArrival"].tolist()
+    now = datetime.now(UTC)
+    upcoming = [(expected - now).total_seconds() for expected in times]
+    upcoming = [secs for secs in upcoming if secs >= 0]
+    return min(upcoming) if upcoming else None
+
+
+def tick_countdowns(table):
+    """Return ``table`` with fresh ``TimeToArrival`` values and departed rows removed.
+
+    Works on a DataFrame or a RecordTable; tables without an ``_expectedArrival``
+    column are returned unchanged.
+    """
+    if table is None or "_expectedArrival" not in table.columns or table.empty:
+        return table
+
+    if isinstance(table, RecordTable):
+        rows = []
+        now = datetime.now(UTC)
+        for record in table.rows:
+            remaining = record._expectedArrival - now
+            if remaining.total_seconds() < 0:
+                continue
+            record.TimeToArrival = format_timedelta(remaining)
+            rows.append(record)
+        return RecordTable(table.columns, rows)
+
+    import pandas as pd
+
+    expected = table["_expectedArrival"]
+    remaining = expected - pd.Timestamp.now(tz="UTC")
+    upcoming = table[remaining.dt.total_seconds() >= 0].copy()
+    upcoming["TimeToArrival"] = format_timedeltas(remaining[upcoming.index])
+    return upcoming
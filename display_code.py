@@ -1,8 +1,6 @@
 #!/alexander/Documents/Coding_Projects/tfl-monitor/.venv/bin/env python
 
-import pandas as pd
 import asyncio
-import yaml
 from datetime import datetime
 from bikepoint import (
     get_specific_boris_bike_info,
@@ -12,38 +10,78 @@ from line import (
     _next_train_or_bus,
 )
 from overground import get_live_overground_trains
-import httpx
+from countdown import tick_countdowns
+from clients import ClientRegistry
+from metrics import METRICS, SUMMARY_COLUMNS
+from records import RecordTable, iter_table_rows
+from polling import SourcePoller
+from table_sync import sync_table
 from textual.app import App, ComposeResult
+from textual.css.query import QueryError
 from textual.widgets import DataTable, Button, Static, Label
 from textual.containers import Horizontal, Vertical
 from textual.reactive import reactive
 from pathlib import Path
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
-client = httpx.AsyncClient(
-    headers={"Accept": "application/json"},
-    base_url="https://api.tfl.gov.uk/",
-)
+# Columns identifying a row across refreshes, per table id, so table_sync can update rows in
+# place. A tuple entry means "first non-empty of these". Tables not listed are keyed by all
+# their visible cells.
+ROW_KEY_COLUMNS = {
+    "next_tube_and_bus_df": ("line", "stationName", ("_vehicleId", "_expectedArrival")),
+    "status_table": ("Line",),
+    "boris_bike_df": ("_id",),
+    "overground_df": ("stationFrom", "stationTo", "expectedDate", "expectedTime", "destination"),
+}
+
+# Each polled source: the data_dict key holding its latest table and the id of its DataTable
+SOURCE_TABLES = {
+    "tube_status": ("tube_line_status", "#status_table"),
+    "arrivals": ("next_tube_and_bus_df", "#next_tube_and_bus_df"),
+    "bikes": ("boris_bike_df", "#boris_bike_df"),
+    "overground": ("overground_df", "#overground_df"),
+}
+
+
+def _format_age(seconds: float) -> str:
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m"
+    if seconds < 86400:
+        return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+    return f"{seconds // 86400}d"
+
+
+def _row_key(row, key_columns) -> str:
+    parts = []
+    for col in key_columns:
+        if isinstance(col, tuple):
+            parts.append(next((str(row[c]) for c in col if row[c]), ""))
+        else:
+            parts.append(str(row[col]))
+    return "|".join(parts)
 
 
 # Textual app to display the three items from data_dict
-class TfLDisplayApp(App):
+class TfLDisplayApp(SourcePoller, App):
     """Display three widgets with header and auto-refresh:
     - header: current time and exit button
     - left: DataTable for `next_tube_and_bus_df`
     - top-right: DataTable from `tube_line_status`
     - bottom-right: DataTable for `boris_bike_df`
 
-    Data refreshes every 5 seconds.
+    Each data source refreshes on its own adaptive cadence (see scheduler.py); the
+    settings and the polling loop are shared with the aggregator (see polling.py).
     """
 
     CSS_PATH = "horizontal_layout.tcss"
-    BINDINGS = [("q", "quit", "Quit")]
+    BINDINGS = [("q", "quit", "Quit"), ("m", "toggle_metrics", "Metrics")]
     THEME = "dracula"
-    # Default refresh interval (seconds) - can be overridden from config.yml
-    refresh_interval_seconds: int = 10
 
     # Reactive attribute to trigger data refresh
     current_time = reactive(str)
@@ -53,16 +91,25 @@ class TfLDisplayApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.data_dict = {}
-        self.client = client
-        self.tube_and_bus_stops = {}
-        self.bikepoints = {}
-        self.overground_stations = {}
-        self.overground_api_url: str = ""
-        self.overground_routes: list = []
-        self.overground_auth: tuple | None = None
-        self.overground_stations = {}
-
-    def _get_colored_status(self, col_name: str, status: str, row: pd.Series) -> str:
+        # The HTTP clients, sources and their settings live in polling.SourcePoller; the
+        # clients are opened once the first frame is up and closed on unmount.
+        # stale_since maps each source showing old data (a snapshot from a previous run, or
+        # the last good table while fetches fail) to when that data was fetched;
+        # _last_success is this run's last good fetch per source
+        self.stale_since: dict[str, float] = {}
+        self._last_success: dict[str, float] = {}
+        # Sources with nothing to show yet; their panel says so until the first fetch returns
+        self.loading: set[str] = set()
+        # Thin-client mode: follow this aggregator (see aggregator.py) instead of polling TfL
+        self.aggregator_url: str = ""
+        # With web_port set, every table shown is also served as JSON/SSE (see web_server.py)
+        self.web_host: str = "127.0.0.1"
+        self.web_port: int | None = None
+        self.web_server = None
+        # Background tasks started by _start_refresh, cancelled on unmount
+        self._tasks: list[asyncio.Task] = []
+
+    def _get_colored_status(self, col_name: str, status: str, row) -> str:
         """
         Return status with color markup based on content.
         """
@@ -92,14 +139,14 @@ class TfLDisplayApp(App):
             case _:
                 return f"[grey]{status}[/grey]"
 
-    def _df_to_datatable(self, df) -> DataTable | Static:
-        """Convert a pandas DataFrame to a Textual DataTable widget.
+    def _df_to_datatable(self, df, table_id: str = "") -> DataTable | Static:
+        """Convert a pandas DataFrame or RecordTable to a Textual DataTable widget.
 
-        If `df` is not a DataFrame, returns a Static widget with stringified content.
+        If `df` is not a table, returns a Static widget with stringified content.
         """
         try:
 
-            async def _update_table_by_id(self, table_id: str, df: pd.DataFrame) -> None:
+            async def _update_table_by_id(self, table_id: str, df) -> None:
                 """Update a specific table by ID."""
                 try:
                     table = self.query_one(table_id, DataTable)
@@ -110,138 +157,171 @@ class TfLDisplayApp(App):
                 raise TypeError
 
             table = DataTable(zebra_stripes=True)
-            # add columns
-            for col in df.columns:
-                table.add_column(str(col))
-            # add row
-            for _, row in df.iterrows():
-                row_data = []
-                for col_name, value in zip(df.columns, row.tolist()):
-                    if "Status" in df.columns and col_name == "Line":
-                        row_data.append(self._get_colored_status(str(col_name), str(value), row))
-                    else:
-                        row_data.append(str(value))
-                table.add_row(*row_data)
+            sync_table(table, *self._table_rows(df, table_id))
             return table
         except Exception as e:
             return Static(f"Error: {str(e)}\n\n{str(df)[:500]}")
 
-    async def _refresh_data(self) -> None:
-        """Refresh data every 5 seconds and update display.
-        All three data sources refresh independently and concurrently."""
-        while True:
-            try:
-                # Fetch all three data sources concurrently
-                await asyncio.gather(
-                    self._fetch_and_update_tube_status(),
-                    self._fetch_and_update_bus_data(),
-                    self._fetch_and_update_bike_data(),
-                    self._fetch_and_update_overground_data(),
-                )
-                # Update time after all data fetches
-                self.current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            except Exception as e:
-                self.notify(f"Error refreshing data: {e}", severity="error")
-
-            finally:
-                # Wait configured interval before next refresh - update countdown every second
-                interval = int(getattr(self, "refresh_interval_seconds", 10))
-                # ensure countdown starts at full interval
-                for remaining in range(interval, 0, -1):
-                    try:
-                        self.refresh_countdown = remaining
-                    except Exception:
-                        pass
-                    await asyncio.sleep(1)
-
-    async def _fetch_and_update_tube_status(self) -> None:
-        """Fetch tube line status independently."""
-        try:
-            self.data_dict["tube_line_status"] = await _get_tube_status_update(self.client)
-            if not self.data_dict["tube_line_status"].empty:
-                await self._update_table_by_id(
-                    "#status_table",
-                    self.data_dict.get("tube_line_status", pd.DataFrame()),
-                )
-                # print(self.data_dict["tube_line_status"])
-        except Exception:
-            pass  # Individual fetch failed, will retry on next cycle
-
-    async def _fetch_and_update_bus_data(self) -> None:
-        """Fetch next tube/bus data independently."""
-        try:
-            self.data_dict["next_tube_and_bus_df"] = await _next_train_or_bus(
-                self.client, self.tube_and_bus_stops
-            )
-            if not self.data_dict["next_tube_and_bus_df"].empty:
-                await self._update_table_by_id(
-                    "#next_tube_and_bus_df",
-                    self.data_dict.get("next_tube_and_bus_df", pd.DataFrame()),
-                )
-        except Exception:
-            pass  # Individual fetch failed, will retry on next cycle
+    def _fetched(self, name: str, table, error: Exception | None) -> None:
+        """Note the fetch on screen: the header time, an error toast, the loading note."""
+        if error is not None:
+            self.notify(f"Error refreshing {name}: {error}", severity="error")
+        else:
+            # Update time after each data fetch
+            self.current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if name in self.loading:
+            if table is not None:
+                self.loading.discard(name)
+            self._set_panel_note(name, "" if table is not None else "fetch failed, retrying…")
+
+    def _show_stale(self, name: str) -> None:
+        """Stale-while-error: keep serving the last good table, flagged with its age."""
+        if name in self._last_success:
+            self.stale_since.setdefault(name, self._last_success[name])
+            self._update_stale_notes()
+            if self.web_server is not None:
+                self.web_server.mark_stale(name)
+
+    async def _show_fresh(self, name: str, table, fetched_at: float) -> None:
+        """Display a good fetch, clear the panel's stale marker and save it for a warm start."""
+        key, table_id = SOURCE_TABLES[name]
+        self.data_dict[key] = table
+        await self._update_table_by_id(table_id, table)
+        self._last_success[name] = fetched_at
+        if self.stale_since.pop(name, None) is not None:
+            self._set_panel_note(name, "")
+        if self.web_server is not None:
+            self.web_server.publish(name, table, fetched_at)
+        await self._record_fresh(name, table, fetched_at)
+
+    async def _follow_aggregator(self) -> None:
+        """Show the snapshots an aggregator publishes instead of polling TfL (thin client).
+
+        While the aggregator reports a source failing, or can't be reached at all, the
+        panels keep their last table marked stale, and the connection is retried with
+        back-off.
+        """
+        import httpx
 
-    async def _fetch_and_update_bike_data(self) -> None:
-        """Fetch bike point data independently."""
-        try:
-            self.data_dict["boris_bike_df"] = await get_specific_boris_bike_info(
-                self.client, self.bikepoints
-            )
-            if not self.data_dict["boris_bike_df"].empty:
-                await self._update_table_by_id(
-                    "#boris_bike_df",
-                    self.data_dict.get("boris_bike_df", pd.DataFrame()),
-                )
-        except Exception:
-            pass  # Individual fetch failed, will retry on next cycle
+        from aggregator import subscribe
 
-    async def _fetch_and_update_overground_data(self) -> None:
-        """Fetch overground live departures independently."""
+        delay = 1.0
+        while True:
+            try:
+                async for name, table, fetched_at, stale in subscribe(
+                    self.aggregator_url, self.data_backend
+                ):
+                    delay = 1.0
+                    self.current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    if name in self.loading:
+                        self.loading.discard(name)
+                        self._set_panel_note(name, "")
+                    if stale:
+                        key, table_id = SOURCE_TABLES[name]
+                        self.data_dict[key] = table
+                        await self._update_table_by_id(table_id, table)
+                        self._last_success[name] = fetched_at
+                        self.stale_since[name] = fetched_at
+                        self._update_stale_notes()
+                        if self.web_server is not None:
+                            self.web_server.publish(name, table, fetched_at, stale=True)
+                    else:
+                        await self._show_fresh(name, table, fetched_at)
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning("Aggregator %s unavailable: %s", self.aggregator_url, e)
+            # lost the stream: everything on screen is now of unknown age
+            for name, since in self._last_success.items():
+                self.stale_since.setdefault(name, since)
+                if self.web_server is not None:
+                    self.web_server.mark_stale(name)
+            self._update_stale_notes()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def _set_panel_note(self, name: str, note: str) -> None:
+        """Show a short note (loading, data age) on a source's panel border."""
         try:
-            self.data_dict["overground_df"] = await get_live_overground_trains(
-                self.client,
-                self.overground_routes,
-                self.overground_api_url,
-                self.overground_auth,
-            )
-            if not self.data_dict["overground_df"].empty:
-                await self._update_table_by_id(
-                    "#overground_df",
-                    self.data_dict.get("overground_df", pd.DataFrame()),
-                )
-        except Exception:
-            pass
-
-    async def _update_table_by_id(self, table_id: str, df: pd.DataFrame) -> None:
+            self.query_one(SOURCE_TABLES[name][1], DataTable).border_subtitle = note
+        except QueryError as e:
+            # Table may not be mounted (e.g. an error Static)
+            logger.debug("No panel for %s: %s", name, e)
+
+    def _update_stale_notes(self) -> None:
+        """Refresh the age shown on every panel that is serving stale data."""
+        now = time.time()
+        for name, since in self.stale_since.items():
+            self._set_panel_note(name, f"stale · updated {_format_age(now - since)} ago")
+
+    def _update_refresh_countdown(self) -> None:
+        """Show the seconds until the next source is due to refresh."""
+        if self._next_refresh:
+            remaining = min(self._next_refresh.values()) - time.monotonic()
+            self.refresh_countdown = max(0, round(remaining))
+
+    async def _tick_countdowns(self) -> None:
+        """Recompute countdown cells from the stored arrival times, without an API call.
+
+        Runs every second so countdowns stay live between polls; vehicles whose
+        arrival time has passed are dropped.
+        """
+        for key, table_id in (
+            ("next_tube_and_bus_df", "#next_tube_and_bus_df"),
+            ("overground_df", "#overground_df"),
+        ):
+            df = self.data_dict.get(key)
+            if df is None or df.empty:
+                continue
+            self.data_dict[key] = tick_countdowns(df)
+            await self._update_table_by_id(table_id, self.data_dict[key])
+
+    async def _update_table_by_id(self, table_id: str, df) -> None:
         """Update a specific table by ID."""
         try:
             table = self.query_one(table_id, DataTable)
-            await self._refresh_datatable(table, df)
+            with METRICS.timer("render_seconds", table=table_id.lstrip("#")):
+                await self._refresh_datatable(table, df)
         except Exception as e:
             logger.exception("Error updating table %s: %s", table_id, e)
 
-    async def _refresh_datatable(self, table: DataTable, df: pd.DataFrame) -> DataTable | None:
-        """Clear and repopulate a DataTable with new data."""
-        try:
-            # Clear existing rows only
-            table.clear(columns=False)
+    def action_toggle_metrics(self) -> None:
+        """Show or hide the timings panel (see metrics.py)."""
+        panel = self.query_one("#metrics_table", DataTable)
+        panel.display = not panel.display
+        self._update_metrics_panel()
 
-            # Only add columns on first load (if table is empty)
-            if len(table.columns) == 0:
-                for col in df.columns:
-                    table.add_column(str(col))
+    def _update_metrics_panel(self) -> None:
+        """Refresh the timings panel from metrics.METRICS while it is shown."""
+        try:
+            panel = self.query_one("#metrics_table", DataTable)
+        except QueryError:
+            return  # Not mounted yet, or already torn down
+        if panel.display:
+            sync_table(panel, SUMMARY_COLUMNS, METRICS.summary_rows())
 
-            # Add rows with coloring
+    def _table_rows(self, df, table_id: str) -> tuple[list[str], list[tuple[str, list[str]]]]:
+        """Return the visible columns of `df` and its rows as (key, cells) pairs.
 
-            for _, row in df.iterrows():
-                row_data = []
-                for col_name, value in zip(df.columns, row.tolist()):
-                    if "Status" in df.columns and col_name == "Line":
-                        row_data.append(self._get_colored_status(str(col_name), str(value), row))
-                    else:
-                        row_data.append(str(value))
-                table.add_row(*row_data)
+        Columns starting with an underscore are internal and not displayed.
+        """
+        columns = [str(col) for col in df.columns if not str(col).startswith("_")]
+        key_columns = ROW_KEY_COLUMNS.get(table_id, tuple(columns))
+        rows = []
+        for values, row in iter_table_rows(df):
+            row_data = []
+            for col_name, value in zip(df.columns, values):
+                if str(col_name).startswith("_"):
+                    continue
+                if "Status" in df.columns and col_name == "Line":
+                    row_data.append(self._get_colored_status(str(col_name), str(value), row))
+                else:
+                    row_data.append(str(value))
+            rows.append((_row_key(row, key_columns), row_data))
+        return columns, rows
+
+    async def _refresh_datatable(self, table: DataTable, df) -> DataTable | None:
+        """Update a DataTable in place, touching only the rows and cells that changed."""
+        try:
+            sync_table(table, *self._table_rows(df, table.id or ""))
             return table
         except Exception:
             # Skip if data invalid and return None to indicate no update
@@ -251,17 +331,21 @@ class TfLDisplayApp(App):
         """Compose the layout with header, main content, and exit button."""
         # Create tables with IDs
         top_left_table = self._df_to_datatable(
-            self.data_dict.get("next_tube_and_bus_df", pd.DataFrame())
+            self.data_dict.get("next_tube_and_bus_df", RecordTable()), "next_tube_and_bus_df"
         )
         top_left_table.id = "next_tube_and_bus_df"
 
-        status_table = self._df_to_datatable(self.data_dict.get("tube_line_status", pd.DataFrame()))
+        status_table = self._df_to_datatable(
+            self.data_dict.get("tube_line_status", RecordTable()), "status_table"
+        )
         status_table.id = "status_table"
 
-        bottom_table = self._df_to_datatable(self.data_dict.get("boris_bike_df", pd.DataFrame()))
+        bottom_table = self._df_to_datatable(
+            self.data_dict.get("boris_bike_df", RecordTable()), "boris_bike_df"
+        )
         bottom_table.id = "boris_bike_df"
         overground_table = self._df_to_datatable(
-            self.data_dict.get("overground_df", pd.DataFrame())
+            self.data_dict.get("overground_df", RecordTable()), "overground_df"
         )
         overground_table.id = "overground_df"
 
@@ -284,11 +368,22 @@ class TfLDisplayApp(App):
                 ),
                 id="main_container",
             ),
+            # Request, parse, build and render timings; hidden until toggled with "m"
+            DataTable(zebra_stripes=True, id="metrics_table"),
             id="main_layout",
         )
 
     def on_mount(self) -> None:
         """Initialize the app and start data refresh task."""
+        # Panels painted from a previous run's snapshot stay marked until fresh data lands;
+        # panels with no data at all show a placeholder until their first fetch returns
+        for name, (key, _) in SOURCE_TABLES.items():
+            if name not in self.stale_since and (
+                key not in self.data_dict or self.data_dict[key].empty
+            ):
+                self.loading.add(name)
+                self._set_panel_note(name, "loading…")
+        self._update_stale_notes()
         # Set initial time
         self.current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         # Initialize countdown from configured interval
@@ -297,12 +392,58 @@ class TfLDisplayApp(App):
         except Exception:
             self.refresh_countdown = 10
 
-        # Start background data refresh task
+        # Start background data refresh task once the first frame is up
         self.app.call_later(self._start_refresh)
+        # Tick arrival countdowns and the next-refresh countdown locally between polls
+        self.set_interval(1, self._tick_countdowns)
+        self.set_interval(1, self._update_refresh_countdown)
+        self.set_interval(1, self._update_stale_notes)
+        self.set_interval(1, self._update_metrics_panel)
 
     def _start_refresh(self) -> None:
         """Start the async data refresh task."""
-        asyncio.create_task(self._refresh_data())
+        if self.web_port is not None:
+            self._start_task(self._start_web_server())
+        if self.history is not None:
+            self._start_task(self.history.run())
+        if self.aggregator_url:
+            self._start_task(self._follow_aggregator())
+            return
+        # One pooled client per host, created inside the app's event loop (this is also
+        # where httpx first gets imported, so it stays off the path to the first frame)
+        self.open_clients()
+        self._start_task(self._poll_sources())
+
+    def _start_task(self, coro) -> None:
+        """Run `coro` in the background, keeping its task so on_unmount can cancel it."""
+        self._tasks.append(asyncio.create_task(coro))
+
+    async def _start_web_server(self) -> None:
+        """Serve the tables as JSON/SSE, starting with whatever is already on screen."""
+        from web_server import SnapshotServer
+
+        self.web_server = SnapshotServer(metrics=METRICS)
+        for name, (key, _) in SOURCE_TABLES.items():
+            table = self.data_dict.get(key)
+            if table is not None and not table.empty:
+                since = self.stale_since.get(name, self._last_success.get(name, time.time()))
+                self.web_server.publish(name, table, since, stale=name in self.stale_since)
+        try:
+            await self.web_server.start(self.web_host, self.web_port)
+        except OSError as e:
+            logger.warning("Could not serve tables on port %s: %s", self.web_port, e)
+            self.web_server = None
+
+    async def on_unmount(self) -> None:
+        """Close the clients, flushing history and timings first (see
+        SourcePoller.close_sources), then stop the web server."""
+        # Stop polling first so no request is in flight on a client being closed
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.close_sources()
+        if self.web_server is not None:
+            await self.web_server.close()
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """Handle button presses."""
@@ -326,20 +467,50 @@ class TfLDisplayApp(App):
             pass
 
 
-async def constant_data_pull(tube_and_bus_stops, bikepoints):
-    data_dict = {}
-    tube_line_status = await _get_tube_status_update(client)
-    data_dict["tube_line_status"] = tube_line_status
+def _without_hidden_columns(table):
+    # The underscore columns (_vehicleId, _expectedArrival, _id) are the app's bookkeeping for
+    # row identity and countdowns; scripts get the columns the screen shows. RecordTables
+    # keep them, as their rows are fixed-layout records
+    if isinstance(table, RecordTable):
+        return table
+    return table[[col for col in table.columns if not str(col).startswith("_")]]
 
-    next_tube_and_bus_df = await _next_train_or_bus(client, tube_and_bus_stops)
-    data_dict["next_tube_and_bus_df"] = next_tube_and_bus_df
 
-    boris_bike_df = await get_specific_boris_bike_info(client, bikepoints)
-    data_dict["boris_bike_df"] = boris_bike_df
-    return data_dict
+# One-shot fetches for scripts; the app itself fetches inside its own event loop.
+# Pass hidden=True to keep the underscore columns in the DataFrames
+async def constant_data_pull(
+    tube_and_bus_stops, bikepoints, backend="pandas", client_config=None, hidden=False
+):
+    data_dict = {}
+    # Clients live only as long as this event loop
+    async with ClientRegistry.from_config(client_config or {}) as clients:
+        client = clients.tfl
+        tube_line_status = await _get_tube_status_update(client, backend=backend)
+        data_dict["tube_line_status"] = tube_line_status
+
+        next_tube_and_bus_df = await _next_train_or_bus(client, tube_and_bus_stops, backend=backend)
+        data_dict["next_tube_and_bus_df"] = next_tube_and_bus_df
+
+        boris_bike_df = await get_specific_boris_bike_info(client, bikepoints, backend=backend)
+        data_dict["boris_bike_df"] = boris_bike_df
+    if hidden:
+        return data_dict
+    return {key: _without_hidden_columns(table) for key, table in data_dict.items()}
+
+
+async def overground_data_pull(
+    routes, api_url, auth, backend="pandas", client_config=None, hidden=False
+):
+    async with ClientRegistry.from_config(client_config or {}) as clients:
+        trains = await get_live_overground_trains(
+            clients.for_url(api_url), routes, api_url, auth, backend=backend
+        )
+    return trains if hidden else _without_hidden_columns(trains)
 
 
 if __name__ == "__main__":
+    import yaml
+
     # Load configuration from YAML for better readability (config.yml)
     config_path = Path(__file__).parent / "config.yml"
     if config_path.exists():
@@ -348,42 +519,26 @@ if __name__ == "__main__":
     else:
         cfg = {}
 
-    # Expect mappings directly in YAML
-    tube_and_bus_stops = cfg.get("tube_and_bus_stops", {})
-    bikepoints = cfg.get("bikepoints", {})
-    overground_stations = cfg.get("overground_stations", {})
-    overground_api_url = cfg.get("overground_api_url", "")
-    overground_routes = cfg.get("overground_routes", [])
-    overground_api_username = cfg.get("overground_api_username", "")
-    overground_api_password = cfg.get("overground_api_password", "")
-    overground_auth = (
-        (overground_api_username, overground_api_password)
-        if overground_api_username and overground_api_password
-        else None
-    )
-    # Optional values
-    tfl_api_key = cfg.get("tfl_api_key")
-    tfl_api_name = cfg.get("tfl_api_name")
-
-    # Gather initial data and run the textual app
-    initial_data = asyncio.run(constant_data_pull(tube_and_bus_stops, bikepoints))
-
+    # The app mounts straight away with any snapshots (or empty placeholder tables) and
+    # fetches every source in its own task inside the Textual event loop. Stops, bike
+    # points, overground routes, http_* client settings, refresh cadence, snapshots,
+    # history and metrics_path are read by polling.SourcePoller.configure, shared with
+    # the aggregator
     app = TfLDisplayApp()
-    app.data_dict = initial_data
-    app.client = client
-    app.tube_and_bus_stops = tube_and_bus_stops
-    app.bikepoints = bikepoints
-    app.overground_stations = overground_stations
-    app.overground_api_url = overground_api_url
-    app.overground_routes = overground_routes
-    app.overground_auth = overground_auth
-    # Initial overground fetch (best-effort)
-    initial_overground = asyncio.run(
-        get_live_overground_trains(client, overground_routes, overground_api_url, overground_auth)
-    )
-    app.data_dict["overground_df"] = initial_overground
-    # Set refresh interval from config (seconds)
-    app.refresh_interval_seconds = cfg.get("refresh_interval_seconds", 10)
+    app.configure(cfg)
+    # DataFrames or pandas-free RecordTables (see records.py); the aggregator always uses records
+    app.data_backend = cfg.get("data_backend", "pandas")
+    # Last-good snapshots let a restart paint immediately; they are refreshed in the background.
+    # They load as RecordTables even with the pandas backend so pandas is not imported before
+    # the first paint
+    snapshots = app.snapshots.load_all() if app.snapshots is not None else {}
+    app.data_dict = {SOURCE_TABLES[name][0]: table for name, (table, _) in snapshots.items()}
+    app.stale_since = {name: saved_at for name, (_, saved_at) in snapshots.items()}
+    # Set to a running `python aggregator.py` to share its polling instead of calling TfL
+    app.aggregator_url = cfg.get("aggregator_url", "")
+    # Also serve the tables as JSON/SSE (and a browser page) while the TUI runs
+    app.web_host = cfg.get("web_host", "127.0.0.1")
+    app.web_port = cfg.get("web_port")
 
     # run the TUI
     app.run()
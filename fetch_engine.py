@@ -0,0 +1,86 @@
+"""Bounded-concurrency fetching of many TfL endpoints at once.
+
+``FetchEngine`` issues every request up front, keeps at most
+``max_in_flight`` of them on the wire and yields each decoded payload as
+soon as it lands. Requests that fail, time out or return a non-200 status
+are logged and left out, so callers always get a (possibly partial) result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator, Hashable, Mapping
+from typing import TYPE_CHECKING, Any
+
+from metrics import decode_json
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class FetchEngine:
+    """Fetch many GET paths concurrently with a cap on requests in flight."""
+
+    def __init__(
+        self, client: httpx.AsyncClient, max_in_flight: int = 8, timeout: float = 10.0
+    ) -> None:
+        self.client = client
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.timeout = timeout
+
+    async def fetch_json(self, path: str) -> Any | None:
+        """GET a single path and return the decoded JSON, or None on any failure."""
+        import httpx
+
+        try:
+            async with asyncio.timeout(self.timeout):
+                resp = await self.client.get(path)
+        except TimeoutError:
+            logger.warning("Timed out after %ss fetching %s", self.timeout, path)
+            return None
+        except httpx.HTTPError as exc:
+            logger.warning("Network error fetching %s: %s", path, exc)
+            return None
+
+        if resp.status_code != 200:
+            logger.warning("HTTP %s fetching %s", resp.status_code, path)
+            return None
+
+        try:
+            return decode_json(resp)
+        except json.JSONDecodeError:
+            logger.warning("Invalid JSON from %s", path)
+            return None
+
+    async def iter_completed(
+        self, requests: Mapping[Hashable, str]
+    ) -> AsyncIterator[tuple[Hashable, Any]]:
+        """Yield ``(key, payload)`` pairs in completion order.
+
+        ``requests`` maps a caller-chosen key to the path to fetch. Keys whose
+        request failed are skipped.
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        async def _bounded(key: Hashable, path: str) -> tuple[Hashable, Any]:
+            async with semaphore:
+                return key, await self.fetch_json(path)
+
+        tasks = [asyncio.create_task(_bounded(key, path)) for key, path in requests.items()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                key, payload = await next_done
+                if payload is not None:
+                    yield key, payload
+        finally:
+            # If the consumer stops early, don't leave requests running
+            for task in tasks:
+                task.cancel()
+
+    async def fetch_many(self, requests: Mapping[Hashable, str]) -> dict[Hashable, Any]:
+        """Fetch every path and return a dict of the payloads that succeeded."""
+        return {key: payload async for key, payload in self.iter_completed(requests)}
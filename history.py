@@ -0,0 +1,444 @@
+"""Opt-in history of bike availability and arrival predictions, for analysis over weeks.
+
+With ``history: true`` in config.yml the app (or the aggregator) hands
+every fresh bike point and arrivals table to a ``HistoryRecorder``. It
+keeps the few columns worth analysing as plain tuples and writes them in
+batches every ``history_flush_seconds`` from a worker thread, so the UI
+loop never waits on disk.
+
+``HistoryStore`` keeps one SQLite file per UTC day under ``history_path``
+(``history-2026-10-17.sqlite``), starting a new numbered file for the day
+(``history-2026-10-17.1.sqlite``) once one grows past
+``history_max_mb``. Old days can be archived or deleted file by file.
+Each file is self-contained and compact:
+
+- ``bikes``: epoch second, dock, bikes, empty docks
+- ``arrivals``: epoch second, stop, line, vehicle, expected arrival (epoch)
+- ``names``: the dock, stop, line and vehicle names, stored once each and
+  referenced by integer id from the rows
+
+Rows are clustered by time (``WITHOUT ROWID`` tables keyed on the epoch
+second first), so appends and time-range scans are sequential, with a
+second index per dock and per stop/line for long ranges over a few of
+them.
+
+``HistoryStore.bike_availability`` and ``HistoryStore.arrival_waits`` return
+per-bucket aggregates over a time range, combining the files it covers:
+
+    python history.py bikes --since 7d --bucket 1h
+    python history.py arrivals --since 1d --stop "Oxford Circus"
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import sqlite3
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from contextlib import closing
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from records import iter_table_rows
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = Path(__file__).parent / "history"
+DEFAULT_MAX_MB = 256
+
+_FILE_NAME = re.compile(r"^history-(\d{4}-\d{2}-\d{2})(?:\.(\d+))?\.sqlite$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS names (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (kind, name)
+);
+CREATE TABLE IF NOT EXISTS bikes (
+    ts INTEGER NOT NULL,
+    dock INTEGER NOT NULL,
+    bikes INTEGER,
+    empty INTEGER,
+    PRIMARY KEY (ts, dock)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bikes_by_dock ON bikes (dock, ts);
+CREATE TABLE IF NOT EXISTS arrivals (
+    ts INTEGER NOT NULL,
+    stop INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    vehicle INTEGER NOT NULL,
+    expected INTEGER NOT NULL,
+    PRIMARY KEY (ts, stop, line, vehicle, expected)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS arrivals_by_stop ON arrivals (stop, line, ts);
+"""
+
+# (ts, dock, bikes, empty) and (ts, stop, line, vehicle, expected), as queued for writing
+BikeRow = tuple[int, str, int | None, int | None]
+ArrivalRow = tuple[int, str, str, str, int]
+
+
+class BikeAvailability(NamedTuple):
+    bucket: int  # epoch second the bucket starts at
+    dock: str
+    samples: int
+    avg_bikes: float
+    min_bikes: int
+    max_bikes: int
+    avg_empty: float
+
+
+class ArrivalWaits(NamedTuple):
+    """Wait until the next predicted arrival, over the snapshots in a bucket."""
+
+    bucket: int
+    stop: str
+    line: str
+    snapshots: int
+    avg_wait: float  # seconds
+    min_wait: int
+    max_wait: int
+
+
+def _combine(pick, a, b):
+    # min/max of two partial aggregates, either of which may be NULL
+    if a is None:
+        return b
+    return a if b is None else pick(a, b)
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, UTC).strftime("%Y-%m-%d")
+
+
+def _int(value: Any) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _epoch(value: Any) -> int | None:
+    # arrival times are timezone-aware UTC datetimes (or pandas Timestamps); NaT/None are skipped
+    if not isinstance(value, datetime) or value.tzinfo is None:
+        return None
+    return int(value.timestamp())
+
+
+def bike_rows(table, fetched_at: float) -> list[BikeRow]:
+    """The (ts, dock, bikes, empty) rows of a bike point table."""
+    ts = int(fetched_at)
+    return [
+        (ts, str(row["_id"]), _int(row["NbBikes"]), _int(row["NbEmpty"]))
+        for _, row in iter_table_rows(table)
+    ]
+
+
+def arrival_rows(table, fetched_at: float) -> list[ArrivalRow]:
+    """The (ts, stop, line, vehicle, expected) rows of an arrivals table."""
+    ts = int(fetched_at)
+    rows = []
+    for _, row in iter_table_rows(table):
+        expected = _epoch(row["_expectedArrival"])
+        if expected is not None:
+            rows.append(
+                (ts, str(row["stationName"]), str(row["line"]), str(row["_vehicleId"]), expected)
+            )
+    return rows
+
+
+class HistoryStore:
+    """Daily (and size-capped) SQLite files of bike and arrival history."""
+
+    def __init__(self, path: str | Path, max_mb: float = DEFAULT_MAX_MB) -> None:
+        self.path = Path(path)
+        self.max_bytes = int(max_mb * 2**20)
+        # per file: {(kind, name): id} for names already in its names table
+        self._ids: dict[Path, dict[tuple[str, str], int]] = {}
+
+    def files(self, start: float | None = None, end: float | None = None) -> list[Path]:
+        """History files, oldest first, for the days overlapping ``[start, end)``."""
+        found = []
+        first = _day(start) if start is not None else ""
+        last = _day(end) if end is not None else "9999"
+        for file in self.path.glob("history-*.sqlite"):
+            match = _FILE_NAME.match(file.name)
+            if match and first <= match.group(1) <= last:
+                found.append((match.group(1), int(match.group(2) or 0), file))
+        return [file for *_, file in sorted(found)]
+
+    def _file_for(self, day: str) -> Path:
+        # the day's newest file, or a new one once it is over max_bytes
+        files = [f for f in self.files() if f.name.startswith(f"history-{day}.")]
+        if not files:
+            return self.path / f"history-{day}.sqlite"
+        newest = files[-1]
+        if newest.stat().st_size < self.max_bytes:
+            return newest
+        match = _FILE_NAME.match(newest.name)
+        return self.path / f"history-{day}.{int(match.group(2) or 0) + 1}.sqlite"
+
+    def _connect(self, file: Path) -> sqlite3.Connection:
+        conn = sqlite3.connect(file)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _name_ids(self, conn: sqlite3.Connection, file: Path, kind: str, names: set[str]) -> dict:
+        ids = self._ids.setdefault(file, {})
+        new = [(kind, name) for name in names if (kind, name) not in ids]
+        if new:
+            conn.executemany("INSERT OR IGNORE INTO names (kind, name) VALUES (?, ?)", new)
+            for i in range(0, len(new), 500):
+                chunk = [name for _, name in new[i : i + 500]]
+                placeholders = ",".join("?" * len(chunk))
+                ids.update(
+                    ((kind, name), name_id)
+                    for name_id, name in conn.execute(
+                        f"SELECT id, name FROM names WHERE kind = ? AND name IN ({placeholders})",
+                        (kind, *chunk),
+                    )
+                )
+        return {name: ids[(kind, name)] for name in names}
+
+    def write(self, bikes: Sequence[BikeRow] = (), arrivals: Sequence[ArrivalRow] = ()) -> None:
+        """Append rows, each to the file for its UTC day, in one transaction per file."""
+        by_day: dict[str, tuple[list, list]] = defaultdict(lambda: ([], []))
+        for row in bikes:
+            by_day[_day(row[0])][0].append(row)
+        for row in arrivals:
+            by_day[_day(row[0])][1].append(row)
+        self.path.mkdir(parents=True, exist_ok=True)
+        used = set()
+        for day, (day_bikes, day_arrivals) in sorted(by_day.items()):
+            file = self._file_for(day)
+            used.add(file)
+            try:
+                self._write_file(file, day_bikes, day_arrivals)
+            except sqlite3.Error:
+                # the transaction rolled back, so may have taken new names with it
+                self._ids.pop(file, None)
+                raise
+        # forget the name ids of files no longer written to
+        self._ids = {file: ids for file, ids in self._ids.items() if file in used}
+
+    def _write_file(self, file: Path, bikes: list[BikeRow], arrivals: list[ArrivalRow]) -> None:
+        with closing(self._connect(file)) as conn, conn:
+            conn.executescript(_SCHEMA)
+            docks = self._name_ids(conn, file, "dock", {r[1] for r in bikes})
+            conn.executemany(
+                "INSERT OR REPLACE INTO bikes VALUES (?, ?, ?, ?)",
+                ((ts, docks[dock], n, e) for ts, dock, n, e in bikes),
+            )
+            stops = self._name_ids(conn, file, "stop", {r[1] for r in arrivals})
+            lines = self._name_ids(conn, file, "line", {r[2] for r in arrivals})
+            vehicles = self._name_ids(conn, file, "vehicle", {r[3] for r in arrivals})
+            conn.executemany(
+                "INSERT OR REPLACE INTO arrivals VALUES (?, ?, ?, ?, ?)",
+                (
+                    (ts, stops[stop], lines[line], vehicles[vehicle], expected)
+                    for ts, stop, line, vehicle, expected in arrivals
+                ),
+            )
+
+    def _query(self, start: float, end: float, sql: str, params: Sequence) -> Iterable[tuple]:
+        for file in self.files(start, end):
+            try:
+                with closing(sqlite3.connect(file)) as conn:
+                    yield from conn.execute(sql, (int(start), int(end), *params))
+            except sqlite3.Error as exc:
+                logger.warning("Could not read history from %s: %s", file, exc)
+
+    def bike_availability(
+        self, start: float, end: float, bucket: int = 3600, docks: Sequence[str] = ()
+    ) -> list[BikeAvailability]:
+        """Bikes and empty docks per dock and ``bucket`` seconds in ``[start, end)``."""
+        tables, where = "bikes b JOIN names n", ""
+        if docks:
+            # look the names up first, then each dock's rows through bikes_by_dock; without
+            # ANALYZE statistics SQLite would rather scan the whole time range
+            tables = "names n CROSS JOIN bikes b"
+            where = f" AND n.name IN ({','.join('?' * len(docks))})"
+        sql = f"""
+            SELECT b.ts / {int(bucket)} * {int(bucket)} AS bucket, n.name, COUNT(*),
+                   SUM(b.bikes), MIN(b.bikes), MAX(b.bikes), SUM(b.empty)
+            FROM {tables}
+            WHERE n.id = b.dock AND b.ts >= ? AND b.ts < ?{where}
+            GROUP BY bucket, b.dock
+        """
+        # a bucket can span files (a size rollover): add up their partial aggregates
+        totals: dict[tuple, list] = {}
+        for bucket_start, dock, count, bikes, low, high, empty in self._query(
+            start, end, sql, docks
+        ):
+            t = totals.setdefault((bucket_start, dock), [0, 0, None, None, 0])
+            t[0] += count
+            t[1] += bikes or 0
+            t[2] = _combine(min, t[2], low)
+            t[3] = _combine(max, t[3], high)
+            t[4] += empty or 0
+        return [
+            BikeAvailability(b, dock, n, bikes / n, low, high, empty / n)
+            for (b, dock), (n, bikes, low, high, empty) in sorted(totals.items())
+        ]
+
+    def arrival_waits(
+        self,
+        start: float,
+        end: float,
+        bucket: int = 3600,
+        stops: Sequence[str] = (),
+        lines: Sequence[str] = (),
+    ) -> list[ArrivalWaits]:
+        """Wait to the next predicted arrival per stop, line and ``bucket`` in ``[start, end)``.
+
+        Snapshots where a stop and line had no predictions at all are not in the data.
+        """
+        tables, where, params = "arrivals a JOIN names s JOIN names l", "", []
+        if stops:
+            # as in bike_availability: through arrivals_by_stop rather than a time range scan
+            tables = "names s CROSS JOIN names l CROSS JOIN arrivals a"
+            where += f" AND s.name IN ({','.join('?' * len(stops))})"
+            params += stops
+        if lines:
+            where += f" AND l.name IN ({','.join('?' * len(lines))})"
+            params += lines
+        sql = f"""
+            SELECT ts / {int(bucket)} * {int(bucket)} AS bucket, stop_name, line_name,
+                   COUNT(*), SUM(wait), MIN(wait), MAX(wait)
+            FROM (
+                SELECT a.ts, s.name AS stop_name, l.name AS line_name,
+                       MAX(MIN(a.expected - a.ts), 0) AS wait
+                FROM {tables}
+                WHERE s.id = a.stop AND l.id = a.line AND a.ts >= ? AND a.ts < ?{where}
+                GROUP BY a.stop, a.line, a.ts
+            )
+            GROUP BY bucket, stop_name, line_name
+        """
+        totals: dict[tuple, list] = {}
+        for bucket_start, stop, line, count, waits, low, high in self._query(
+            start, end, sql, params
+        ):
+            t = totals.setdefault((bucket_start, stop, line), [0, 0, None, None])
+            t[0] += count
+            t[1] += waits
+            t[2] = _combine(min, t[2], low)
+            t[3] = _combine(max, t[3], high)
+        return [
+            ArrivalWaits(b, stop, line, n, waits / n, low, high)
+            for (b, stop, line), (n, waits, low, high) in sorted(totals.items())
+        ]
+
+
+# The sources worth keeping, and how each one's table becomes rows
+_ROWS = {"bikes": bike_rows, "arrivals": arrival_rows}
+
+
+class HistoryRecorder:
+    """Queue rows from fresh tables and write them to a ``HistoryStore`` in batches."""
+
+    def __init__(self, store: HistoryStore, flush_seconds: float = 30.0) -> None:
+        self.store = store
+        self.flush_seconds = flush_seconds
+        self._pending: dict[str, list] = {name: [] for name in _ROWS}
+        self._lock = asyncio.Lock()
+        self.rows_written = 0
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> HistoryRecorder | None:
+        """Build from the ``history*`` config keys; None unless ``history`` is true."""
+        if not cfg.get("history", False):
+            return None
+        store = HistoryStore(
+            cfg.get("history_path") or DEFAULT_HISTORY_PATH,
+            cfg.get("history_max_mb", DEFAULT_MAX_MB),
+        )
+        return cls(store, cfg.get("history_flush_seconds", 30.0))
+
+    def record(self, source: str, table, fetched_at: float) -> None:
+        """Queue the rows of a fresh table (sources other than bikes and arrivals are ignored)."""
+        to_rows = _ROWS.get(source)
+        if to_rows is not None:
+            self._pending[source].extend(to_rows(table, fetched_at))
+
+    async def flush(self) -> None:
+        """Write everything queued so far, in a worker thread."""
+        async with self._lock:
+            batch = self._pending
+            if not any(batch.values()):
+                return
+            self._pending = {name: [] for name in _ROWS}
+            try:
+                await asyncio.to_thread(self.store.write, batch["bikes"], batch["arrivals"])
+            except (sqlite3.Error, OSError) as exc:
+                logger.warning("Could not write history to %s: %s", self.store.path, exc)
+                return
+            self.rows_written += sum(len(rows) for rows in batch.values())
+
+    async def run(self) -> None:
+        """Flush every ``flush_seconds`` until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+
+def _parse_duration(text: str) -> int:
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Aggregate the recorded history")
+    parser.add_argument("--path", type=Path, default=DEFAULT_HISTORY_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("bikes", "arrivals"):
+        query = sub.add_parser(name)
+        query.add_argument("--since", default="1d", help="e.g. 90m, 12h, 7d (default 1d)")
+        query.add_argument("--until", help="end of the range, as long ago as --since")
+        query.add_argument("--bucket", default="1h", help="aggregate per (default 1h)")
+        if name == "bikes":
+            query.add_argument("--dock", action="append", default=[], help="dock id")
+        else:
+            query.add_argument("--stop", action="append", default=[], help="stop name")
+            query.add_argument("--line", action="append", default=[], help="line id")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.path)
+    now = time.time()
+    start = now - _parse_duration(args.since)
+    end = now - _parse_duration(args.until) if args.until else now + 1
+    bucket = _parse_duration(args.bucket)
+    started = time.perf_counter()
+    if args.command == "bikes":
+        rows = store.bike_availability(start, end, bucket, args.dock)
+        print(
+            f"{'bucket (UTC)':<17} {'dock':<18} {'n':>5} {'bikes':>6} {'min':>4} {'max':>4} {'empty':>6}"
+        )
+        for r in rows:
+            when = datetime.fromtimestamp(r.bucket, UTC).strftime("%Y-%m-%d %H:%M")
+            print(
+                f"{when:<17} {r.dock:<18} {r.samples:>5} {r.avg_bikes:>6.1f} {r.min_bikes:>4} "
+                f"{r.max_bikes:>4} {r.avg_empty:>6.1f}"
+            )
+    else:
+        rows = store.arrival_waits(start, end, bucket, args.stop, args.line)
+        print(f"{'bucket (UTC)':<17} {'stop':<24} {'line':<10} {'n':>5} {'wait s':>7} {'max':>5}")
+        for r in rows:
+            when = datetime.fromtimestamp(r.bucket, UTC).strftime("%Y-%m-%d %H:%M")
+            print(
+                f"{when:<17} {r.stop[:24]:<24} {r.line[:10]:<10} {r.snapshots:>5} "
+                f"{r.avg_wait:>7.0f} {r.max_wait:>5}"
+            )
+    print(
+        f"{len(rows)} rows from {len(store.files(start, end))} files in "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms"
+    )
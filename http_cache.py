@@ -0,0 +1,157 @@
+"""In-memory HTTP cache for the shared ``httpx.AsyncClient``.
+
+``CachingClient`` wraps a client and honours the ``Cache-Control`` and
+``ETag``/``Last-Modified`` headers TfL sends:
+
+- within ``max-age`` a stored response is served without touching the network
+- once stale it is revalidated with ``If-None-Match``/``If-Modified-Since``;
+  a 304 refreshes its lifetime and hands back the stored response, whose
+  decoded JSON is memoised so it is not parsed again
+- ``no-store`` responses and non-200 statuses are never stored
+
+Callers read payloads with ``resp.json()``, which works the same on a plain
+``httpx.Response``. Cached payloads are shared between callers and must be
+treated as read-only. Hit, miss and revalidation counts are kept in
+``CachingClient.stats``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from client_layers import ClientLayer, LayerStats
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+class CacheStats(LayerStats):
+    """Counters for cache effectiveness."""
+
+    __slots__ = ("bytes_saved", "hits", "misses", "revalidations")
+    metric_prefix = "http_cache"
+
+
+class CachedResponse:
+    """A stored (or shared) response with the subset of ``httpx.Response`` callers use."""
+
+    __slots__ = ("_json", "content", "headers", "status_code", "url")
+
+    _UNPARSED = object()
+
+    def __init__(self, response: httpx.Response) -> None:
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.content
+        self.url = response.url
+        self._json: Any = self._UNPARSED
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> Any:
+        if self._json is self._UNPARSED:
+            self._json = json.loads(self.content)
+        return self._json
+
+
+class _Entry:
+    __slots__ = ("etag", "expires", "last_modified", "response")
+
+    def __init__(self, response: CachedResponse, expires: float) -> None:
+        self.response = response
+        self.expires = expires
+        self.etag = response.headers.get("etag")
+        self.last_modified = response.headers.get("last-modified")
+
+
+def _freshness(headers: httpx.Headers) -> float | None:
+    """Seconds the response may be served from cache, or None if it must not be stored."""
+    cache_control = headers.get("cache-control", "")
+    directives = cache_control.lower()
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    match = _MAX_AGE.search(cache_control)
+    if not match:
+        return 0.0
+    try:
+        age = int(headers.get("age", "0"))
+    except ValueError:
+        age = 0
+    return max(0.0, int(match.group(1)) - age)
+
+
+class CachingClient(ClientLayer):
+    """Wrap an ``httpx.AsyncClient`` so GET requests go through an HTTP cache.
+
+    Anything other than ``get`` is passed straight to the wrapped client.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, max_entries: int = 512) -> None:
+        super().__init__(client)
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    def _cache_key(self, url: str, params: Any) -> str:
+        return str(self.client.build_request("GET", url, params=params).url)
+
+    def _store(self, key: str, response: httpx.Response) -> CachedResponse | httpx.Response:
+        lifetime = _freshness(response.headers)
+        validator = response.headers.get("etag") or response.headers.get("last-modified")
+        if response.status_code != 200 or lifetime is None or (not lifetime and not validator):
+            self._entries.pop(key, None)
+            return response
+        cached = CachedResponse(response)
+        self._entries[key] = _Entry(cached, time.monotonic() + lifetime)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return cached
+
+    async def get(self, url: str, **kwargs: Any) -> CachedResponse | httpx.Response:
+        key = self._cache_key(url, kwargs.get("params"))
+        entry = self._entries.get(key)
+
+        if entry is not None and time.monotonic() < entry.expires:
+            self.stats.hits += 1
+            self.stats.bytes_saved += len(entry.response.content)
+            self._entries.move_to_end(key)
+            return entry.response
+
+        if entry is not None and (entry.etag or entry.last_modified):
+            import httpx
+
+            headers = httpx.Headers(kwargs.pop("headers", None))
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+            response = await self.client.get(url, headers=headers, **kwargs)
+            if response.status_code == 304:
+                self.stats.revalidations += 1
+                self.stats.bytes_saved += len(entry.response.content)
+                lifetime = _freshness(response.headers)
+                entry.expires = time.monotonic() + (lifetime or 0.0)
+                self._entries.move_to_end(key)
+                return entry.response
+        else:
+            response = await self.client.get(url, **kwargs)
+
+        self.stats.misses += 1
+        return self._store(key, response)
+
+    def clear(self) -> None:
+        self._entries.clear()
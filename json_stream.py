@@ -0,0 +1,150 @@
+"""Incremental parsing of large JSON array responses.
+
+Some TfL metadata endpoints (every bike point, every route on a mode) return
+multi-megabyte arrays of which callers keep a few fields per item.
+``stream_json_array`` reads the body with ``aiter_bytes()`` and yields one
+decoded item at a time, so the full body is never held as bytes, as a str
+and as a list of dicts all at once; callers pick their fields and drop the
+rest as they go.
+
+Items are decoded with the C ``json`` decoder (``raw_decode``) as soon as
+they are complete in the buffer. With ``key`` the top-level value must be
+an object and the array under that key is streamed; the object's other
+values are decoded and discarded.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import logging
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _Buffer:
+    """Text decoded so far from the byte chunks, consumed from the front."""
+
+    def __init__(self, chunks: AsyncIterable[bytes]) -> None:
+        self._chunks = aiter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.done = False
+
+    async def more(self, size: int = 1) -> bool:
+        """Append at least ``size`` more characters if the body has them; False once exhausted."""
+        if self.done:
+            return False
+        pieces = [self.text[self.pos :]]
+        added = 0
+        while added < size:
+            try:
+                chunk = await anext(self._chunks)
+            except StopAsyncIteration:
+                pieces.append(self._utf8.decode(b"", final=True))
+                self.done = True
+                break
+            piece = self._utf8.decode(chunk)
+            pieces.append(piece)
+            added += len(piece)
+        # drop consumed text so the buffer only ever holds the item being parsed
+        self.text = "".join(pieces)
+        self.pos = 0
+        return added > 0 or not self.done
+
+    async def peek(self) -> str:
+        """Return the next non-whitespace character ("" at the end), without consuming it."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not await self.more():
+                return ""
+
+    async def expect(self, char: str) -> None:
+        found = await self.peek()
+        if found != char:
+            raise ValueError(f"expected {char!r} in JSON stream, found {found!r}")
+        self.pos += 1
+
+    async def value(self) -> Any:
+        """Decode the next complete JSON value, reading more chunks until it is complete."""
+        await self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                # read as much again before retrying, so a value spanning many chunks is
+                # re-scanned a logarithmic number of times rather than once per chunk
+                if not await self.more(len(self.text) - self.pos):
+                    raise
+                continue
+            # a number at the very end of the buffer may continue in the next chunk
+            if end == len(self.text) and not self.done and await self.more():
+                continue
+            self.pos = end
+            return value
+
+
+async def _iter_array(buffer: _Buffer) -> AsyncIterator[Any]:
+    await buffer.expect("[")
+    if await buffer.peek() == "]":
+        buffer.pos += 1
+        return
+    while True:
+        yield await buffer.value()
+        if await buffer.peek() == ",":
+            buffer.pos += 1
+            continue
+        await buffer.expect("]")
+        return
+
+
+async def iter_json_array(
+    chunks: AsyncIterable[bytes], key: str | None = None
+) -> AsyncIterator[Any]:
+    """Yield the items of the JSON array in ``chunks`` (or under ``key`` of its top-level object)."""
+    buffer = _Buffer(chunks)
+    if key is None:
+        async for item in _iter_array(buffer):
+            yield item
+        return
+
+    await buffer.expect("{")
+    if await buffer.peek() == "}":
+        return
+    while True:
+        name = await buffer.value()
+        await buffer.expect(":")
+        if name == key and await buffer.peek() == "[":
+            async for item in _iter_array(buffer):
+                yield item
+        else:
+            await buffer.value()
+        if await buffer.peek() == ",":
+            buffer.pos += 1
+            continue
+        await buffer.expect("}")
+        return
+
+
+async def stream_json_array(client, url: str, key: str | None = None) -> AsyncIterator[Any]:
+    """GET ``url`` with a streaming request and yield the items of its JSON array.
+
+    Non-200 responses are logged and yield nothing. The request goes straight to
+    the underlying httpx client (the cache and single-flight layers only handle
+    whole responses).
+    """
+    async with client.stream("GET", url) as response:
+        if response.status_code != 200:
+            logger.warning("HTTP %s streaming %s", response.status_code, url)
+            return
+        async for item in iter_json_array(response.aiter_bytes(), key):
+            yield item
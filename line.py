@@ -1,9 +1,16 @@
 # created on 30/10/25 by gooseberry-py on a raspberry pi 5
-import httpx
-import pandas as pd
-import json
+import asyncio
+from datetime import UTC
 from datetime import datetime as dt
+import json
 import logging
+from fetch_engine import FetchEngine
+from json_stream import stream_json_array
+from metrics import METRICS, decode_json
+from records import ArrivalRecord, LineStatusRecord, RecordTable
+
+# pandas is imported inside the functions that build DataFrames so the
+# backend="records" path never pays for it
 
 logger = logging.getLogger(__name__)
 
@@ -12,10 +19,8 @@ logger = logging.getLogger(__name__)
 # load environment variables from .env file
 # load_dotenv(dotenv_path="config.env")
 
-client = httpx.AsyncClient(
-    headers={"Accept": "application/json"},
-    base_url="https://api.tfl.gov.uk/",
-)
+# Every helper takes the client to use as its first argument; get one from
+# clients.ClientRegistry (e.g. `async with ClientRegistry() as clients: ... clients.tfl`)
 
 
 def format_timedelta(td):
@@ -31,11 +36,29 @@ def format_timedelta(td):
     return f"{minutes} m {seconds} s"
 
 
+def format_timedeltas(deltas):
+    # Whole-column format_timedelta for a pandas timedelta Series: integer seconds and the
+    # minute/second split are worked out once for the column as int64 arrays, then the
+    # strings are built in one pass with no per-row Timedelta objects. NaT becomes ""
+    import numpy as np
+    import pandas as pd
+
+    values = deltas.to_numpy(dtype="m8[ns]")
+    valid = ~np.isnat(values)
+    secs = np.where(valid, values.view("int64") // 1_000_000_000, 0).clip(min=0)
+    minutes, seconds = np.divmod(secs, 60)
+    text = [
+        f"{m} m {s} s" if ok else ""
+        for m, s, ok in zip(minutes.tolist(), seconds.tolist(), valid.tolist())
+    ]
+    return pd.Series(text, index=deltas.index, dtype=object)
+
+
 async def _get_list_modes(client):
     # Gets a list of valid modes
     # https://api-portal.tfl.gov.uk/api-details#api=Line&operation=Line_MetaModes
     all_modes = await client.get("Line/Meta/Modes")
-    all_modes_clean = json.loads(all_modes.text)
+    all_modes_clean = all_modes.json()
     all_modes_list = []
     for item in range(len(all_modes_clean)):
         all_modes_list.append(all_modes_clean[item]["modeName"])
@@ -46,66 +69,143 @@ async def _get_tube_lines(client, modes):
     # get tube lines
     # https://api-portal.tfl.gov.uk/api-details#api=Line&operation=Line_StatusByModeByPathModesQueryDetailQuerySeverityLevel
     tube_lines = await client.get(f"Line/Mode/{modes}/Status")
-    tube_lines_clean = json.loads(tube_lines.text)
+    tube_lines_clean = tube_lines.json()
     tube_lines_list = []
     for item in range(len(tube_lines_clean)):
         tube_lines_list.append(tube_lines_clean[item]["name"])
     return tube_lines_list
 
 
-async def _all_valid_routes_all_lines(client, modes):
+def _pick(item, fields):
+    # keep only the requested keys of a decoded JSON object
+    return {field: item.get(field) for field in fields}
+
+
+async def _all_valid_routes_all_lines(client, modes, fields=None):
     # Get all valid routes for all lines, including the name and id of the originating and terminating stops for each route.
     # https://api-portal.tfl.gov.uk/api-details#api=Line&operation=Line_RouteByModeByPathModesQueryServiceTypes
+    # The response is streamed line by line; pass fields (e.g. ("id", "name", "routeSections"))
+    # to keep only those keys of each line
     service_type = "Regular"  # or 'Night'
-    all_lines_routes = await client.get(f"Line/Mode/{modes}/Route?serviceTypes={service_type}")
-    all_lines_routes_clean = json.loads(all_lines_routes.text)
-    return all_lines_routes_clean
+    url = f"Line/Mode/{modes}/Route?serviceTypes={service_type}"
+    return [
+        line if fields is None else _pick(line, fields)
+        async for line in stream_json_array(client, url)
+    ]
 
 
-async def _all_valid_routes_single_line(client, line):
+async def _all_valid_routes_single_line(client, line, stop_fields=None):
     # Gets all valid routes for given line id, including the sequence of stops on each route.
     # We get the name, location, and IDs of different stops on the line
     # https://api-portal.tfl.gov.uk/api-details#api=Line&operation=Line_RouteSequenceByPathIdPathDirectionQueryServiceTypesQueryExcludeCrowding
+    # With stop_fields (e.g. ("id", "name")) only "stopPointSequences" is streamed and each
+    # stop point keeps just those keys; otherwise the whole response is returned
     service_type = "Regular"  # or 'Night'
-    all_routes_single = await client.get(
-        f"Line/{line}/Route/Sequence/all?serviceTypes={service_type}"
-    )
-    all_routes_single_clean = json.loads(all_routes_single.text)
-    return all_routes_single_clean
+    url = f"Line/{line}/Route/Sequence/all?serviceTypes={service_type}"
+    if stop_fields is None:
+        all_routes_single = await client.get(url)
+        return all_routes_single.json()
+    sequences = []
+    async for sequence in stream_json_array(client, url, key="stopPointSequences"):
+        sequence["stopPoint"] = [_pick(stop, stop_fields) for stop in sequence.get("stopPoint", [])]
+        sequences.append(sequence)
+    return {"stopPointSequences": sequences}
 
 
-async def _get_stops_on_a_line(client, lines_to_check):
-    stops_dict = {}
-    for transport in lines_to_check:
-        stops_on_line = await client.get(f"Line/{transport}/StopPoints")
-        logger.debug(
-            "stops_on_line: %s",
-            str(getattr(stops_on_line, "text", stops_on_line))[:500],
-        )
-        stops_on_line_neat = json.loads(stops_on_line.text)
-        stops = [
-            {"id": item["naptanId"], "name": item["commonName"]} for item in stops_on_line_neat
-        ]
-        stops_dict[transport] = stops
-    return stops_dict
+def _read_stops_cache(cache_path):
+    # {line: stops} from a stops cache file; a torn last line (crawl killed mid-write) is ignored
+    cached = {}
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            for row in f:
+                try:
+                    entry = json.loads(row)
+                    cached[entry["line"]] = entry["stops"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return cached
+
 
+def _append_stops_cache(cache_path, line, stops):
+    # Add one line's stops to a stops cache file; run in a worker thread during a crawl
+    with open(cache_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"line": line, "stops": stops}) + "\n")
 
-async def _get_tube_status_update(client):
+
+async def _get_stops_on_a_line(
+    client, lines_to_check, max_in_flight=8, timeout=10.0, cache_path=None, progress=None
+):
+    # Gets {line: [{"id", "name"}, ...]} for every line, fetching Line/{line}/StopPoints for up
+    # to max_in_flight lines at once. Lines whose request fails are logged and left out.
+    # With cache_path, each line is appended to that JSON-lines file as soon as it lands and
+    # lines already in it are not fetched again, so an interrupted crawl picks up where it
+    # stopped (delete the file to refetch everything). The appends run in a worker thread so
+    # the event loop never waits on the disk.
+    # progress(done, total, line) is called as each line finishes.
+    lines_to_check = list(dict.fromkeys(lines_to_check))
+    cached = _read_stops_cache(cache_path) if cache_path else {}
+    stops_dict = {line: cached[line] for line in lines_to_check if line in cached}
+    requests = {
+        line: f"Line/{line}/StopPoints" for line in lines_to_check if line not in stops_dict
+    }
+    total = len(lines_to_check)
+    done = len(stops_dict)
+    if done:
+        logger.info("Stops: %s of %s lines already cached in %s", done, total, cache_path)
+
+    engine = FetchEngine(client, max_in_flight=max_in_flight, timeout=timeout)
+    async for line, stops_on_line in engine.iter_completed(requests):
+        stops = [{"id": item["naptanId"], "name": item["commonName"]} for item in stops_on_line]
+        # lazy %-args: nothing is formatted unless debug logging is on
+        logger.debug("stops_on_line %s: %s stops", line, len(stops))
+        stops_dict[line] = stops
+        if cache_path:
+            await asyncio.to_thread(_append_stops_cache, cache_path, line, stops)
+        done += 1
+        logger.info("Stops: %s/%s lines (%s)", done, total, line)
+        if progress is not None:
+            progress(done, total, line)
+
+    if len(stops_dict) < total:
+        logger.warning("Stops: %s of %s lines could not be fetched", total - len(stops_dict), total)
+    # keep the order the lines were asked for
+    return {line: stops_dict[line] for line in lines_to_check if line in stops_dict}
+
+
+async def _get_tube_status_update(client, backend="pandas"):
+    # backend: "pandas" returns a DataFrame, "records" a records.RecordTable
     # https://api-portal.tfl.gov.uk/api-details#api=Line&operation=Line_StatusByModeByPathModesQueryDetailQuerySeverityLevel
     modes = "tube"  # "bus" "dlr" are valid - try 'national-rail'
     status_dict = {}
     status_raw = await client.get(f"Line/Mode/{modes}/Status")
     if status_raw.status_code == 200:
-        status_neat = json.loads(status_raw.text)
+        status_neat = decode_json(status_raw)
         for x in range(len(status_neat)):
             id_key = status_neat[x]["name"]
             id_body = status_neat[x]["lineStatuses"][0]["statusSeverityDescription"]
             status_dict[id_key] = id_body
-        tube_line_status = pd.DataFrame.from_dict(
-            status_dict, orient="index", columns=pd.Index(["Status"])
+    else:
+        # return an empty table rather than failing; the app keeps showing the last good one
+        logger.warning("HTTP %s fetching tube line status", status_raw.status_code)
+    with METRICS.timer("build_seconds", table="tube_status", backend=backend):
+        return _tube_status_table(status_dict, backend)
+
+
+def _tube_status_table(status_dict, backend="pandas"):
+    # Build the two-column Line/Status table from {line name: status}
+    if backend == "records":
+        return RecordTable.of(
+            LineStatusRecord, [LineStatusRecord(k, v) for k, v in status_dict.items()]
         )
-        tube_line_status.reset_index(inplace=True)
-        tube_line_status.rename(columns={"index": "Line"}, inplace=True)
+    import pandas as pd
+
+    tube_line_status = pd.DataFrame.from_dict(
+        status_dict, orient="index", columns=pd.Index(["Status"])
+    )
+    tube_line_status.reset_index(inplace=True)
+    tube_line_status.rename(columns={"index": "Line"}, inplace=True)
     # Consider constructing DataFrame from records for clarity
     # rand_no = random.randint(0, 2)
     # if rand_no == 0:
@@ -120,23 +220,18 @@ async def _get_tube_status_update(client):
     return tube_line_status
 
 
-async def _next_train_or_bus(client, tube_and_bus_stops):
-    # Get the list of arrival predictions for given line ids based at the given stop
-    # https://api-portal.tfl.gov.uk/api-details#api=Line&operation=Line_ArrivalsWithStopPointByPathIdsPathStopPointIdQueryDirectionQueryDestina
-    next_transport_dict = {}
-    # Include Line and stationName (populated from the configured YAML key) so the UI shows the human-friendly name
-    eta_dashboard_cols: list[str] = [
-        "modeName",
-        "line",
-        "stationName",
-        "platformName",
-        "expectedArrival",
-        "TimeToArrival",
-    ]
-    eta_dashboard_df = pd.DataFrame(columns=pd.Index(eta_dashboard_cols))
+# TfL accepts a comma-separated list of line ids on the arrivals endpoint; cap the
+# group size so URLs stay short
+MAX_LINES_PER_ARRIVALS_REQUEST = 10
+
+
+def _plan_arrival_requests(tube_and_bus_stops, max_lines=MAX_LINES_PER_ARRIVALS_REQUEST):
+    # Group the configured lines for each station into as few arrivals calls as possible.
+    # Returns {(station_name, (line, ...)): "Line/{ids}/Arrivals/{station_id}"}
     # Support two input shapes:
     # 1) New YAML shape: { "Station Name": { "id": "940GZZ...", "lines": ["northern", "jubilee"] }, ... }
     # 2) Legacy shape: { "Station Name": ["940GZZ...", "northern"], ... }
+    plan = {}
     for station_name, details in tube_and_bus_stops.items():
         # Normalize to station_id and list of lines
         station_id = None
@@ -157,35 +252,87 @@ async def _next_train_or_bus(client, tube_and_bus_stops):
 
         if not station_id or not lines:
             continue
+        if isinstance(lines, str):
+            lines = [lines]
+
+        # drop repeated lines but keep the configured order
+        lines = list(dict.fromkeys(lines))
+        for start in range(0, len(lines), max_lines):
+            group = tuple(lines[start : start + max_lines])
+            plan[(station_name, group)] = f"Line/{','.join(group)}/Arrivals/{station_id}"
+    return plan
+
+
+def _split_arrivals_by_line(lines, predictions):
+    # Split a merged multi-line arrivals payload back into {line: [prediction, ...]},
+    # keyed by the line id as written in the config
+    by_line_id = {str(line).lower(): line for line in lines}
+    split = {line: [] for line in lines}
+    for prediction in predictions:
+        line = by_line_id.get(str(prediction.get("lineId", "")).lower())
+        if line is None:
+            if len(lines) != 1:
+                continue
+            line = lines[0]
+        split[line].append(prediction)
+    return split
+
+
+# Include Line and stationName (populated from the configured YAML key) so the UI shows the human-friendly name
+ETA_DASHBOARD_COLS: list[str] = [
+    "modeName",
+    "line",
+    "stationName",
+    "platformName",
+    "expectedArrival",
+    "TimeToArrival",
+    "_vehicleId",
+]
+
+
+def _new_eta_columns():
+    # One list per dashboard column; rows are appended column-wise and the
+    # DataFrame is built once at the end rather than grown with df.loc
+    return {col: [] for col in ETA_DASHBOARD_COLS}
+
+
+def _add_arrival_rows(columns, line, station_name, predictions):
+    # Append one row per prediction for the configured (line, station_name)
+    mode_col = columns["modeName"]
+    platform_col = columns["platformName"]
+    expected_col = columns["expectedArrival"]
+    vehicle_col = columns["_vehicleId"]
+    for prediction in predictions:
+        mode = prediction.get("modeName")
+        mode_col.append(prediction["modeName"])
+        if mode == "tube":
+            platform_col.append(prediction.get("platformName", "")[:10])
+        elif mode == "bus":
+            platform_col.append(prediction.get("lineName", ""))
+        else:
+            platform_col.append("")
+        expected_col.append(prediction["expectedArrival"])
+        vehicle_col.append(prediction.get("vehicleId") or "")
+        # if prediction["currentLocation"]:
+        #    currentLocation = prediction["currentLocation"]
+    added = len(predictions)
+    columns["line"].extend([line] * added)
+    # Replace API stationName with the configured human-friendly station name
+    columns["stationName"].extend([station_name] * added)
+    columns["TimeToArrival"].extend([None] * added)
+
+
+def _eta_dashboard_from_columns(columns):
+    # Build the dashboard DataFrame once from the collected columns
+    import pandas as pd
 
-        for line in lines:
-            schedule_raw = await client.get(f"Line/{line}/Arrivals/{station_id}")
-            if schedule_raw.status_code == 200:
-                schedule_neat = json.loads(schedule_raw.text)
-                # Use the human-friendly station_name (the dict key) as the identifier in the results
-                next_transport_dict[(line, station_name)] = schedule_neat
-    for y in next_transport_dict.keys():
-        for z in range(len(next_transport_dict[y])):
-            new_row = {}
-            new_row["modeName"] = next_transport_dict[y][z]["modeName"]
-            # y is the key (line, configured_station_name)
-            new_row["line"] = y[0]
-            # Replace API stationName with the configured human-friendly station name
-            new_row["stationName"] = y[1]
-            mode = next_transport_dict[y][z].get("modeName")
-            if mode == "tube":
-                new_row["platformName"] = next_transport_dict[y][z].get("platformName", "")[:10]
-            elif mode == "bus":
-                new_row["platformName"] = next_transport_dict[y][z].get("lineName", "")
-            new_row["expectedArrival"] = next_transport_dict[y][z]["expectedArrival"]
-            # if next_transport_dict[y][z]["currentLocation"]:
-            #    new_row['currentLocation'] = next_transport_dict[y][z]["currentLocation"]
-            eta_dashboard_df.loc[len(eta_dashboard_df)] = new_row
-
-    # now converting the arrival time into a datetime format
-    current_dateTime = dt.now()
+    eta_dashboard_df = pd.DataFrame(columns, columns=pd.Index(ETA_DASHBOARD_COLS))
+
+    # now converting the arrival time into a datetime format (TfL times are UTC, the
+    # trailing Z), compared against the current UTC time rather than the local clock
+    current_dateTime = pd.Timestamp.now(tz="UTC")
     eta_dashboard_df["expectedArrival"] = pd.to_datetime(
-        eta_dashboard_df["expectedArrival"], format="%Y-%m-%dT%H:%M:%SZ"
+        eta_dashboard_df["expectedArrival"], format="%Y-%m-%dT%H:%M:%SZ", utc=True
     )
     eta_dashboard_df["TimeToArrival"] = eta_dashboard_df["expectedArrival"] - current_dateTime
     eta_dashboard_df.sort_values(
@@ -195,18 +342,81 @@ async def _next_train_or_bus(client, tube_and_bus_stops):
     )
     # eta_dashboard_df["expectedArrival"] = eta_dashboard_df["expectedArrival"].dt.time
     # Convert timedelta to minutes and seconds format
-    eta_dashboard_df["TimeToArrival"] = eta_dashboard_df["TimeToArrival"].apply(format_timedelta)
+    eta_dashboard_df["TimeToArrival"] = format_timedeltas(eta_dashboard_df["TimeToArrival"])
     eta_dashboard_bus = eta_dashboard_df[eta_dashboard_df["modeName"] == "bus"]
     eta_dashboard_tube = eta_dashboard_df[eta_dashboard_df["modeName"] == "tube"]
     eta_dashboard_tube_mini = eta_dashboard_tube[:4]
     eta_dashboard_combo = pd.concat([eta_dashboard_tube_mini, eta_dashboard_bus], axis=0)
-    eta_dashboard_combo.drop(["modeName", "expectedArrival"], inplace=True, axis=1)
-    eta_dashboard_combo.rename(columns={"expectedArrival": "expected"}, inplace=True)
-    return eta_dashboard_combo
+    # keep the absolute arrival time as a hidden column (leading underscore) so rows can be
+    # matched across refreshes; column order follows records.ArrivalRecord
+    eta_dashboard_combo = eta_dashboard_combo.rename(
+        columns={"expectedArrival": "_expectedArrival"}
+    )
+    return eta_dashboard_combo[list(ArrivalRecord.__slots__)]
+
+
+def _eta_records_from_columns(columns):
+    # Pandas-free equivalent of _eta_dashboard_from_columns returning a RecordTable
+    current_dateTime = dt.now(UTC)
+    rows = [
+        (mode, station_name, convert_str_to_datetime(expected), line, platform, vehicle)
+        for mode, line, station_name, platform, expected, vehicle in zip(
+            columns["modeName"],
+            columns["line"],
+            columns["stationName"],
+            columns["platformName"],
+            columns["expectedArrival"],
+            columns["_vehicleId"],
+        )
+    ]
+    # Same ordering as the DataFrame path: modeName descending, then stationName and
+    # expectedArrival ascending (two stable sorts)
+    rows.sort(key=lambda row: (row[1], row[2]))
+    rows.sort(key=lambda row: row[0], reverse=True)
+    tube = [row for row in rows if row[0] == "tube"][:4]
+    bus = [row for row in rows if row[0] == "bus"]
+    return RecordTable.of(
+        ArrivalRecord,
+        [
+            ArrivalRecord(
+                line,
+                station_name,
+                platform,
+                format_timedelta(expected - current_dateTime),
+                vehicle,
+                expected,
+            )
+            for _, station_name, expected, line, platform, vehicle in tube + bus
+        ],
+    )
+
+
+async def _next_train_or_bus(
+    client, tube_and_bus_stops, max_in_flight=8, timeout=10.0, backend="pandas"
+):
+    # Get the list of arrival predictions for given line ids based at the given stop
+    # backend: "pandas" returns a DataFrame, "records" a records.RecordTable
+    # https://api-portal.tfl.gov.uk/api-details#api=Line&operation=Line_ArrivalsWithStopPointByPathIdsPathStopPointIdQueryDirectionQueryDestina
+    columns = _new_eta_columns()
+    requests = _plan_arrival_requests(tube_and_bus_stops)
+
+    # Issue every arrival request at once (bounded by max_in_flight) and add rows as
+    # responses land; failed or timed-out requests are simply missing from the table
+    engine = FetchEngine(client, max_in_flight=max_in_flight, timeout=timeout)
+    async for (station_name, lines), merged in engine.iter_completed(requests):
+        for line, schedule_neat in _split_arrivals_by_line(lines, merged).items():
+            # Use the human-friendly station_name (the dict key) as the identifier in the results
+            _add_arrival_rows(columns, line, station_name, schedule_neat)
+
+    with METRICS.timer("build_seconds", table="arrivals", backend=backend):
+        if backend == "records":
+            return _eta_records_from_columns(columns)
+        return _eta_dashboard_from_columns(columns)
 
 
 def convert_str_to_datetime(str_data):
     # https://docs.python.org/3/library/datetime.html#format-codes
+    # TfL times end in Z (UTC): return them timezone-aware so they compare with dt.now(UTC)
     format = "%Y-%m-%dT%H:%M:%SZ"
-    datetime_str = dt.strptime(str_data, format)
+    datetime_str = dt.strptime(str_data, format).replace(tzinfo=UTC)
     return datetime_str
@@ -0,0 +1,432 @@
+"""Local index of TfL line, stop and bike point ids for name lookups.
+
+Finding the ids for config.yml used to mean calling ``get_all_boris_bike_info``,
+``_get_stops_on_a_line`` and ``_all_valid_routes_*`` by hand, each of which
+downloads the full network metadata again. ``build-index`` fetches it once:
+
+- ``Line/Mode/{modes}``: every line on the configured modes
+- ``Line/{id}/StopPoints``: the stops served by each of those lines
+- ``BikePoint``: every bike point
+
+and writes the fields needed for lookups to a versioned JSON file, keeping
+each response's ETag. A rebuild sends ``If-None-Match`` and reuses the
+stored items of every section that comes back 304, so a refresh downloads
+only what changed. A section that fails to fetch also keeps its old items.
+
+``MetadataIndex.load`` reads the file and builds the lookup tables in
+memory. ``prefix`` and exact lookups are a dict probe or a bisect over the
+sorted names; ``fuzzy`` narrows candidates through a trigram index before
+ranking them with ``difflib``. None of them touch the network.
+
+    python metadata_index.py build-index --modes tube,bus,overground,dlr,elizabeth-line
+    python metadata_index.py lookup "oxford circ" --kind stop
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import difflib
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from json_stream import iter_json_array
+
+logger = logging.getLogger(__name__)
+
+# bump when the stored layout changes; files with another version are rebuilt from scratch
+INDEX_VERSION = 1
+DEFAULT_INDEX_PATH = Path(__file__).parent / "metadata_index.json"
+DEFAULT_MODES = ("tube", "bus", "overground", "dlr", "elizabeth-line")
+KINDS = ("line", "stop", "bikepoint")
+
+# TfL stop names mostly end in one of these; the short form is indexed too
+_NAME_SUFFIXES = re.compile(r"\s+(underground station|rail station|dlr station|tram stop|station)$")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(name: str) -> str:
+    """Lower-case ``name`` and collapse punctuation and whitespace to single spaces."""
+    return _NON_WORD.sub(" ", name.lower()).strip()
+
+
+def _trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class Match(NamedTuple):
+    kind: str
+    id: str
+    name: str
+
+
+def _line_item(item: dict) -> dict:
+    return {"id": item["id"], "name": item.get("name", item["id"]), "mode": item.get("modeName")}
+
+
+def _stop_item(item: dict) -> dict:
+    return {
+        "id": item.get("naptanId") or item["id"],
+        "name": item.get("commonName", ""),
+        "modes": item.get("modes", []),
+        "lat": item.get("lat"),
+        "lon": item.get("lon"),
+    }
+
+
+def _bikepoint_item(item: dict) -> dict:
+    return {
+        "id": item["id"],
+        "name": item.get("commonName", ""),
+        "lat": item.get("lat"),
+        "lon": item.get("lon"),
+    }
+
+
+async def _fetch_section(client, url: str, pick, previous: dict | None) -> tuple[dict | None, str]:
+    """Fetch one endpoint as ``{"etag", "items"}``; returns the section and what happened.
+
+    The result is "fetched", "unchanged" (304, previous items reused) or "failed"
+    (previous items, if any, reused).
+    """
+    import httpx
+
+    headers = {}
+    if previous and previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    try:
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and previous is not None:
+                return previous, "unchanged"
+            if response.status_code != 200:
+                logger.warning("HTTP %s fetching %s", response.status_code, url)
+                return previous, "failed"
+            items = [pick(item) async for item in iter_json_array(response.aiter_bytes())]
+            return {"etag": response.headers.get("etag"), "items": items}, "fetched"
+    except (httpx.HTTPError, ValueError) as exc:
+        logger.warning("Could not fetch %s: %s", url, exc)
+        return previous, "failed"
+
+
+async def build_index(
+    client,
+    modes: Iterable[str] = DEFAULT_MODES,
+    previous: Mapping[str, Any] | None = None,
+    max_in_flight: int = 8,
+) -> tuple[dict, Counter]:
+    """Fetch the metadata behind the index and return ``(index_data, outcome_counts)``.
+
+    ``previous`` is an earlier result of this function (e.g. the loaded file);
+    its ETags make the rebuild incremental.
+    """
+    modes = list(modes)
+    old = previous.get("sections", {}) if previous else {}
+    sections: dict[str, dict] = {}
+    outcomes: Counter = Counter()
+
+    async def fetch(url: str, pick) -> None:
+        section, outcome = await _fetch_section(client, url, pick, old.get(url))
+        outcomes[outcome] += 1
+        if section is not None:
+            sections[url] = section
+
+    lines_url = f"Line/Mode/{','.join(modes)}"
+    await asyncio.gather(fetch(lines_url, _line_item), fetch("BikePoint", _bikepoint_item))
+    line_ids = [line["id"] for line in sections.get(lines_url, {}).get("items", [])]
+
+    semaphore = asyncio.Semaphore(max(1, int(max_in_flight)))
+
+    async def fetch_stops(line_id: str) -> None:
+        async with semaphore:
+            await fetch(f"Line/{line_id}/StopPoints", _stop_item)
+
+    await asyncio.gather(*(fetch_stops(line_id) for line_id in line_ids))
+    data = {"version": INDEX_VERSION, "built_at": time.time(), "modes": modes, "sections": sections}
+    return data, outcomes
+
+
+def read_index_data(path: str | Path = DEFAULT_INDEX_PATH) -> dict | None:
+    """Return the stored index data, or None if missing, unreadable or of another version."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("Could not read metadata index %s: %s", path, exc)
+        return None
+    if data.get("version") != INDEX_VERSION:
+        logger.info("Metadata index %s is version %s, rebuilding", path, data.get("version"))
+        return None
+    return data
+
+
+def write_index_data(data: dict, path: str | Path = DEFAULT_INDEX_PATH) -> None:
+    """Write the index atomically, so a reader never sees a half-written file."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def config_needs_index(
+    tube_and_bus_stops: Mapping[str, Any], bikepoints: Mapping[str, str]
+) -> bool:
+    """Whether any stop lacks an id or any bike point is given by name rather than id."""
+    return any(
+        isinstance(details, dict) and not (details.get("id") or details.get("station_id"))
+        for details in tube_and_bus_stops.values()
+    ) or any(not key.startswith("BikePoints_") for key in bikepoints)
+
+
+def resolve_config_names(
+    tube_and_bus_stops: Mapping[str, Any],
+    bikepoints: Mapping[str, str],
+    index_path: str | Path | None = None,
+) -> tuple[Mapping[str, Any], Mapping[str, str]]:
+    """Resolve config entries given by name, loading the index only if one needs it."""
+    if not config_needs_index(tube_and_bus_stops, bikepoints):
+        return tube_and_bus_stops, bikepoints
+    index = MetadataIndex.load(index_path or DEFAULT_INDEX_PATH)
+    if index is None:
+        logger.warning(
+            "config.yml gives stops or bike points by name but there is no metadata index, "
+            "run `python metadata_index.py build-index`"
+        )
+        return tube_and_bus_stops, bikepoints
+    return index.resolve_config(tube_and_bus_stops, bikepoints)
+
+
+class MetadataIndex:
+    """In-memory lookup tables over stored index data."""
+
+    def __init__(self, data: Mapping[str, Any]) -> None:
+        self.built_at = data.get("built_at")
+        self.lines: dict[str, dict] = {}
+        self.stops: dict[str, dict] = {}
+        self.bikepoints: dict[str, dict] = {}
+
+        for url, section in data.get("sections", {}).items():
+            items = section.get("items", [])
+            if url == "BikePoint":
+                self.bikepoints.update((item["id"], item) for item in items)
+            elif url.startswith("Line/Mode/"):
+                self.lines.update((item["id"], item) for item in items)
+            elif url.endswith("/StopPoints"):
+                line_id = url.split("/")[1]
+                for item in items:
+                    stop = self.stops.setdefault(item["id"], {**item, "lines": []})
+                    stop["lines"].append(line_id)
+
+        # (normalized name, kind, id) for every name and short name, sorted for prefix search
+        entries = set()
+        for kind, table in (
+            ("line", self.lines),
+            ("stop", self.stops),
+            ("bikepoint", self.bikepoints),
+        ):
+            for item_id, item in table.items():
+                key = normalize(item["name"])
+                entries.add((key, kind, item_id))
+                short = _NAME_SUFFIXES.sub("", key)
+                if short != key:
+                    entries.add((short, kind, item_id))
+                if kind == "line":
+                    entries.add((normalize(item_id), kind, item_id))
+        self._entries = sorted(entries)
+        self._keys = [key for key, _, _ in self._entries]
+        self._by_key: dict[str, list[int]] = {}
+        self._by_trigram: dict[str, list[int]] = {}
+        for i, key in enumerate(self._keys):
+            self._by_key.setdefault(key, []).append(i)
+            for gram in _trigrams(key):
+                self._by_trigram.setdefault(gram, []).append(i)
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_INDEX_PATH) -> MetadataIndex | None:
+        """Load the index file, or return None if there is no usable one."""
+        data = read_index_data(path)
+        return None if data is None else cls(data)
+
+    def __len__(self) -> int:
+        return len(self.lines) + len(self.stops) + len(self.bikepoints)
+
+    def _match(self, i: int) -> Match:
+        _, kind, item_id = self._entries[i]
+        table = {"line": self.lines, "stop": self.stops, "bikepoint": self.bikepoints}[kind]
+        return Match(kind, item_id, table[item_id]["name"])
+
+    def _unique(self, indices: Iterable[int], kind: str | None, limit: int) -> list[Match]:
+        matches, seen = [], set()
+        for i in indices:
+            _, entry_kind, item_id = self._entries[i]
+            if (kind is None or entry_kind == kind) and (entry_kind, item_id) not in seen:
+                seen.add((entry_kind, item_id))
+                matches.append(self._match(i))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def exact(self, name: str, kind: str | None = None) -> list[Match]:
+        """Items whose (short) name or line id is ``name``, ignoring case and punctuation."""
+        return self._unique(self._by_key.get(normalize(name), ()), kind, limit=len(self._keys))
+
+    def prefix(self, text: str, kind: str | None = None, limit: int = 10) -> list[Match]:
+        """Items whose normalized name starts with ``text``, in name order."""
+        key = normalize(text)
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_left(self._keys, key + "\uffff", lo=start)
+        return self._unique(range(start, end), kind, limit)
+
+    def fuzzy(
+        self, text: str, kind: str | None = None, limit: int = 10, cutoff: float = 0.6
+    ) -> list[Match]:
+        """Closest names to ``text`` (typos, word order aside), best first."""
+        key = normalize(text)
+        # the entries sharing the most trigrams with the query are the only ones worth ranking
+        shared = Counter()
+        for gram in _trigrams(key):
+            shared.update(self._by_trigram.get(gram, ()))
+        candidates = [i for i, _ in shared.most_common(limit * 5)]
+        if kind is not None:
+            candidates = [i for i in candidates if self._entries[i][1] == kind]
+        matcher = difflib.SequenceMatcher(b=key)
+        scored = []
+        for i in candidates:
+            matcher.set_seq1(self._keys[i])
+            if matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff:
+                score = matcher.ratio()
+                if score >= cutoff:
+                    scored.append((score, i))
+        scored.sort(key=lambda pair: (-pair[0], self._keys[pair[1]]))
+        return self._unique((i for _, i in scored), kind, limit)
+
+    def lookup(self, text: str, kind: str | None = None, limit: int = 10) -> list[Match]:
+        """Exact matches, then prefix matches, then fuzzy ones, without duplicates."""
+        matches = (
+            self.exact(text, kind) + self.prefix(text, kind, limit) + self.fuzzy(text, kind, limit)
+        )
+        return list(dict.fromkeys(matches))[:limit]
+
+    def resolve(self, name: str, kind: str, lines: Iterable[str] = ()) -> str | None:
+        """The id of the single best match for ``name``, or None.
+
+        For stops, ``lines`` (ids) narrows the candidates to stops served by all of them.
+        """
+        lines = set(lines)
+
+        def serves(match: Match) -> bool:
+            return kind != "stop" or lines <= set(self.stops[match.id]["lines"])
+
+        for candidates in (
+            self.exact(name, kind),
+            self.prefix(name, kind, limit=50),
+            self.fuzzy(name, kind, limit=50),
+        ):
+            candidates = [match for match in candidates if serves(match)]
+            if candidates:
+                return candidates[0].id
+        return None
+
+    def resolve_config(
+        self, tube_and_bus_stops: Mapping[str, Any], bikepoints: Mapping[str, str]
+    ) -> tuple[dict, dict]:
+        """Fill in ids for config entries given by name.
+
+        A ``tube_and_bus_stops`` entry without an ``id`` is looked up by its ``name``
+        (or its label) among the stops on its lines; line names become line ids.
+        ``bikepoints`` keys that are not bike point ids are looked up by name.
+        Entries that can't be resolved are kept as they are and logged.
+        """
+        stops = {}
+        for label, details in tube_and_bus_stops.items():
+            if isinstance(details, dict):
+                details = dict(details)
+                lines = details.get("lines", []) or []
+                if isinstance(lines, str):
+                    lines = [lines]
+                details["lines"] = [
+                    line if line in self.lines else (self.resolve(line, "line") or line)
+                    for line in lines
+                ]
+                if not (details.get("id") or details.get("station_id")):
+                    stop_id = self.resolve(details.get("name", label), "stop", details["lines"])
+                    if stop_id is None:
+                        logger.warning("No stop in the metadata index matches %r", label)
+                    else:
+                        details["id"] = stop_id
+            stops[label] = details
+
+        bikes = {}
+        for key, label in bikepoints.items():
+            if key not in self.bikepoints and not key.startswith("BikePoints_"):
+                resolved = self.resolve(key, "bikepoint")
+                if resolved is None:
+                    logger.warning("No bike point in the metadata index matches %r", key)
+                else:
+                    key = resolved
+            bikes[key] = label
+        return stops, bikes
+
+
+async def _build(args) -> None:
+    from clients import ClientRegistry
+
+    previous = None if args.full else read_index_data(args.path)
+    modes = args.modes.split(",") if args.modes else (previous or {}).get("modes", DEFAULT_MODES)
+    async with ClientRegistry(cache=False, single_flight=False) as clients:
+        data, outcomes = await build_index(clients.tfl, modes, previous, args.max_in_flight)
+    write_index_data(data, args.path)
+    index = MetadataIndex(data)
+    print(
+        f"{args.path}: {len(index.lines)} lines, {len(index.stops)} stops, "
+        f"{len(index.bikepoints)} bike points "
+        f"({outcomes['fetched']} fetched, {outcomes['unchanged']} unchanged, "
+        f"{outcomes['failed']} failed)"
+    )
+
+
+def _lookup(args) -> None:
+    index = MetadataIndex.load(args.path)
+    if index is None:
+        raise SystemExit(f"no metadata index at {args.path}, run `build-index` first")
+    start = time.perf_counter()
+    matches = index.lookup(args.name, args.kind, args.limit)
+    elapsed = time.perf_counter() - start
+    for match in matches:
+        extra = ""
+        if match.kind == "stop":
+            extra = "  lines: " + ",".join(index.stops[match.id]["lines"])
+        print(f"{match.kind:<9} {match.id:<16} {match.name}{extra}")
+    print(f"({len(matches)} matches in {elapsed * 1e6:.0f} µs)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Build and query the local TfL metadata index")
+    parser.add_argument("--path", type=Path, default=DEFAULT_INDEX_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build-index", help="fetch metadata and (re)write the index")
+    build.add_argument("--modes", help=f"comma-separated modes (default {','.join(DEFAULT_MODES)})")
+    build.add_argument("--full", action="store_true", help="ignore stored ETags")
+    build.add_argument("--max-in-flight", type=int, default=8)
+    lookup = commands.add_parser("lookup", help="find ids by name")
+    lookup.add_argument("name")
+    lookup.add_argument("--kind", choices=KINDS)
+    lookup.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    if args.command == "build-index":
+        asyncio.run(_build(args))
+    else:
+        _lookup(args)
@@ -0,0 +1,391 @@
+"""Where a refresh cycle spends its time: latency histograms and error counters.
+
+Everything records into the shared ``METRICS`` registry:
+
+- ``http_request_seconds{endpoint}``: each request that goes to the network,
+  timed around the raw httpx call by ``MetricsClient`` (the innermost client
+  layer, so retries count as requests of their own and cache hits don't
+  count at all); for streamed responses, the time to the response headers
+- ``http_response_bytes{endpoint}``: the size of each response body on the wire
+- ``http_errors_total{endpoint, error}``: failed requests, by exception class
+  or ``HTTP <status>`` for statuses of 400 and above
+- ``parse_seconds{endpoint}``: decoding a JSON response (``decode_json``); a
+  response shared by the HTTP cache is only decoded the first time
+- ``build_seconds{table, backend}``: building the DataFrame or RecordTable
+- ``render_seconds{table}``: updating a DataTable in the TUI (Textual paints
+  it afterwards)
+- ``refresh_seconds{source}`` and ``refresh_errors_total{source}``: a whole
+  fetch of one source, in the app or the aggregator
+- ``http_cache_*_total{host}``, ``http_resilience_*_total{host}`` and
+  ``http_single_flight_*_total{host}``: the counters the client layers keep
+  in their ``stats`` (cache hits, misses, revalidations and bytes saved;
+  requests, retries, failures and short circuits; calls and how many were
+  collapsed into another in-flight call), read from the live clients by a
+  collector that ``clients.ClientRegistry`` registers with ``add_collector``
+
+Endpoints are named as in resilience.py, e.g. ``Line/Arrivals``. The TUI
+shows a summary on ``m``; ``to_prometheus`` and ``as_dict`` export the
+lot, served on ``/metrics`` and ``/metrics.json`` by web_server.py and
+written to ``metrics_path`` on exit. Compare two such files with
+``python metrics.py compare before.json after.json``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import math
+import os
+import time
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from client_layers import ClientLayer
+
+PREFIX = "tfl_"
+
+# Upper bounds of the histogram buckets: seconds for timings, bytes for sizes
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(256 * 4**i for i in range(10))  # 256 B .. 64 MB
+
+# Columns of summary_rows, as shown in the TUI panel
+SUMMARY_COLUMNS = ["metric", "labels", "count", "p50", "p95", "max", "total"]
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, Any]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Histogram:
+    """Counts of observed values per bucket, plus their sum and maximum."""
+
+    __slots__ = ("buckets", "count", "counts", "max", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        # one count per bucket plus the overflow (+Inf) bucket; not cumulative
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate the ``q`` quantile by interpolating inside its bucket."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def cumulative(self) -> Iterator[tuple[str, int]]:
+        """``(le, count)`` for every bucket, cumulative, ending with ``+Inf``."""
+        total = 0
+        for bound, count in zip((*self.buckets, math.inf), self.counts):
+            total += count
+            yield ("+Inf" if bound == math.inf else f"{bound:g}"), total
+
+
+class _Timer:
+    __slots__ = ("labels", "metrics", "name", "started")
+
+    def __init__(self, metrics: Metrics, name: str, labels: dict[str, Any]) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+
+
+class Metrics:
+    """A registry of named histograms and counters, each series keyed by its labels."""
+
+    def __init__(self) -> None:
+        self.histograms: dict[str, dict[Labels, Histogram]] = {}
+        self.counters: dict[str, dict[Labels, float]] = {}
+        self.started = time.time()
+        self._collectors: list[Callable[[], Iterable[tuple[str, dict[str, Any], float]]]] = []
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Add ``value`` to histogram ``name`` (``*_bytes`` names count sizes, others seconds)."""
+        series = self.histograms.setdefault(name, {})
+        key = _labels(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            buckets = SIZE_BUCKETS if name.endswith("_bytes") else LATENCY_BUCKETS
+            histogram = series[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        series = self.counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0) + amount
+
+    def add_collector(
+        self, collect: Callable[[], Iterable[tuple[str, dict[str, Any], float]]]
+    ) -> None:
+        """Export counters kept elsewhere: ``collect()`` yields ``(name, labels, value)``
+        with the current totals each time the metrics are read."""
+        self._collectors.append(collect)
+
+    def remove_collector(self, collect: Callable) -> None:
+        if collect in self._collectors:
+            self._collectors.remove(collect)
+
+    def counter_series(self) -> dict[str, dict[Labels, float]]:
+        """The counters recorded with ``inc`` plus those read from the collectors."""
+        counters = {name: dict(series) for name, series in self.counters.items()}
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                series = counters.setdefault(name, {})
+                key = _labels(labels)
+                series[key] = series.get(key, 0) + value
+        return counters
+
+    def timer(self, name: str, **labels: Any) -> _Timer:
+        """Context manager adding the seconds spent in its block to histogram ``name``."""
+        return _Timer(self, name, labels)
+
+    def reset(self) -> None:
+        self.histograms.clear()
+        self.counters.clear()
+        self.started = time.time()
+
+    def to_prometheus(self) -> str:
+        """Every series in the Prometheus text exposition format."""
+        lines = []
+        for name, series in sorted(self.histograms.items()):
+            full = PREFIX + name
+            lines.append(f"# TYPE {full} histogram")
+            for labels, histogram in sorted(series.items()):
+                for le, count in histogram.cumulative():
+                    lines.append(f"{full}_bucket{_format_labels(labels + (('le', le),))} {count}")
+                lines.append(f"{full}_sum{_format_labels(labels)} {histogram.sum:.6g}")
+                lines.append(f"{full}_count{_format_labels(labels)} {histogram.count}")
+        for name, series in sorted(self.counter_series().items()):
+            full = PREFIX + name
+            lines.append(f"# TYPE {full} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{full}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def as_dict(self) -> dict[str, Any]:
+        """Every series as plain JSON-ready data, with p50/p95/p99 estimates."""
+        histograms = []
+        for name, series in sorted(self.histograms.items()):
+            for labels, histogram in sorted(series.items()):
+                histograms.append(
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "max": histogram.max,
+                        **{f"p{q}": histogram.quantile(q / 100) for q in (50, 95, 99)},
+                        "buckets": dict(histogram.cumulative()),
+                    }
+                )
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for name, series in sorted(self.counter_series().items())
+            for labels, value in sorted(series.items())
+        ]
+        return {
+            "started": self.started,
+            "written": time.time(),
+            "histograms": histograms,
+            "counters": counters,
+        }
+
+    def write_json(self, path: str | Path) -> None:
+        """Write ``as_dict`` to ``path`` (atomically, via a temporary file)."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.as_dict(), indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def summary_rows(self) -> list[tuple[str, list[str]]]:
+        """``(key, cells)`` per series for a table with ``SUMMARY_COLUMNS``."""
+        rows = []
+        for name, series in sorted(self.histograms.items()):
+            fmt = _format_bytes if name.endswith("_bytes") else _format_seconds
+            for labels, h in sorted(series.items()):
+                label_text = _label_text(labels)
+                cells = [fmt(h.quantile(0.5)), fmt(h.quantile(0.95)), fmt(h.max), fmt(h.sum)]
+                rows.append((f"{name}|{label_text}", [name, label_text, str(h.count), *cells]))
+        for name, series in sorted(self.counter_series().items()):
+            for labels, value in sorted(series.items()):
+                label_text = _label_text(labels)
+                rows.append(
+                    (f"{name}|{label_text}", [name, label_text, f"{value:g}", "", "", "", ""])
+                )
+        return rows
+
+
+def _label_text(labels) -> str:
+    return " ".join(f"{name}={value}" for name, value in labels)
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def _format_seconds(seconds: float) -> str:
+    if math.isnan(seconds):
+        return "-"
+    return f"{seconds * 1000:.1f} ms" if seconds < 10 else f"{seconds:.1f} s"
+
+
+def _format_bytes(size: float) -> str:
+    if math.isnan(size):
+        return "-"
+    if size < 1024:
+        return f"{size:.0f} B"
+    if size < 1024**2:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / 1024**2:.1f} MB"
+
+
+METRICS = Metrics()
+
+
+def _endpoint(url: Any) -> str:
+    # resilience.py imports httpx, which is loaded by the time a response exists
+    from resilience import endpoint_name
+
+    return endpoint_name(url)
+
+
+def decode_json(response: Any) -> Any:
+    """``response.json()``, timed as ``parse_seconds`` for the response's endpoint."""
+    started = time.perf_counter()
+    payload = response.json()
+    METRICS.observe(
+        "parse_seconds", time.perf_counter() - started, endpoint=_endpoint(response.url)
+    )
+    return payload
+
+
+class _MeasuredStream:
+    """``client.stream(...)`` with the time to headers, body size and errors recorded."""
+
+    def __init__(self, stream: Any, endpoint: str) -> None:
+        self._stream = stream
+        self.endpoint = endpoint
+        self._response = None
+
+    async def __aenter__(self) -> Any:
+        started = time.perf_counter()
+        try:
+            self._response = await self._stream.__aenter__()
+        except BaseException as exc:
+            _count_error(self.endpoint, exc)
+            raise
+        METRICS.observe(
+            "http_request_seconds", time.perf_counter() - started, endpoint=self.endpoint
+        )
+        if self._response.status_code >= 400:
+            METRICS.inc(
+                "http_errors_total",
+                endpoint=self.endpoint,
+                error=f"HTTP {self._response.status_code}",
+            )
+        return self._response
+
+    async def __aexit__(self, *exc_info) -> Any:
+        METRICS.observe(
+            "http_response_bytes", self._response.num_bytes_downloaded, endpoint=self.endpoint
+        )
+        return await self._stream.__aexit__(*exc_info)
+
+
+def _count_error(endpoint: str, exc: BaseException) -> None:
+    # CancelledError: the request was abandoned, e.g. by a timeout in a layer above
+    error = "Cancelled" if isinstance(exc, asyncio.CancelledError) else type(exc).__name__
+    METRICS.inc("http_errors_total", endpoint=endpoint, error=error)
+
+
+class MetricsClient(ClientLayer):
+    """Wrap an ``httpx.AsyncClient`` so every GET and stream records into ``METRICS``.
+
+    Anything else is passed straight to the wrapped client.
+    """
+
+    async def get(self, url: str, **kwargs: Any) -> Any:
+        endpoint = _endpoint(url)
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(url, **kwargs)
+        except BaseException as exc:
+            _count_error(endpoint, exc)
+            raise
+        METRICS.observe("http_request_seconds", time.perf_counter() - started, endpoint=endpoint)
+        METRICS.observe("http_response_bytes", len(response.content), endpoint=endpoint)
+        if response.status_code >= 400:
+            METRICS.inc(
+                "http_errors_total", endpoint=endpoint, error=f"HTTP {response.status_code}"
+            )
+        return response
+
+    def stream(self, method: str, url: str, **kwargs: Any) -> _MeasuredStream:
+        return _MeasuredStream(self.client.stream(method, url, **kwargs), _endpoint(url))
+
+
+def _compare(paths: list[str]) -> None:
+    """Print p50/p95 and counts per series, side by side for each metrics JSON file."""
+    runs = [json.loads(Path(path).read_text(encoding="utf-8")) for path in paths]
+    keys: dict[tuple[str, str], None] = {}
+    values = []
+    for run in runs:
+        found = {}
+        for h in run["histograms"]:
+            key = (h["name"], _label_text(h["labels"].items()))
+            fmt = _format_bytes if h["name"].endswith("_bytes") else _format_seconds
+            found[key] = f"{h['count']:>6} {fmt(h['p50']):>10} {fmt(h['p95']):>10}"
+            keys[key] = None
+        for c in run["counters"]:
+            key = (c["name"], _label_text(c["labels"].items()))
+            found[key] = f"{c['value']:>6g} {'':>10} {'':>10}"
+            keys[key] = None
+        values.append(found)
+    width = max((len(f"{name} {labels}") for name, labels in keys), default=10)
+    print(" " * width + "".join(f" | {Path(p).name[:28]:<28}" for p in paths))
+    print(" " * width + " | count        p50        p95" * len(paths))
+    for key in keys:
+        row = "".join(f" | {found.get(key, ''):<28}" for found in values)
+        print(f"{key[0]} {key[1]}".ljust(width) + row)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare metrics files written via metrics_path")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compare = sub.add_parser("compare", help="p50/p95 per series, one column per file")
+    compare.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+    _compare(args.paths)
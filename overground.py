@@ -6,18 +6,27 @@ breaks the work into smaller, testable steps.
 
 The public behavior is preserved: a DataFrame is returned with the same
 columns and sorting logic. Network and parsing errors are logged and
-problematic items are skipped.
+problematic items are skipped. Pass ``backend="records"`` to get a
+``records.RecordTable`` with the same columns without importing pandas.
 """
 
 from __future__ import annotations
 
 import asyncio
-import httpx
-import pandas as pd
 import json
 import re
 import logging
-from typing import Any
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+from line import format_timedeltas
+from metrics import METRICS, decode_json
+from rate_limit import TokenBucket
+from records import OvergroundRecord, RecordTable
+
+if TYPE_CHECKING:
+    import httpx
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +35,22 @@ class Overground:
     """Fetch and parse overground departures from a route-search API.
 
     The class isolates HTTP I/O, payload extraction and item parsing so each
-    step is small and testable.
+    step is small and testable. Every provider call first takes a token from
+    ``limiter`` (pass the host's shared bucket from ``rate_limit.HostRateLimits``
+    to keep its budget across refreshes; by default each instance gets its own).
     """
 
-    def __init__(self, client: httpx.AsyncClient, api_url: str, auth: tuple | None = None) -> None:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_url: str,
+        auth: tuple | None = None,
+        limiter: TokenBucket | None = None,
+    ) -> None:
         self.client = client
         self.api_url = api_url.rstrip("/")
         self.auth = auth
+        self.limiter = limiter or TokenBucket()
 
     async def fetch_services(self, frm: str, to: str) -> list[dict]:
         """Call the provider endpoint and return the list-like 'services'.
@@ -40,7 +58,10 @@ class Overground:
         Network errors and invalid JSON cause an empty list to be returned; the
         caller will treat an empty list as "no services".
         """
+        import httpx
+
         url = f"{self.api_url}/json/search/{frm}/to/{to}"
+        await self.limiter.acquire()
         try:
             if self.auth and isinstance(self.auth, (list, tuple)) and len(self.auth) == 2:
                 auth_obj = httpx.BasicAuth(self.auth[0], self.auth[1])
@@ -55,7 +76,7 @@ class Overground:
             return []
 
         try:
-            payload = json.loads(resp.text)
+            payload = decode_json(resp)
         except json.JSONDecodeError:
             logger.warning("Invalid JSON from %s", url)
             return []
@@ -140,25 +161,21 @@ class Overground:
             "_expected_iso": expected_iso,
         }
 
-    async def get_live_trains(self, routes: list[dict]) -> pd.DataFrame:
-        """Main orchestration: iterate routes, collect rows and return a DataFrame."""
-        cols: list[str] = [
-            "route",
-            "stationFrom",
-            "stationTo",
-            "destination",
-            "platform",
-            "expectedTime",
-            "expectedDate",
-            "TimeToArrival",
-            "Line",
-        ]
+    async def get_live_trains(
+        self, routes: list[dict], backend: str = "pandas"
+    ) -> pd.DataFrame | RecordTable:
+        """Main orchestration: fetch every route/direction, collect rows and return a table.
 
+        All directions are requested concurrently; ``limiter`` paces them to the
+        provider's budget. ``backend`` selects a DataFrame ("pandas") or a
+        RecordTable ("records").
+        """
         rows: list[dict] = []
 
         if not routes or not self.api_url:
-            return pd.DataFrame(columns=pd.Index(cols))
+            return self._build_table(rows, backend)
 
+        requests: list[tuple[str, str, str]] = []
         for route in routes:
             if not isinstance(route, dict):
                 continue
@@ -169,32 +186,70 @@ class Overground:
                 pairs.append((route.get("to"), route.get("from")))
 
             for frm, to in pairs:
-                if not frm or not to:
-                    continue
+                if frm and to:
+                    requests.append((name, frm, to))
+
+        # gather keeps results in request order, so rows come out as they did serially
+        results = await asyncio.gather(*(self.fetch_services(frm, to) for _, frm, to in requests))
+        for (name, frm, to), services in zip(requests, results):
+            for item in services:
+                parsed = self._parse_item(item, name, frm, to)
+                if parsed:
+                    rows.append(parsed)
+
+        return self._build_table(rows, backend)
+
+    def _build_table(self, rows: list[dict], backend: str) -> pd.DataFrame | RecordTable:
+        with METRICS.timer("build_seconds", table="overground", backend=backend):
+            if backend == "records":
+                return self._to_records(rows)
+            return self._to_dataframe(rows)
+
+    def _to_records(self, rows: list[dict]) -> RecordTable:
+        """Pandas-free equivalent of ``_to_dataframe``."""
+        timed = []
+        for row in rows:
+            date = row.get("expectedDate") or ""
+            time = row.get("expectedTime") or ""
+            if not (date and time):
+                continue
+            try:
+                expected = datetime.strptime(f"{date}T{time}", "%Y-%m-%dT%H:%M")
+            except ValueError:
+                continue
+            timed.append((expected.replace(tzinfo=UTC), row))
 
-                services = await self.fetch_services(frm, to)
-                for item in services:
-                    parsed = self._parse_item(item, name, frm, to)
-                    if parsed:
-                        rows.append(parsed)
+        # Sort by expected time, then take up to 3 per direction (from->to)
+        timed.sort(key=lambda pair: pair[0])
+        per_direction: dict[tuple, int] = {}
+        now = datetime.now(UTC)
+        records = []
+        for expected, row in timed:
+            direction = (row["stationFrom"], row["stationTo"])
+            if per_direction.get(direction, 0) >= 3:
+                continue
+            per_direction[direction] = per_direction.get(direction, 0) + 1
+            secs = max(int((expected - now).total_seconds()), 0)
+            row["TimeToArrival"] = f"{secs // 60} m {secs % 60} s"
+            row["_expectedArrival"] = expected
+            records.append(OvergroundRecord(*(row[col] for col in OvergroundRecord.__slots__)))
+        return RecordTable.of(OvergroundRecord, records)
 
-                # polite pause
-                await asyncio.sleep(0.05)
+    def _to_dataframe(self, rows: list[dict]) -> pd.DataFrame:
+        import pandas as pd
 
+        cols = list(OvergroundRecord.__slots__)
         if not rows:
             return pd.DataFrame(columns=pd.Index(cols))
 
         df = pd.DataFrame(rows, columns=pd.Index(cols + ["_expected_iso"]))
 
         # Ensure internal ISO timestamp column exists by combining expectedDate and expectedTime
-        def _make_iso(r):
-            date = r.get("expectedDate") or ""
-            time = r.get("expectedTime") or ""
-            if date and time:
-                return f"{date}T{time}:00Z"
-            return pd.NA
-
-        df["_expected_iso"] = df.apply(_make_iso, axis=1)
+        # as whole columns; rows missing either part get NA
+        date = df["expectedDate"].fillna("").astype(str)
+        time = df["expectedTime"].fillna("").astype(str)
+        iso = date + "T" + time + ":00Z"
+        df["_expected_iso"] = iso.where((date != "") & (time != ""), pd.NA)
 
         # Parse internal ISO timestamps to datetimes (UTC) and drop rows without a parsable time
         df["expected_dt"] = pd.to_datetime(df["_expected_iso"], utc=True, errors="coerce")
@@ -208,34 +263,29 @@ class Overground:
 
         # Recompute TimeToArrival relative to now
         now = pd.Timestamp.utcnow()
-
-        def fmt_td(td):
-            try:
-                secs = int(td.total_seconds())
-                if secs < 0:
-                    secs = 0
-                mins = secs // 60
-                s = secs % 60
-                return f"{mins} m {s} s"
-            except Exception:
-                return ""
-
-        df_limited["TimeToArrival"] = (df_limited["expected_dt"] - now).apply(fmt_td)
+        df_limited["TimeToArrival"] = format_timedeltas(df_limited["expected_dt"] - now)
 
         # Final ordering by time
         df_limited = df_limited.sort_values("expected_dt")
-        # drop internal helper columns before returning
+        # keep the parsed time as the hidden _expectedArrival column so the app can tick
+        # countdowns locally, and drop the other internal helper columns before returning
+        df_limited["_expectedArrival"] = df_limited["expected_dt"]
         df_limited = df_limited.drop(columns=["expected_dt", "_expected_iso"])
         df_limited.reset_index(drop=True, inplace=True)
-        return df_limited
+        return df_limited[cols]
 
 
 async def get_live_overground_trains(
-    client: httpx.AsyncClient, routes: list, api_url: str, auth: tuple | None = None
-) -> pd.DataFrame:
+    client: httpx.AsyncClient,
+    routes: list,
+    api_url: str,
+    auth: tuple | None = None,
+    backend: str = "pandas",
+    limiter: TokenBucket | None = None,
+) -> pd.DataFrame | RecordTable:
     """Compatibility wrapper matching the previous module function signature.
 
     Creates an Overground and delegates the work to it.
     """
-    fetcher = Overground(client, api_url, auth)
-    return await fetcher.get_live_trains(routes)
+    fetcher = Overground(client, api_url, auth, limiter)
+    return await fetcher.get_live_trains(routes, backend)
@@ -0,0 +1,268 @@
+"""Config, HTTP clients and per-source polling shared by the app and the aggregator.
+
+``SourcePoller`` is mixed into ``display_code.TfLDisplayApp`` and
+``aggregator.Aggregator``, so both read config.yml and poll TfL the same way:
+
+- ``configure`` applies the shared config.yml keys: stops and bike points
+  (resolved by name), overground routes and credentials, the ``http_*``
+  client settings, the refresh cadence, snapshots, history and
+  ``metrics_path``
+- ``open_clients`` / ``close_sources`` create and close the pooled HTTP
+  clients (and flush history and timings on the way out)
+- ``_poll_sources`` polls every source (tube status, arrivals, bike points,
+  overground) in its own task, on its own ``AdaptiveSchedule``
+
+What happens to each result is up to the subclass, which must implement
+``_show_fresh`` (gets every table with rows) and ``_show_stale`` (called
+when a fetch failed or came back empty; the last good table stays up,
+flagged as stale); a subclass missing either is rejected when it is
+defined. ``_fetched`` sees every outcome first, for bookkeeping.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from abc import abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from bikepoint import get_specific_boris_bike_info
+from clients import ClientRegistry, client_stats
+from line import _get_tube_status_update, _next_train_or_bus
+from metrics import METRICS
+from overground import get_live_overground_trains
+from rate_limit import HostRateLimits
+from scheduler import AdaptiveSchedule
+from snapshots import SnapshotStore
+
+if TYPE_CHECKING:
+    from history import HistoryRecorder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = Path(__file__).parent / "snapshots.sqlite"
+
+
+class SourcePoller:
+    """Settings, HTTP clients and the polling loop for every data source."""
+
+    # Default refresh interval (seconds) for sources without their own entry in
+    # refresh_intervals
+    refresh_interval_seconds: float = 10
+    # Arrival requests allowed on the wire at once, and per-request timeout (seconds)
+    arrivals_max_in_flight: int = 8
+    arrivals_timeout_seconds: float = 10.0
+    # "auto", "per_id" or "bulk" - see bikepoint.get_specific_boris_bike_info
+    bikepoint_mode: str = "auto"
+    bikepoint_bulk_threshold: int = 10
+    # "pandas" (DataFrames) or "records" (pandas-free RecordTables) - see records.py
+    data_backend: str = "pandas"
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # Not an ABC, as Textual's App has a metaclass of its own, so the abstract hooks are
+        # checked here instead
+        missing = [
+            name
+            for name, attr in vars(SourcePoller).items()
+            if getattr(attr, "__isabstractmethod__", False) and getattr(cls, name) is attr
+        ]
+        if missing:
+            raise TypeError(f"{cls.__name__} must implement {', '.join(missing)}")
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        # HTTP clients come from a ClientRegistry made by open_clients; client_config holds
+        # the http_* settings from config.yml
+        self.client_config: dict = {}
+        self.clients: ClientRegistry | None = None
+        self.client = None
+        self.overground_client = None
+        self.tube_and_bus_stops: dict = {}
+        self.bikepoints: dict = {}
+        self.overground_stations: dict = {}
+        self.overground_api_url: str = ""
+        self.overground_routes: list = []
+        self.overground_auth: tuple | None = None
+        # Token buckets per upstream host, kept for the poller's lifetime so each host's
+        # request budget carries over between refreshes
+        self.rate_limits = HostRateLimits()
+        # Per-source polling cadence from config.yml - see scheduler.AdaptiveSchedule
+        self.refresh_intervals: dict = {}
+        self._next_refresh: dict[str, float] = {}
+        # Last-good snapshots on disk (None disables them)
+        self.snapshots: SnapshotStore | None = None
+        # Opt-in history of every fresh bikes/arrivals table (see history.py)
+        self.history: HistoryRecorder | None = None
+        # Where to write the timings in metrics.METRICS as JSON when stopped (None: don't)
+        self.metrics_path: str | None = None
+
+    def configure(self, cfg: dict) -> None:
+        """Apply the config.yml keys shared by the app and the aggregator."""
+        from history import HistoryRecorder
+        from metadata_index import resolve_config_names
+
+        # Stops and bike points may be given by name; they are resolved to ids from the local
+        # index written by `python metadata_index.py build-index`, with no API calls
+        self.tube_and_bus_stops, self.bikepoints = resolve_config_names(
+            cfg.get("tube_and_bus_stops", {}) or {},
+            cfg.get("bikepoints", {}) or {},
+            cfg.get("metadata_index_path"),
+        )
+        self.overground_stations = cfg.get("overground_stations", {}) or {}
+        self.overground_api_url = cfg.get("overground_api_url", "")
+        self.overground_routes = cfg.get("overground_routes", []) or []
+        username = cfg.get("overground_api_username", "")
+        password = cfg.get("overground_api_password", "")
+        self.overground_auth = (username, password) if username and password else None
+        self.rate_limits = HostRateLimits.from_config(cfg.get("overground_rate_limit"))
+        # Connection pool tuning (http_client), the in-memory HTTP cache (http_cache),
+        # retries/timeouts/circuit breaking (http_resilience), request collapsing
+        # (http_single_flight) and request timings (http_metrics)
+        self.client_config = {
+            "http_client": cfg.get("http_client") or {},
+            "http_cache": cfg.get("http_cache", True),
+            "http_resilience": cfg.get("http_resilience", True),
+            "http_single_flight": cfg.get("http_single_flight", True),
+            "http_metrics": cfg.get("http_metrics", True),
+        }
+        self.refresh_interval_seconds = cfg.get("refresh_interval_seconds", 10)
+        self.refresh_intervals = cfg.get("refresh_intervals", {}) or {}
+        self.arrivals_max_in_flight = cfg.get("arrivals_max_in_flight", 8)
+        self.arrivals_timeout_seconds = cfg.get("arrivals_timeout_seconds", 10.0)
+        self.bikepoint_mode = cfg.get("bikepoint_mode", "auto")
+        self.bikepoint_bulk_threshold = cfg.get("bikepoint_bulk_threshold", 10)
+        # Save request/parse/build/render timings as JSON when stopped, to compare deployments
+        self.metrics_path = cfg.get("metrics_path")
+        self.history = HistoryRecorder.from_config(cfg)
+        if cfg.get("snapshots", True):
+            self.snapshots = SnapshotStore(cfg.get("snapshot_path") or DEFAULT_SNAPSHOT_PATH)
+
+    def open_clients(self) -> None:
+        """Create the pooled HTTP clients (one per host); clients already set are kept."""
+        self.clients = ClientRegistry.from_config(self.client_config)
+        if self.client is None:
+            self.client = self.clients.tfl
+        if self.overground_client is None and self.overground_api_url:
+            self.overground_client = self.clients.for_url(self.overground_api_url)
+
+    async def close_sources(self) -> None:
+        """Log the HTTP client counters (collapsed calls, cache hits, retries), flush the
+        history, save the timings to metrics_path, then close the clients."""
+        for layer, stats in client_stats(self.client).items():
+            logger.info("%s: %s", layer, stats)
+        if self.history is not None:
+            await self.history.flush()
+        if self.metrics_path:
+            try:
+                METRICS.write_json(self.metrics_path)
+            except OSError as e:
+                logger.warning("Could not write metrics to %s: %s", self.metrics_path, e)
+        if self.clients is not None:
+            await self.clients.aclose()
+
+    def _sources(self) -> dict:
+        """Data sources polled by their own task, keyed by their name in `refresh_intervals`."""
+        return {
+            "tube_status": self._fetch_tube_status,
+            "arrivals": self._fetch_bus_data,
+            "bikes": self._fetch_bike_data,
+            "overground": self._fetch_overground_data,
+        }
+
+    # Fetchers for _poll_source: each returns the source's table and lets errors propagate
+
+    async def _fetch_tube_status(self):
+        """Fetch tube line status."""
+        return await _get_tube_status_update(self.client, backend=self.data_backend)
+
+    async def _fetch_bus_data(self):
+        """Fetch next tube/bus arrivals."""
+        return await _next_train_or_bus(
+            self.client,
+            self.tube_and_bus_stops,
+            max_in_flight=self.arrivals_max_in_flight,
+            timeout=self.arrivals_timeout_seconds,
+            backend=self.data_backend,
+        )
+
+    async def _fetch_bike_data(self):
+        """Fetch bike point availability."""
+        return await get_specific_boris_bike_info(
+            self.client,
+            self.bikepoints,
+            mode=self.bikepoint_mode,
+            bulk_threshold=self.bikepoint_bulk_threshold,
+            backend=self.data_backend,
+        )
+
+    async def _fetch_overground_data(self):
+        """Fetch overground live departures."""
+        return await get_live_overground_trains(
+            self.overground_client or self.client,
+            self.overground_routes,
+            self.overground_api_url,
+            self.overground_auth,
+            backend=self.data_backend,
+            limiter=self.rate_limits.for_url(self.overground_api_url),
+        )
+
+    async def _poll_sources(self) -> None:
+        """Poll every data source in its own task, each on its own adaptive cadence.
+
+        A slow or failing source only delays itself.
+        """
+        await asyncio.gather(
+            *(self._poll_source(name, fetch) for name, fetch in self._sources().items())
+        )
+
+    async def _poll_source(self, name: str, fetch) -> None:
+        """Fetch one source forever, waiting as long as its AdaptiveSchedule says.
+
+        Tables with rows go to ``_show_fresh``; after a failed or empty fetch
+        ``_show_stale`` keeps the last good table up, marked stale, until a fetch
+        succeeds again.
+        """
+        schedule = AdaptiveSchedule.from_config(
+            self.refresh_intervals.get(name), self.refresh_interval_seconds
+        )
+        while True:
+            table = None
+            error = None
+            started = time.perf_counter()
+            try:
+                table = await fetch()
+            except Exception as e:  # noqa: BLE001 - any failure leaves the last table up
+                logger.warning("Refreshing %s failed: %s", name, e)
+                METRICS.inc("refresh_errors_total", source=name)
+                error = e
+            METRICS.observe("refresh_seconds", time.perf_counter() - started, source=name)
+            self._fetched(name, table, error)
+            if table is not None and not table.empty:
+                await self._show_fresh(name, table, time.time())
+            else:
+                self._show_stale(name)
+            delay = schedule.next_delay(table)
+            self._next_refresh[name] = time.monotonic() + delay
+            await asyncio.sleep(delay)
+
+    def _fetched(self, name: str, table, error: Exception | None) -> None:
+        """Called after every fetch of ``name``: ``table`` is None when it raised ``error``."""
+
+    @abstractmethod
+    async def _show_fresh(self, name: str, table, fetched_at: float) -> None:
+        """Take a fetched table with rows."""
+
+    @abstractmethod
+    def _show_stale(self, name: str) -> None:
+        """Flag the last good table of ``name`` as stale after a failed or empty fetch."""
+
+    async def _record_fresh(self, name: str, table, fetched_at: float, changed: bool = True):
+        """Add a fresh table to the history and, when it changed, save it as the last good
+        snapshot of ``name``."""
+        if self.history is not None:
+            self.history.record(name, table, fetched_at)
+        if changed and self.snapshots is not None:
+            await asyncio.to_thread(self.snapshots.save, name, table)
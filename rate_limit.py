@@ -0,0 +1,69 @@
+"""Token-bucket request rate limits per upstream host.
+
+A ``TokenBucket`` allows ``burst`` requests straight away and then refills at
+``rate`` requests per second; ``acquire`` waits until a token is free, and
+waiters are served in arrival order. ``HostRateLimits`` keeps one bucket per
+host, so concurrent callers share that host's budget and the budget carries
+over between refresh cycles.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Mapping
+from typing import Any
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Allow ``rate`` acquisitions per second with bursts of up to ``burst``.
+
+    A ``rate`` of zero or less disables the limit.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 4) -> None:
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait for a token and take it."""
+        if self.rate <= 0:
+            return
+        # The lock queues waiters so tokens go out first come, first served
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class HostRateLimits:
+    """One shared ``TokenBucket`` per host, all with the same rate and burst."""
+
+    def __init__(self, rate: float = 10.0, burst: int = 4) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+
+    @classmethod
+    def from_config(cls, value: Mapping[str, Any] | None) -> HostRateLimits:
+        """Build from a ``{"rate": ..., "burst": ...}`` mapping from config.yml."""
+        value = value or {}
+        return cls(rate=value.get("rate", 10.0), burst=value.get("burst", 4))
+
+    def for_url(self, url: str) -> TokenBucket:
+        """Return the bucket for the host serving ``url``."""
+        host = urlsplit(url).netloc or url
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
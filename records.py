@@ -0,0 +1,162 @@
+"""Pandas-free tables for the TUI.
+
+The fetchers in ``line.py``, ``bikepoint.py`` and ``overground.py`` return a
+pandas DataFrame by default. Passing ``backend="records"`` returns a
+``RecordTable`` of ``__slots__`` row records instead, which the widgets
+render directly and which never imports pandas. Record fields use the same
+names as the DataFrame columns, so both backends share one column contract
+and ``RecordTable.to_dataframe`` converts when a script wants pandas.
+
+Columns whose name starts with an underscore are internal (row identity,
+absolute times) and are not shown by the TUI.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping, Sequence
+from datetime import datetime
+from typing import Any
+
+BACKENDS = ("pandas", "records")
+
+
+class Record:
+    """Base for a compact table row; subclasses list their columns in ``__slots__``.
+
+    The order of ``__slots__`` is the column order, so it is not sorted.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *values: Any) -> None:
+        for name, value in zip(self.__slots__, values, strict=True):
+            setattr(self, name, value)
+
+    def __getitem__(self, name: str) -> Any:
+        return getattr(self, name)
+
+    def values(self) -> list[Any]:
+        return [getattr(self, name) for name in self.__slots__]
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and other.values() == self.values()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class LineStatusRecord(Record):
+    __slots__ = ("Line", "Status")
+
+
+class ArrivalRecord(Record):
+    __slots__ = (  # noqa: RUF023
+        "line",
+        "stationName",
+        "platformName",
+        "TimeToArrival",
+        "_vehicleId",
+        "_expectedArrival",
+    )
+
+
+class BikePointRecord(Record):
+    __slots__ = ("commonName", "location", "NbBikes", "NbEmpty", "_id")  # noqa: RUF023
+
+
+class OvergroundRecord(Record):
+    __slots__ = (  # noqa: RUF023
+        "route",
+        "stationFrom",
+        "stationTo",
+        "destination",
+        "platform",
+        "expectedTime",
+        "expectedDate",
+        "TimeToArrival",
+        "Line",
+        "_expectedArrival",
+    )
+
+
+class RecordTable:
+    """An ordered list of records sharing one column layout.
+
+    Exposes the small part of the DataFrame interface the app relies on:
+    ``columns``, ``empty`` and ``len()``.
+    """
+
+    __slots__ = ("columns", "rows")
+
+    def __init__(self, columns: Sequence[str] = (), rows: list[Record] | None = None) -> None:
+        self.columns = tuple(columns)
+        self.rows = rows if rows is not None else []
+
+    @classmethod
+    def of(cls, record_type: type[Record], rows: list[Record] | None = None) -> RecordTable:
+        return cls(record_type.__slots__, rows)
+
+    @property
+    def empty(self) -> bool:
+        return not self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Record]:
+        return iter(self.rows)
+
+    def to_dataframe(self):
+        """Return the same data as a pandas DataFrame (imports pandas)."""
+        import pandas as pd
+
+        df = pd.DataFrame([row.values() for row in self.rows], columns=pd.Index(list(self.columns)))
+        # datetime columns become datetime64 like the DataFrame path produces
+        for col in df.columns:
+            if len(df) and isinstance(df[col].iloc[0], datetime):
+                df[col] = pd.to_datetime(df[col])
+        return df
+
+    def __repr__(self) -> str:
+        return f"RecordTable(columns={self.columns!r}, rows={len(self.rows)})"
+
+
+def record_type_for(columns: Sequence[str]) -> type[Record] | None:
+    """Return the Record subclass whose fields are exactly ``columns``, if any."""
+    columns = tuple(columns)
+    for record_type in Record.__subclasses__():
+        if record_type.__slots__ == columns:
+            return record_type
+    return None
+
+
+def table_from_columns(
+    columns: Mapping[str, list], record_type: type[Record], backend: str = "pandas"
+):
+    """Build a DataFrame or a RecordTable from per-column lists.
+
+    ``columns`` must hold a list for every field of ``record_type``.
+    """
+    fields = record_type.__slots__
+    if backend == "records":
+        return RecordTable.of(
+            record_type, [record_type(*values) for values in zip(*(columns[f] for f in fields))]
+        )
+
+    import pandas as pd
+
+    return pd.DataFrame({f: columns[f] for f in fields}, columns=pd.Index(list(fields)))
+
+
+def iter_table_rows(table) -> Iterator[tuple[list[Any], Any]]:
+    """Yield ``(values, row)`` for each row of a DataFrame or RecordTable.
+
+    ``row`` supports ``row[column_name]`` for either backend.
+    """
+    if isinstance(table, RecordTable):
+        for record in table.rows:
+            yield record.values(), record
+    else:
+        for _, row in table.iterrows():
+            yield row.tolist(), row
@@ -0,0 +1,186 @@
+"""Timeouts, retries and circuit breaking for the shared HTTP clients.
+
+``ResilientClient`` wraps an ``httpx.AsyncClient`` (``ClientRegistry`` puts
+it under the HTTP cache) and makes every GET:
+
+- give up after a per-endpoint timeout (``endpoint_timeouts``, else
+  ``timeout``), raised as ``httpx.TimeoutException``
+- retry network errors, timeouts, 429 and 5xx responses up to ``retries``
+  times with exponential back-off and jitter
+- go through a ``CircuitBreaker`` per endpoint: after ``failure_threshold``
+  failed calls in a row the endpoint is skipped for ``reset_after`` seconds
+  (``CircuitOpenError``, raised without a request), then a single trial call
+  decides whether it closes again
+
+An endpoint is the first path segment plus the last CamelCase one, e.g.
+``Line/Arrivals`` for ``Line/victoria/Arrivals/940GZZLUOXC`` or ``BikePoint``
+for ``BikePoint/BikePoints_1``; these names key ``endpoint_timeouts``.
+Other statuses (404, ...) are returned to the caller as before.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Mapping
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from client_layers import ClientLayer, LayerStats
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request to an endpoint whose circuit is open."""
+
+
+def endpoint_name(url: str) -> str:
+    """Group a request URL or path into the endpoint it calls (see module docstring)."""
+    segments = [s for s in urlsplit(str(url)).path.split("/") if s]
+    if not segments:
+        return "/"
+    # TfL resource names are CamelCase words; ids and all-caps station codes are not
+    tail = next(
+        (s for s in reversed(segments[1:]) if s.isalpha() and s[:1].isupper() and not s.isupper()),
+        None,
+    )
+    return f"{segments[0]}/{tail}" if tail else segments[0]
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open trial -> closed or open again."""
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0) -> None:
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: float | None = None
+        # when the current half-open trial went out; a trial that never reports back (e.g.
+        # cancelled) stops blocking others after reset_after
+        self._trial_started: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open only one trial call at a time."""
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        if state == "half-open" and (
+            self._trial_started is None or now - self._trial_started >= self.reset_after
+        ):
+            self._trial_started = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_started = None
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            # a failed trial re-opens for another reset_after
+            self.opened_at = time.monotonic()
+
+
+class ResilienceStats(LayerStats):
+    """Counters for the resilience layer."""
+
+    __slots__ = ("failures", "requests", "retries", "short_circuits")
+    metric_prefix = "http_resilience"
+
+
+class ResilientClient(ClientLayer):
+    """Wrap an ``httpx.AsyncClient`` so GETs get timeouts, retries and circuit breaking.
+
+    Anything other than ``get`` is passed straight to the wrapped client.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        timeout: float = 10.0,
+        endpoint_timeouts: Mapping[str, float] | None = None,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        failure_threshold: int = 5,
+        reset_after: float = 30.0,
+    ) -> None:
+        super().__init__(client)
+        self.timeout = timeout
+        self.endpoint_timeouts = dict(endpoint_timeouts or {})
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.stats = ResilienceStats()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        if endpoint not in self.breakers:
+            self.breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_after)
+        return self.breakers[endpoint]
+
+    def _delay(self, attempt: int) -> float:
+        # exponential back-off with full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    async def _attempt(self, url: str, timeout: float, **kwargs: Any) -> httpx.Response:
+        try:
+            async with asyncio.timeout(timeout):
+                return await self.client.get(url, **kwargs)
+        except TimeoutError:
+            raise httpx.TimeoutException(f"no response from {url} within {timeout}s") from None
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        endpoint = endpoint_name(url)
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            self.stats.short_circuits += 1
+            raise CircuitOpenError(f"circuit open for {endpoint}, skipping {url}")
+
+        timeout = self.endpoint_timeouts.get(endpoint, self.timeout)
+        attempt = 0
+        while True:
+            self.stats.requests += 1
+            try:
+                response = await self._attempt(url, timeout, **kwargs)
+                error = None if response.status_code not in RETRY_STATUSES else response
+            except httpx.TransportError as exc:
+                response, error = None, exc
+            if error is None:
+                breaker.record_success()
+                return response
+            if attempt >= self.retries:
+                break
+            attempt += 1
+            self.stats.retries += 1
+            logger.debug("Retrying %s (attempt %s) after %s", url, attempt, error)
+            await asyncio.sleep(self._delay(attempt - 1))
+
+        self.stats.failures += 1
+        breaker.record_failure()
+        if breaker.state != "closed":
+            logger.warning("Circuit opened for %s after %s failures", endpoint, breaker.failures)
+        if response is not None:
+            return response
+        raise error
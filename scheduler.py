@@ -0,0 +1,100 @@
+"""Adaptive per-source refresh cadence.
+
+Each data source (tube status, arrivals, bikes, overground) is polled by
+its own task. After every fetch ``AdaptiveSchedule.next_delay`` picks the
+wait before the next one:
+
+- a vehicle due within ``urgent_within`` seconds -> ``min_interval``
+- data changed since the last fetch -> back to the base ``interval``
+- data unchanged -> the previous delay times ``backoff``, up to ``max_interval``
+
+Each delay is spread by +/- ``jitter`` (a fraction) so sources and screens
+don't fall into lock-step.
+"""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Mapping
+from typing import Any
+
+from countdown import seconds_until_next_arrival
+from records import iter_table_rows
+
+# Columns that change every poll without the underlying data changing
+_VOLATILE_COLUMNS = frozenset({"TimeToArrival", "_expectedArrival"})
+
+
+def table_fingerprint(table) -> int | None:
+    """Hash of a table's contents, ignoring countdown columns; None for no data."""
+    if table is None:
+        return None
+    keep = [i for i, col in enumerate(table.columns) if col not in _VOLATILE_COLUMNS]
+    return hash(tuple(tuple(str(values[i]) for i in keep) for values, _ in iter_table_rows(table)))
+
+
+class AdaptiveSchedule:
+    """Polling cadence for one source, adapted to how its data behaves."""
+
+    def __init__(
+        self,
+        interval: float,
+        min_interval: float | None = None,
+        max_interval: float | None = None,
+        backoff: float = 1.5,
+        jitter: float = 0.1,
+        urgent_within: float = 120,
+    ) -> None:
+        self.interval = float(interval)
+        self.min_interval = float(min_interval if min_interval is not None else interval)
+        self.max_interval = float(max_interval if max_interval is not None else interval * 4)
+        self.backoff = backoff
+        self.jitter = jitter
+        self.urgent_within = urgent_within
+        self.current = self.interval
+        self._last_fingerprint: int | None = None
+
+    @classmethod
+    def from_config(cls, value: Any, default_interval: float) -> AdaptiveSchedule:
+        """Build from a YAML value: a number of seconds or a mapping of settings.
+
+        Mapping keys: interval, min, max, backoff, jitter, urgent_within.
+        """
+        if isinstance(value, Mapping):
+            return cls(
+                value.get("interval", default_interval),
+                min_interval=value.get("min"),
+                max_interval=value.get("max"),
+                backoff=value.get("backoff", 1.5),
+                jitter=value.get("jitter", 0.1),
+                urgent_within=value.get("urgent_within", 120),
+            )
+        if value is not None:
+            return cls(value)
+        return cls(default_interval)
+
+    def next_delay(self, table) -> float:
+        """Seconds to wait before the next fetch, given the table just fetched.
+
+        Pass None when the fetch failed; the current cadence is then kept.
+        """
+        fingerprint = table_fingerprint(table)
+        soonest = seconds_until_next_arrival(table) if table is not None else None
+        if soonest is not None and soonest < self.urgent_within:
+            self.current = self.min_interval
+        elif fingerprint is None:
+            pass
+        elif fingerprint != self._last_fingerprint:
+            self.current = self.interval
+        else:
+            self.current = min(self.current * self.backoff, self.max_interval)
+        if fingerprint is not None:
+            self._last_fingerprint = fingerprint
+        spread = self.current * self.jitter
+        return max(1.0, self.current + random.uniform(-spread, spread))
+
+    def __repr__(self) -> str:
+        return (
+            f"AdaptiveSchedule(interval={self.interval}, min={self.min_interval}, "
+            f"max={self.max_interval}, current={self.current})"
+        )
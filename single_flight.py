@@ -0,0 +1,84 @@
+"""Collapse concurrent identical GETs into one upstream request.
+
+``SingleFlightClient`` sits on top of the shared client stack. While a GET
+for a URL is in flight, further GETs for the same normalized URL (query
+parameters sorted, scheme and host lower-cased) wait for that request
+instead of sending their own. When a response is shared it is handed out
+as an ``http_cache.CachedResponse``, so its JSON is decoded once for all
+callers and must be treated as read-only.
+
+Requests carrying anything beyond ``params`` (headers, auth, ...) are not
+collapsed. ``SingleFlightClient.stats`` counts calls and how many of them
+were collapsed; both are exported through ``metrics.METRICS`` as
+``http_single_flight_calls_total`` and ``http_single_flight_collapsed_total``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+from client_layers import ClientLayer, LayerStats
+from http_cache import CachedResponse
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class SingleFlightStats(LayerStats):
+    """Counters for request collapsing."""
+
+    __slots__ = ("calls", "collapsed")
+    metric_prefix = "http_single_flight"
+
+
+class SingleFlightClient(ClientLayer):
+    """Wrap a client so concurrent identical GET requests share one in-flight call.
+
+    Anything other than ``get`` is passed straight to the wrapped client.
+    """
+
+    def __init__(self, client: Any) -> None:
+        super().__init__(client)
+        self.stats = SingleFlightStats()
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._callers: dict[str, int] = {}
+
+    def _flight_key(self, url: str, params: Any) -> str:
+        request_url = self.client.build_request("GET", url, params=params).url
+        return str(request_url.copy_with(params=sorted(request_url.params.multi_items())))
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response | CachedResponse:
+        if set(kwargs) - {"params"}:
+            return await self.client.get(url, **kwargs)
+
+        key = self._flight_key(url, kwargs.get("params"))
+        self.stats.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            # the request runs as its own task so a cancelled caller does not cancel
+            # it for everyone else waiting on it
+            task = asyncio.ensure_future(self._fetch(key, url, kwargs))
+            task.add_done_callback(_consume_exception)
+            self._in_flight[key] = task
+            self._callers[key] = 1
+        else:
+            self.stats.collapsed += 1
+            self._callers[key] += 1
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, url: str, kwargs: dict) -> httpx.Response | CachedResponse:
+        try:
+            response = await self.client.get(url, **kwargs)
+        finally:
+            del self._in_flight[key]
+            shared = self._callers.pop(key) > 1
+        if shared and not isinstance(response, CachedResponse):
+            response = CachedResponse(response)
+        return response
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    # every caller may have been cancelled; don't leave the error unretrieved
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,126 @@
+"""Last-good snapshot of each data source, kept in a local SQLite file.
+
+The app saves every successful fetch here so that after a restart it can
+paint the previous data straight away, marked as stale, while fresh data
+is fetched in the background. Each source is one row holding its column
+names and rows as compact JSON; datetimes round-trip through ISO strings
+(timezone-aware UTC, as the tables hold them).
+``table_to_payload``/``table_from_payload`` are the same encoding, shared
+with the aggregator's published snapshots.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from records import RecordTable, iter_table_rows, record_type_for
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    source TEXT PRIMARY KEY,
+    saved_at REAL NOT NULL,
+    columns TEXT NOT NULL,
+    rows TEXT NOT NULL
+)
+"""
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if hasattr(value, "item"):
+        # numpy scalars
+        return value.item()
+    return str(value)
+
+
+def _decode(obj: dict) -> Any:
+    if set(obj) == {"$dt"}:
+        try:
+            value = datetime.fromisoformat(obj["$dt"])
+        except ValueError:
+            return None
+        # snapshots saved before arrival times were timezone-aware hold naive UTC
+        return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+    return obj
+
+
+def table_to_payload(table) -> tuple[list[str], str]:
+    """Return ``(columns, rows_json)`` for a RecordTable or DataFrame."""
+    columns = [str(col) for col in table.columns]
+    rows = [values for values, _ in iter_table_rows(table)]
+    return columns, json.dumps(rows, default=_encode, separators=(",", ":"))
+
+
+def table_from_payload(columns: list[str], rows: str | list, backend: str = "pandas"):
+    """Rebuild a table from ``table_to_payload`` output (rows as JSON text or decoded).
+
+    Returns None if the columns don't match a known record layout.
+    """
+    record_type = record_type_for(columns)
+    if record_type is None:
+        return None
+    if isinstance(rows, str):
+        rows = json.loads(rows, object_hook=_decode)
+    else:
+        rows = [[_decode(v) if isinstance(v, dict) else v for v in values] for values in rows]
+    table = RecordTable.of(record_type, [record_type(*values) for values in rows])
+    return table.to_dataframe() if backend == "pandas" else table
+
+
+class SnapshotStore:
+    """Save and load per-source table snapshots in one SQLite file."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute(_SCHEMA)
+        return conn
+
+    def save(self, source: str, table) -> None:
+        """Replace the stored snapshot for ``source`` with ``table``."""
+        columns, payload = table_to_payload(table)
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                    (source, time.time(), json.dumps(columns), payload),
+                )
+        except sqlite3.Error as exc:
+            logger.warning("Could not save %s snapshot to %s: %s", source, self.path, exc)
+
+    def load_all(self) -> dict[str, tuple[RecordTable, float]]:
+        """Return ``{source: (table, saved_at)}`` for every readable snapshot.
+
+        Tables are always RecordTables, whatever the data backend: loading runs before
+        the first paint and must not import pandas. The first fresh fetch replaces them.
+        Snapshots whose columns no longer match a known record layout are skipped.
+        """
+        if not self.path.exists():
+            return {}
+        try:
+            with closing(self._connect()) as conn:
+                stored = conn.execute(
+                    "SELECT source, saved_at, columns, rows FROM snapshots"
+                ).fetchall()
+        except sqlite3.Error as exc:
+            logger.warning("Could not read snapshots from %s: %s", self.path, exc)
+            return {}
+
+        snapshots = {}
+        for source, saved_at, columns_json, rows_json in stored:
+            table = table_from_payload(json.loads(columns_json), rows_json, "records")
+            if table is not None:
+                snapshots[source] = (table, saved_at)
+        return snapshots
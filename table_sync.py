@@ -0,0 +1,97 @@
+"""Keyed, diff-based updates for Textual DataTables.
+
+``sync_table`` reconciles a DataTable against freshly fetched rows instead of
+clearing and repopulating it: rows are matched by a stable key, only cells
+whose text changed are updated, only rows that appeared or disappeared are
+added or removed, and the table is re-sorted only when the order changed.
+This keeps the cursor and scroll position, and a table whose rows did not
+change is not touched, so it is not repainted at all. Textual's DataTable
+drops its whole render cache on any write, though, so once one cell changed
+(a countdown ticked) every visible cell is rendered again, as after a clear
+and repopulate; benchmarks/bench_table_sync.py measures both cases.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from textual.widgets import DataTable
+
+
+class SyncStats:
+    """Counts of the DataTable operations one ``sync_table`` call performed."""
+
+    __slots__ = ("added", "rebuilt", "removed", "reordered", "updated")
+
+    def __init__(self) -> None:
+        self.added = 0
+        self.removed = 0
+        self.updated = 0
+        self.reordered = False
+        self.rebuilt = False
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.updated or self.reordered or self.rebuilt)
+
+    def __repr__(self) -> str:
+        return (
+            f"SyncStats(added={self.added}, removed={self.removed}, updated={self.updated}, "
+            f"reordered={self.reordered}, rebuilt={self.rebuilt})"
+        )
+
+
+def sync_table(
+    table: DataTable, columns: Sequence[str], rows: Iterable[tuple[str, Sequence[str]]]
+) -> SyncStats:
+    """Bring ``table`` in line with ``rows`` using as few operations as possible.
+
+    ``rows`` yields ``(key, cells)`` in display order; ``cells`` are the
+    rendered strings for ``columns``. Repeated keys are made unique by
+    suffixing their occurrence count.
+    """
+    stats = SyncStats()
+    columns = [str(col) for col in columns]
+
+    # Column layout changed (or first load): start over with keyed columns
+    if [column_key.value for column_key in table.columns] != columns:
+        table.clear(columns=True)
+        for col in columns:
+            table.add_column(col, key=col)
+        stats.rebuilt = True
+
+    desired: dict[str, list[str]] = {}
+    seen: dict[str, int] = {}
+    for key, cells in rows:
+        count = seen.get(key, 0)
+        seen[key] = count + 1
+        desired[key if count == 0 else f"{key}#{count}"] = [str(cell) for cell in cells]
+
+    for row_key in list(table.rows):
+        if row_key.value not in desired:
+            table.remove_row(row_key)
+            stats.removed += 1
+
+    for key, cells in desired.items():
+        if key in table.rows:
+            for col, old, new in zip(columns, table.get_row(key), cells):
+                if old != new:
+                    # column widths stay as they are, so one longer value doesn't
+                    # trigger a layout pass
+                    table.update_cell(key, col, new, update_width=False)
+                    stats.updated += 1
+        else:
+            table.add_row(*cells, key=key)
+            stats.added += 1
+
+    order = list(desired)
+    if [row.key.value for row in table.ordered_rows] != order:
+        # DataTable.sort hands the key function a row's cell values, so map those back to
+        # the wanted position; identical rows are interchangeable on screen anyway
+        position = {tuple(cells): index for index, cells in enumerate(desired.values())}
+        table.sort(key=lambda values: position.get(tuple(values), len(position)))
+        stats.reordered = True
+
+    return stats
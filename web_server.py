@@ -0,0 +1,304 @@
+"""Serve the latest table of every source as JSON and server-sent events.
+
+``SnapshotServer`` is a small asyncio HTTP/1.1 server with no dependencies
+beyond the standard library. Whoever fetches the data (the headless
+aggregator, or the Textual app with ``web_port`` set) calls ``publish``
+with each new table, and every reader is served from that one cached
+copy:
+
+- ``GET /events``: a Server-Sent Events stream. A new subscriber first gets
+  the current snapshot of every source, then a ``snapshot`` event whenever
+  one changes; a comment line every ``KEEPALIVE`` seconds keeps idle
+  connections open
+- ``GET /snapshot``: every current snapshot as one JSON object keyed by
+  source, and ``GET /snapshot/<source>`` for a single one
+- ``GET /``: a page that renders the tables in a browser from ``/events``
+- ``GET /metrics`` and ``GET /metrics.json``: the timings of a ``metrics.Metrics``
+  registry, if the server was given one, in the Prometheus text format or as JSON
+
+A snapshot is JSON with ``source``, ``fetched_at`` (epoch seconds),
+``stale`` (true while the source's fetches fail and its last good table is
+served), ``columns`` and ``rows`` in the snapshots.py encoding; columns
+starting with "_" are for clients (e.g. arrival times for local
+countdowns), not for display.
+
+Each update is encoded once. SSE subscribers all get the same bytes, and a
+subscriber that falls behind only ever has the latest event per source
+queued. JSON responses are built once per version and carry an ETag, so
+pollers that send ``If-None-Match`` get a 304 until something changes.
+Connections are kept alive between requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+
+from metrics import Metrics
+from snapshots import table_to_payload
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE = 15.0
+
+_REASONS = {200: "OK", 304: "Not Modified", 404: "Not Found", 405: "Method Not Allowed"}
+
+_PAGE = b"""<!doctype html>
+<html><head><meta charset="utf-8"><title>TfL Monitor</title>
+<style>
+body { font-family: sans-serif; background: #282a36; color: #f8f8f2; margin: 1em; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { padding: 0.2em 0.8em; text-align: left; }
+tr:nth-child(even) { background: #343746; }
+.stale { color: #ffb86c; font-size: 0.8em; }
+</style></head>
+<body><div id="tables"></div>
+<script>
+const tables = {};
+function render() {
+  const root = document.getElementById("tables");
+  root.textContent = "";
+  for (const [source, snap] of Object.entries(tables)) {
+    const h = document.createElement("h3");
+    h.textContent = source.replace("_", " ");
+    if (snap.stale) {
+      const note = document.createElement("span");
+      note.className = "stale";
+      note.textContent = " stale \\u00b7 updated " + new Date(snap.fetched_at * 1000).toLocaleTimeString();
+      h.appendChild(note);
+    }
+    const visible = snap.columns.map((c, i) => [c, i]).filter(([c]) => !c.startsWith("_"));
+    const table = document.createElement("table");
+    const head = table.insertRow();
+    for (const [c] of visible) head.appendChild(document.createElement("th")).textContent = c;
+    for (const row of snap.rows) {
+      const tr = table.insertRow();
+      for (const [, i] of visible) {
+        const v = row[i];
+        tr.insertCell().textContent = v && v.$dt ? v.$dt : (v ?? "");
+      }
+    }
+    root.append(h, table);
+  }
+}
+new EventSource("events").addEventListener("snapshot", (e) => {
+  const snap = JSON.parse(e.data);
+  tables[snap.source] = snap;
+  render();
+});
+</script></body></html>
+"""
+
+
+class _Subscriber:
+    """Events waiting to be written to one /events connection, latest per source."""
+
+    def __init__(self) -> None:
+        self.pending: dict[str, bytes] = {}
+        self.ready = asyncio.Event()
+
+    def push(self, source: str, event: bytes) -> None:
+        # a newer snapshot replaces one the subscriber hasn't been sent yet
+        self.pending[source] = event
+        self.ready.set()
+
+    async def next_events(self, timeout: float) -> list[bytes]:
+        """Wait up to ``timeout`` seconds for events; [] if none arrived."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except TimeoutError:
+            return []
+        self.ready.clear()
+        events = list(self.pending.values())
+        self.pending.clear()
+        return events
+
+
+def _response(status: int, body: bytes = b"", headers: dict[str, str] | None = None) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS[status]}", f"Content-Length: {len(body)}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+
+class SnapshotServer:
+    """Publish per-source tables and serve them to any number of readers."""
+
+    def __init__(self, metrics: Metrics | None = None) -> None:
+        self.metrics = metrics
+        # Per source: the latest snapshot's metadata, its rows and the whole snapshot as the
+        # JSON text clients receive, that text framed as an SSE event, and a version that
+        # bumps on every change (the ETag of its JSON responses)
+        self.latest: dict[str, dict] = {}
+        self._rows: dict[str, str] = {}
+        self._data: dict[str, str] = {}
+        self._events: dict[str, bytes] = {}
+        self._versions: dict[str, int] = {}
+        # encoded JSON responses by path, dropped whenever a snapshot changes
+        self._responses: dict[str, tuple[str, bytes]] = {}
+        self._subscribers: set[_Subscriber] = set()
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._server: asyncio.Server | None = None
+        self._closing = False
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, source: str, table, fetched_at: float, stale: bool = False) -> bool:
+        """Make ``table`` the current snapshot of ``source`` and send it to every subscriber.
+
+        Returns False, sending nothing, if it is the same as the current fresh snapshot.
+        """
+        columns, rows_json = table_to_payload(table)
+        latest = self.latest.get(source)
+        if latest and not latest["stale"] and not stale and self._rows[source] == rows_json:
+            # nothing new for readers; just note that the data is current
+            latest["fetched_at"] = fetched_at
+            return False
+        self.latest[source] = {"fetched_at": fetched_at, "stale": stale, "columns": columns}
+        self._rows[source] = rows_json
+        head = json.dumps(
+            {"source": source, "fetched_at": fetched_at, "stale": stale, "columns": columns},
+            separators=(",", ":"),
+        )
+        # splice in the rows already encoded as JSON rather than decoding and re-encoding them
+        self._data[source] = head[:-1] + ',"rows":' + rows_json + "}"
+        self._changed(source)
+        return True
+
+    def mark_stale(self, source: str) -> None:
+        """Re-publish the last good table of ``source`` flagged as stale (once)."""
+        latest = self.latest.get(source)
+        if latest is None or latest["stale"]:
+            return
+        latest["stale"] = True
+        self._data[source] = self._data[source].replace('"stale":false', '"stale":true', 1)
+        self._changed(source)
+
+    def _changed(self, source: str) -> None:
+        self._versions[source] = self._versions.get(source, 0) + 1
+        self._responses.clear()
+        event = f"event: snapshot\ndata: {self._data[source]}\n\n".encode()
+        self._events[source] = event
+        for subscriber in self._subscribers:
+            subscriber.push(source, event)
+
+    def _json_response(self, path: str) -> tuple[str, bytes] | None:
+        """``(etag, body)`` for a /snapshot path, built once per version; None if unknown."""
+        if path not in self._responses:
+            if path == "/snapshot":
+                sources = list(self._data)
+                body = "{" + ",".join(f'"{s}":{self._data[s]}' for s in sources) + "}"
+            else:
+                source = path.removeprefix("/snapshot/")
+                if source not in self._data:
+                    return None
+                sources = [source]
+                body = self._data[source]
+            etag = '"' + "-".join(f"{s}.{self._versions[s]}" for s in sources) + '"'
+            self._responses[path] = (etag, body.encode())
+        return self._responses[path]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while not self._closing:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                method, path = ([*request_line.decode("latin-1").split(), "", ""])[:2]
+                path = path.split("?", 1)[0].rstrip("/") or "/"
+                if method != "GET":
+                    writer.write(_response(405, headers={"Connection": "close"}))
+                    break
+                if path == "/events":
+                    await self._serve_events(writer)
+                    break
+                writer.write(self._route(path, headers))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _route(self, path: str, headers: dict[str, str]) -> bytes:
+        if path == "/":
+            return _response(200, _PAGE, {"Content-Type": "text/html; charset=utf-8"})
+        if path == "/snapshot" or path.startswith("/snapshot/"):
+            cached = self._json_response(path)
+            if cached is None:
+                return _response(404)
+            etag, body = cached
+            if headers.get("if-none-match") == etag:
+                return _response(304, headers={"ETag": etag})
+            return _response(
+                200,
+                body,
+                {"Content-Type": "application/json", "ETag": etag, "Cache-Control": "no-cache"},
+            )
+        if path in ("/metrics", "/metrics.json") and self.metrics is not None:
+            if path == "/metrics":
+                body, content_type = self.metrics.to_prometheus(), "text/plain; version=0.0.4"
+            else:
+                body, content_type = json.dumps(self.metrics.as_dict()), "application/json"
+            return _response(200, body.encode(), {"Content-Type": content_type})
+        return _response(404)
+
+    async def _serve_events(self, writer: asyncio.StreamWriter) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n"
+        )
+        subscriber = _Subscriber()
+        for source, event in self._events.items():
+            subscriber.push(source, event)
+        self._subscribers.add(subscriber)
+        logger.debug("Subscriber connected (%s in total)", len(self._subscribers))
+        try:
+            while True:
+                events = await subscriber.next_events(KEEPALIVE)
+                if self._closing:
+                    return
+                writer.write(b"".join(events) or b": keep-alive\n\n")
+                await writer.drain()
+        finally:
+            self._subscribers.discard(subscriber)
+            logger.debug("Subscriber gone (%s left)", len(self._subscribers))
+
+    async def start(self, host: str, port: int) -> None:
+        """Start accepting connections on ``host:port`` (port 0 picks a free one)."""
+        self._closing = False
+        self._server = await asyncio.start_server(self._handle, host, port, backlog=1024)
+        logger.info("Serving snapshots on http://%s:%s/", *self.address)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        assert self._server is not None, "server not started"
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self) -> None:
+        """Stop accepting connections and end every open stream."""
+        if self._server is None:
+            return
+        self._server.close()
+        # end the /events streams so closing the server doesn't wait on them
+        self._closing = True
+        for subscriber in self._subscribers:
+            subscriber.ready.set()
+        # and drop idle keep-alive connections waiting for their next request
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None